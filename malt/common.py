@@ -6,9 +6,7 @@
 import datetime
 import json
 import logging
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import numpy as np
 import os
 from logging.handlers import TimedRotatingFileHandler
 
@@ -30,10 +28,22 @@ ALL_STRATEGIES = ['Euler']
 CANDLE_FEATURES = ['time', 'openBid', 'highBid', 'lowBid', 'closeBid'] + \
                   ['openAsk', 'highAsk', 'lowAsk', 'closeAsk', 'volume']
 
+# Candle granularities and their lengths in seconds.
+GRANULARITIES = {'M1': 60, 'M5': 300, 'M15': 900, 'M30': 1800, \
+                 'H1': 3600, 'H4': 14400, 'D': 86400}
+
+# Maximum number of candles the data source returns for a single request.
+MAX_CANDLES_PER_REQUEST = 5000
+
 # Project Directories.
 PROJECT_DIR = os.path.dirname(os.path.realpath(__file__))
-DAILY_CANDLES = "{0}/data/store/candles/daily".format(PROJECT_DIR)
+CANDLES = "{0}/data/store/candles".format(PROJECT_DIR)
+DAILY_CANDLES = "{0}/daily".format(CANDLES)
+COLUMNS = "{0}/data/store/columns".format(PROJECT_DIR)
 DAILY_STRATEGY = "{0}/exec/daily_strategy".format(PROJECT_DIR)
+MODEL_CACHE = "{0}/strategies/cache".format(PROJECT_DIR)
+LEDGER_FILE = "{0}/strategies/ledger.db".format(PROJECT_DIR)
+PIPELINE_STATE = "{0}/exec/pipeline_state.json".format(PROJECT_DIR)
 
 # Start day of historical data.
 START_DATE = '2005-01-01'
@@ -65,6 +75,32 @@ TRADE_TOKEN = ACCOUNT_INFO.get('Token-Trade')
 BUY = 'buy'
 SELL = 'sell'
 
+# Strategy modes. Live strategies trade with a serialized model and never
+# read the historical data, backtest strategies learn and test on it.
+MODE_LIVE = 'LIVE'
+MODE_BACKTEST = 'BACKTEST'
+
+# Trading days are aligned to this time zone.
+TIMEZONE = 'America/New_York'
+
+# Times to close the trades of the day, and to open the next day's.
+DAY_CLOSE = datetime.time(16, 59)
+DAY_OPEN = datetime.time(17, 0)
+
+# Weekdays with a close, Monday - Friday, and with an open, Sunday - Thursday.
+CLOSE_DAYS = [0, 1, 2, 3, 4]
+OPEN_DAYS = [6, 0, 1, 2, 3]
+
+# Number of versions of each published strategy kept on disk.
+KEEP_VERSIONS = 3
+
+# Seconds between checks for newly published strategies.
+RELOAD_INTERVAL = 10
+
+# Seconds before the close to load the strategies and open the connections.
+# Shorter than IDLE_TIMEOUT, so the connections are still open at the close.
+WARM_UP_LEAD = 30
+
 # Units.
 # Unit shapes.
 UNIT_CONSTANT = 'CONSTANT'
@@ -80,9 +116,10 @@ SQUARE_FACTOR = 0.05   # 1/200
 LOG_FACTOR = 37.75     # 200/log(200)
 MAX_UNITS = 500
 
-# REST end-points.
-GAME_URL = "api-fxpractice.oanda.com"
-TRADE_URL = "api-fxtrade.oanda.com"
+# REST end-points. Can be overridden in the account info file, e.g. with
+# "http://localhost:8080" to run against a local malt.exec.sandbox server.
+GAME_URL = ACCOUNT_INFO.get('Url-Game', "api-fxpractice.oanda.com")
+TRADE_URL = ACCOUNT_INFO.get('Url-Trade', "api-fxtrade.oanda.com")
 
 # HTTP request header for game and trade.
 GAME_HEADER = {"Content-type": "application/x-www-form-urlencoded", \
@@ -93,6 +130,60 @@ TRADE_HEADER = {}
 # File log location.
 LOG_FILE = "{0}/../logs/daily.log".format(PROJECT_DIR)
 
+#---------------------------------------
+# Connections:
+#---------------------------------------
+
+# Maximum number of concurrent connections to each host.
+MAX_CONNECTIONS = 8
+
+# Maximum number of requests per second sent to each host.
+MAX_REQUEST_RATE = 10
+
+# Seconds to wait for a connection or a response before giving up.
+REQUEST_TIMEOUT = 30
+
+# Seconds a connection is kept idle, before the server may drop it.
+IDLE_TIMEOUT = 60
+
+# Number of times a request is sent again over a new connection after the
+# connection failed. Only requests safe to repeat are sent again.
+MAX_RETRIES = 2
+
+# Number of instruments whose candles are fetched concurrently.
+FETCH_WORKERS = 8
+
+#---------------------------------------
+# Training:
+#---------------------------------------
+
+# Number of processes training models in parallel.
+TRAIN_WORKERS = os.cpu_count() or 1
+
+# Number of stages of the daily training run at the same time. Stages that
+# train models share the TRAIN_WORKERS processes.
+PIPELINE_WORKERS = 8
+
+# Number of walk-forward folds each model is validated on.
+VALIDATION_FOLDS = 5
+
+# Number of best combinations plotted during model selection.
+PLOT_TOP_K = 5
+
+# Maximum size in bytes of the cache of trained models.
+MODEL_CACHE_SIZE = 512 * 2**20
+
+# Number of latest rows models learn from. All history if None.
+TRAIN_WINDOW = None
+
+# Days after which a model is retrained even if it still predicts well.
+MAX_MODEL_AGE = 30
+
+# Proportion of predictions in the wrong direction since the last training,
+# over at least the minimum number of days, after which a model is retrained.
+DRIFT_THRESHOLD = 0.6
+MIN_DRIFT_DAYS = 20
+
 
 #===============================================================================
 #   Functions:
@@ -114,6 +205,21 @@ def get_strategy_loc(instrument):
     return model_loc, param_loc
 
 
+def get_flat_model_loc(instrument):
+    """ Obtain the location of the serialized model exported as flat arrays,
+        see malt.strategies.flat_tree.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+
+        Returns:
+            flat_loc: string. Path to the exported model.
+    """
+    flat_loc = "{0}/{1}.npy".format(DAILY_STRATEGY, instrument)
+
+    return flat_loc
+
+
 def get_strategy_module(strategy_name):
     """ Obtain the module where the strategy class is defined.
 
@@ -147,6 +253,22 @@ def price_to_pip(price, pip_factor):
     return pip_string
 
 
+def prices_to_pips(prices, pip_factor):
+    """ Numeric and vectorized price_to_pip. Values are rounded to 1 decimal
+        place in pips instead of being formatted.
+
+        Args:
+            prices: float or np.array. Actual prices of instrument.
+            pip_factor: int. The multiplier for calculating pip from price.
+
+        Returns:
+            pips: float or np.array. The prices in pips with 1 decimal place.
+    """
+    pips = np.round(np.multiply(prices, pip_factor), 1)
+
+    return pips
+
+
 def list_to_float(lst):
     """ Change the entire list to float.
 
@@ -189,10 +311,18 @@ def plot(vector, name):
         Returns:
             void.
     """
-    plt.plot(vector)
-    plt.title(name)
-    plt.savefig(name)
-    plt.close()
+    # Import late, only processes drawing plots need to load matplotlib.
+    # Draw on a figure of its own rather than the global pyplot one, so
+    # that threads can plot at the same time.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot(1, 1, 1)
+    axes.plot(vector)
+    axes.set_title(name)
+    figure.savefig(name)
 
     return
 
@@ -211,6 +341,41 @@ def get_raw_data(instrument):
     return path
 
 
+def get_candle_data(instrument, granularity):
+    """ Returns the location of the raw historical candle data file of the
+        given granularity.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            granularity: string. One of GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            path: string. File path to the raw candle data file.
+    """
+    if granularity == 'D':
+        return get_raw_data(instrument)
+
+    path = '{0}/{1}/{2}.csv'.format(CANDLES, granularity.lower(), instrument)
+
+    return path
+
+
+def get_columnar_data(instrument, granularity='D'):
+    """ Returns the location of the binary columnar candle store of the given
+        granularity.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            granularity: string. One of GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            path: string. Path to the directory holding one file per field.
+    """
+    path = '{0}/{1}/{2}'.format(COLUMNS, granularity.lower(), instrument)
+
+    return path
+
+
 def get_logger(name):
     """ Get the logger for logging events.
 
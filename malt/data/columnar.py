@@ -0,0 +1,313 @@
+""" This is the malt.data.columnar module.
+    This module is responsible for keeping the raw candles in a binary
+    columnar store, one typed array per field, that is read through memory
+    mapping instead of being parsed from text. Each build writes a new
+    version of all fields and then switches a manifest to it, so readers
+    always see fields of the same version.
+"""
+
+# External imports
+import csv
+import json
+import os
+import numpy as np
+
+# Internal imports
+from malt import common
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+# Fields holding prices, stored as float64.
+PRICE_FIELDS = common.CANDLE_FEATURES[1:-1]
+
+# Type of the date index, by granularity.
+DATE_TYPE = 'datetime64[D]'
+TIME_TYPE = 'datetime64[us]'
+
+# File naming the current version of a store.
+MANIFEST_FILE = 'manifest.json'
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def read_csv_columns(csv_file, granularity='D'):
+    """ Parse a raw candle file written by malt.data.rates into columns, in
+        a single pass over the text.
+
+        Args:
+            csv_file: string. Location of the raw candle file.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            columns: dict. Field name in common.CANDLE_FEATURES to np.array.
+    """
+    # First line is header.
+    dtype = [('time', 'U32')] + [(field, np.float64) for field \
+            in PRICE_FIELDS] + [('volume', np.int64)]
+    rows = np.loadtxt(csv_file, skiprows=1, dtype=dtype, ndmin=1)
+
+    columns = {field: np.ascontiguousarray(rows[field]) \
+            for field in common.CANDLE_FEATURES[1:]}
+
+    # Times are in UTC, drop the trailing 'Z'.
+    if granularity == 'D':
+        columns['time'] = rows['time'].astype(DATE_TYPE)
+    else:
+        columns['time'] = np.char.rstrip(rows['time'], 'Z').astype(TIME_TYPE)
+
+    return columns
+
+
+def get_source(csv_file):
+    """ Describe the raw candle file a store is built from, as it is now.
+
+        Args:
+            csv_file: string. Location of the raw candle file.
+
+        Returns:
+            source: dict. Modification time and size of the file.
+    """
+    stat = os.stat(csv_file)
+    source = {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+    return source
+
+
+def read_manifest(in_dir):
+    """ Read the manifest of the current version of a store.
+
+        Args:
+            in_dir: string. Directory of the store.
+
+        Returns:
+            manifest: dict or None. With the version, the number of rows and
+                the source of the store. None if nothing was written.
+    """
+    try:
+        with open('{0}/{1}'.format(in_dir, MANIFEST_FILE), 'r') as in_handle:
+            manifest = json.load(in_handle)
+    except FileNotFoundError:
+        manifest = None
+
+    return manifest
+
+
+def get_field_file(in_dir, field, version):
+    """ Obtain the location of the array of a field in a version.
+
+        Args:
+            in_dir: string. Directory of the store.
+            field: string. One of common.CANDLE_FEATURES.
+            version: int. The version.
+
+        Returns:
+            path: string. Path to the .npy file.
+    """
+    path = '{0}/{1}.{2}.npy'.format(in_dir, field, version)
+
+    return path
+
+
+def write_columns(columns, out_dir, source=None):
+    """ Write the columns to the store as a new version, one .npy file per
+        field. The version is made current by atomically replacing the
+        manifest once all fields are written, so readers never see columns
+        of different versions.
+
+        Args:
+            columns: dict. Field name in common.CANDLE_FEATURES to np.array.
+            out_dir: string. Directory of the store.
+            source: dict or None. As returned by get_source, for the raw
+                candle file the columns were read from.
+
+        Returns:
+            void.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    current = read_manifest(out_dir)
+    version = current['version'] + 1 if current else 1
+
+    for field in common.CANDLE_FEATURES:
+        path = get_field_file(out_dir, field, version)
+        tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as out_handle:
+            np.save(out_handle, columns[field])
+        os.replace(tmp_path, path)
+
+    manifest = {'version': version, 'rows': len(columns['time']), \
+            'source': source}
+    manifest_loc = '{0}/{1}'.format(out_dir, MANIFEST_FILE)
+    tmp_loc = '{0}.{1}.tmp'.format(manifest_loc, os.getpid())
+    with open(tmp_loc, 'w') as out_handle:
+        json.dump(manifest, out_handle)
+    os.replace(tmp_loc, manifest_loc)
+
+    # Readers may still be opening the previous version, keep it.
+    for name in os.listdir(out_dir):
+        parts = name.split('.')
+        if len(parts) == 3 and parts[1].isdigit() and \
+                int(parts[1]) < version - 1:
+            os.remove('{0}/{1}'.format(out_dir, name))
+
+    return
+
+
+def load_columns(in_dir):
+    """ Open the current version of the store with memory mapping. Nothing
+        is read until used.
+
+        Args:
+            in_dir: string. Directory of the store.
+
+        Returns:
+            columns: dict. Field name in common.CANDLE_FEATURES to read-only
+                np.memmap.
+    """
+    manifest = read_manifest(in_dir)
+    if manifest is None:
+        raise FileNotFoundError("No columnar store in {0}.".format(in_dir))
+
+    columns = {}
+    for field in common.CANDLE_FEATURES:
+        path = get_field_file(in_dir, field, manifest['version'])
+        columns[field] = np.load(path, mmap_mode='r')
+
+    # All fields should describe the same candles.
+    assert all(len(x) == manifest['rows'] for x in columns.values())
+
+    return columns
+
+
+def get_prices(columns):
+    """ Gather the price fields into one array, without parsing any text.
+
+        Args:
+            columns: dict. As returned by load_columns.
+
+        Returns:
+            prices: np.array of dim 2. One row per candle with openBid,
+                highBid, lowBid, closeBid, openAsk, highAsk, lowAsk and
+                closeAsk.
+    """
+    prices = np.column_stack([columns[field] for field in PRICE_FIELDS])
+
+    return prices
+
+
+def get_rows(columns):
+    """ Format the columns as the rows of the raw daily candle file.
+
+        Args:
+            columns: dict. As returned by load_columns, of daily candles.
+
+        Returns:
+            rows: list of lists of strings. Each entry is a daily candle with
+                the date, OHLC of bid and ask and volume, as in the file.
+    """
+    times = np.datetime_as_string(columns['time'], unit='D').tolist()
+    fields = [columns[field].tolist() for field in PRICE_FIELDS] + \
+            [columns['volume'].tolist()]
+
+    rows = [[time] + [str(value) for value in values] \
+            for time, *values in zip(times, *fields)]
+
+    return rows
+
+
+def export_to_csv(columns, out_file, granularity='D'):
+    """ Write the columns back to the raw candle file layout used by
+        malt.data.rates.write_candles_to_csv.
+
+        Args:
+            columns: dict. Field name in common.CANDLE_FEATURES to np.array.
+            out_file: string. Location of the output file.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            void.
+    """
+    # Format the times the same way as the data source.
+    if granularity == 'D':
+        times = np.datetime_as_string(columns['time'], unit='D')
+    else:
+        times = np.char.add(np.datetime_as_string(columns['time'], \
+                unit='us'), 'Z')
+
+    prices = [columns[field].tolist() for field in PRICE_FIELDS]
+    volumes = columns['volume'].tolist()
+
+    with open(out_file, 'w') as csv_handle:
+        writer = csv.writer(csv_handle, delimiter=' ')
+        writer.writerow(common.CANDLE_FEATURES)
+        writer.writerows(zip(times.tolist(), *prices, volumes))
+
+    return
+
+
+def build(instrument, granularity='D'):
+    """ Rebuild the columnar store of the instrument from its raw candle file,
+        unless it was built from the file as it is now.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            void.
+    """
+    csv_file = common.get_candle_data(instrument, granularity)
+    out_dir = common.get_columnar_data(instrument, granularity)
+
+    # Describe the file before reading it, a later change rebuilds again.
+    source = get_source(csv_file)
+    manifest = read_manifest(out_dir)
+    if manifest is not None and manifest['source'] == source:
+        return
+
+    columns = read_csv_columns(csv_file, granularity)
+    write_columns(columns, out_dir, source)
+
+    return
+
+
+def load(instrument, granularity='D'):
+    """ Open the columnar store of the instrument with memory mapping.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            columns: dict. Field name in common.CANDLE_FEATURES to read-only
+                np.memmap.
+    """
+    columns = load_columns(common.get_columnar_data(instrument, granularity))
+
+    return columns
+
+
+def load_current(instrument, csv_file, granularity='D'):
+    """ Open the columnar store of the instrument if it was built from the
+        raw candle file as it is now, so readers can fall back to the file.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            csv_file: string. Location of the raw candle file.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            columns: dict or None. As returned by load. None if the store is
+                missing or out of date.
+    """
+    in_dir = common.get_columnar_data(instrument, granularity)
+    manifest = read_manifest(in_dir)
+    if manifest is None or manifest['source'] != get_source(csv_file):
+        return None
+
+    columns = load_columns(in_dir)
+
+    return columns
@@ -6,12 +6,25 @@
 # External imports
 import csv
 import datetime
-import http.client
 import json
+import os
+from concurrent import futures
+from urllib import parse
 
 # Internal imports
-from malt import common
+from malt import common, session
 logger = common.get_logger(__name__)
+from malt.data import columnar
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+# Number of bytes read at a time when looking for the last stored candle.
+READ_BLOCK_SIZE = 1024
+
+# Format of times in requests to the data source.
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
 
 #===============================================================================
 #   Functions:
@@ -37,31 +50,207 @@ def get_daily_candles(instrument, start_date, end_date):
                 'time': '2015-11-15T22:00:00.000000Z',
                 'complete': True, 'highBid': 1.07574}, {...}]
     """
+    candles = get_candles(instrument, 'D', start_date, end_date)
+
+    # Check received candles are valid. There are none over a gap.
+    assert (not candles or (len(candles[0]) == 11 and
+            set(common.CANDLE_FEATURES).issubset(set(candles[-1].keys()))))
+
+    # Log
+    logger.info("Fetched daily candles for %s.", instrument)
+
+    return candles
+
+
+def get_candles(instrument, granularity, start, end, include_first=True):
+    """ Obtain a list of bid-ask candles of any granularity for the given
+        instrument in a single request. Daily candles are aligned according
+        to New York time at 17:00.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+            start: string. Formatted start date or RFC3339 time.
+                e.g. '2015-11-24' or '2015-11-24T13:00:00Z'.
+            end: string. Formatted end date or RFC3339 time.
+            include_first: boolean. Whether to include the candle at start.
+
+        Returns:
+            candles: list of dictionaries, each representing a candle.
+                Same as in get_daily_candles.
+    """
     # Construct request url.
     url = ("/v1/candles?instrument={0}&start={1}&end={2}&"
-           "candleFormat=bidask&granularity=D&dailyAlignment=17&"
-           "alignmentTimezone=America%2FNew_York"). \
-        format(instrument, start_date, end_date)
+           "candleFormat=bidask&granularity={3}&dailyAlignment=17&"
+           "alignmentTimezone=America%2FNew_York&includeFirst={4}"). \
+        format(instrument, parse.quote(start), parse.quote(end), \
+               granularity, str(include_first).lower())
 
-    # Open connection. Send request. Get response.
+    # Send request over a pooled connection. Get response.
     # TODO: Distinguish between game and trade.
-    conn = http.client.HTTPSConnection(common.GAME_URL)
-    conn.request("GET", url, "", common.GAME_HEADER)
-    response = conn.getresponse()
-    response_content = response.read().decode()
-    conn.close()
+    response_content = session.request(common.GAME_URL, "GET", url, "", \
+            common.GAME_HEADER)
 
     # Parse the JSON from the response and select 'candles'.
     candles = json.loads(response_content)['candles']
 
-    # Check received candles are valid.
-    assert (len(candles[0]) == 11 and
-            set(common.CANDLE_FEATURES).issubset(set(candles[-1].keys())))
+    return candles
 
-    # Log
-    logger.info("Fetched daily candles for %s.", instrument)
 
-    return candles
+def iter_candle_chunks(instrument, granularity, start, end, \
+        include_first=True):
+    """ Walk through a time range in chunks of at most
+        common.MAX_CANDLES_PER_REQUEST candles, one request per chunk.
+        Each chunk continues right after the last candle received.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+            start: datetime.datetime. Start time in UTC.
+            end: datetime.datetime. End time in UTC.
+            include_first: boolean. Whether to include the candle at start.
+
+        Returns:
+            chunks: generator of lists of candles. Same as in get_candles.
+    """
+    interval = datetime.timedelta(seconds=common.GRANULARITIES[granularity])
+
+    while start < end:
+        # Both ends are included, so one interval less holds as many
+        # candles when the candle at start is included too.
+        count = common.MAX_CANDLES_PER_REQUEST
+        span = interval * (count - 1 if include_first else count)
+        chunk_end = min(start + span, end)
+        candles = get_candles(instrument, granularity, format_time(start), \
+                format_time(chunk_end), include_first)
+
+        # Nothing in this chunk, move on to the next one.
+        if not candles:
+            start = chunk_end
+            include_first = True
+            continue
+
+        yield candles
+
+        # Continue right after the last candle received.
+        start = parse_time(candles[-1]['time'])
+        include_first = False
+
+
+def fetch_candles(instrument, granularity, start_date, end_date):
+    """ Fetch the candles of any granularity from start_date to end_date and
+        write them to the raw candle data file chunk by chunk. If the file
+        exists, fetching resumes right after its last candle.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+            start_date: string. Formatted start date. e.g. '2015-11-24'.
+            end_date: string. Formatted end date. e.g. '2015-11-28'.
+
+        Returns:
+            count: int. Number of candles written.
+    """
+    out_file = common.get_candle_data(instrument, granularity)
+
+    # Start a new file, or keep the candles of an interrupted one.
+    if not os.path.isfile(out_file):
+        os.makedirs(os.path.dirname(out_file), exist_ok=True)
+        write_candles_to_csv([], out_file)
+    elif drop_partial_row(out_file) and os.path.getsize(out_file) == 0:
+        write_candles_to_csv([], out_file)
+
+    # Resume after the last candle written.
+    last_row = read_last_row(out_file)
+    if last_row is None:
+        start = parse_time(start_date)
+        include_first = True
+    elif granularity == 'D':
+        # Stored daily candles only keep the date, start from the next day.
+        start = parse_time(last_row[0]) + datetime.timedelta(1)
+        include_first = True
+    else:
+        start = parse_time(last_row[0])
+        include_first = False
+
+    # Each chunk is written as soon as it arrives.
+    count = 0
+    end = parse_time(end_date)
+    for candles in iter_candle_chunks(instrument, granularity, start, end, \
+            include_first):
+        append_candles_to_csv(candles, out_file, granularity)
+        count += len(candles)
+
+    logger.info("Fetched %d %s candles for %s.", count, granularity, instrument)
+
+    return count
+
+
+def parse_time(time_string):
+    """ Parse a formatted date or a RFC3339 time from the data source.
+
+        Args:
+            time_string: string. e.g. '2015-11-24' or
+                '2015-11-15T22:00:00.000000Z'.
+
+        Returns:
+            time: datetime.datetime. The time in UTC, to the second.
+    """
+    if len(time_string) == common.DATE_LENGTH:
+        time = datetime.datetime.strptime(time_string, '%Y-%m-%d')
+    else:
+        time = datetime.datetime.strptime(time_string[:19], TIME_FORMAT[:-1])
+
+    return time
+
+
+def format_time(time):
+    """ Format a time to RFC3339 for requests to the data source.
+
+        Args:
+            time: datetime.datetime. The time in UTC.
+
+        Returns:
+            time_string: string. e.g. '2015-11-24T13:00:00Z'.
+    """
+    time_string = time.strftime(TIME_FORMAT)
+
+    return time_string
+
+
+def candle_to_row(candle, granularity='D'):
+    """ Flatten a candle to a row in the raw candle file.
+
+        Args:
+            candle: dict. Standard candle with time, bid/ask OHLC and volume.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+
+        Returns:
+            row: list. The date for daily candles or the time otherwise,
+                followed by the rest of common.CANDLE_FEATURES.
+    """
+    date = candle.get('time')
+    if granularity == 'D':
+        date = date[:common.DATE_LENGTH]
+
+    row = [date] + [candle.get(field) for field in common.CANDLE_FEATURES[1:]]
+
+    return row
+
+
+def is_trading_day(date):
+    """ Check whether a daily candle of the given date should be stored.
+
+        Args:
+            date: string. Formatted date. e.g. '2015-11-24'.
+
+        Returns:
+            trading: boolean. True if the day is Sunday - Thursday.
+    """
+    date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
+    trading = date_obj.weekday() in [6, 0, 1, 2, 3]
+
+    return trading
 
 
 def write_candles_to_csv(candles, out_file):
@@ -82,49 +271,228 @@ def write_candles_to_csv(candles, out_file):
         writer = csv.writer(csv_handle, delimiter=' ')
         writer.writerow(common.CANDLE_FEATURES)
 
-        # Initialize candle.
-        candle = None
-        for candle in candles:
-            # Need to eliminate weekend candles.
-            date = candle.get('time')[:common.DATE_LENGTH]
-            date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
-
-            # The day needs to be Sunday - Thursday.
-            if date_obj.weekday() in [6, 0, 1, 2, 3]:
-                row = [date] + [candle.get(field) \
-                    for field in common.CANDLE_FEATURES[1:]]
-                writer.writerow(row)
+        write_candle_rows(writer, candles)
 
     return
 
 
-def import_daily_candles():
-    """ Fetch daily candles from common.START_DATE to date
-        for all currency pairs.
+def append_candles_to_csv(candles, out_file, granularity='D'):
+    """ Append the candles to an existing csv written by write_candles_to_csv.
 
         Args:
+            candles: list of dictionaries. List of candles containing open,
+                close, high and low of bid and ask, time and volume.
+            out_file: string. Location of the existing output file.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
+
+        Returns:
             void.
+    """
+    with open(out_file, 'a') as csv_handle:
+        writer = csv.writer(csv_handle, delimiter=' ')
+        write_candle_rows(writer, candles, granularity)
+
+    return
+
+
+def write_candle_rows(writer, candles, granularity='D'):
+    """ Write the candles through the csv writer. Daily candles are only
+        written for trading days.
+
+        Args:
+            writer: csv.writer. Writer of the output file.
+            candles: list of dictionaries. List of candles containing open,
+                close, high and low of bid and ask, time and volume.
+            granularity: string. One of common.GRANULARITIES. e.g. 'H1'.
 
         Returns:
             void.
     """
-    for instrument in common.ALL_PAIRS:
-        # Set up the output files.
-        out_file_path = "{0}/{1}.csv".format(common.DAILY_CANDLES, instrument)
-        start_date = common.START_DATE
-        end_date = str(datetime.date.today() - datetime.timedelta(1))
+    for candle in candles:
+        # Need to eliminate weekend candles.
+        row = candle_to_row(candle, granularity)
+        if granularity != 'D' or is_trading_day(row[0]):
+            writer.writerow(row)
+
+    return
+
+
+def read_last_row(csv_file):
+    """ Read the last row of a raw daily candle file without reading the
+        whole file.
+
+        Args:
+            csv_file: string. Location of the raw daily candle file.
+
+        Returns:
+            row: list of strings or None. The last candle stored, or None if
+                the file does not exist or holds no candle.
+    """
+    if not os.path.isfile(csv_file):
+        return None
+
+    with open(csv_file, 'rb') as csv_handle:
+        # Read backwards block by block until the last line is complete.
+        csv_handle.seek(0, os.SEEK_END)
+        position = csv_handle.tell()
+        content = b''
+        while position > 0 and content.rstrip().count(b'\n') < 1:
+            step = min(READ_BLOCK_SIZE, position)
+            position -= step
+            csv_handle.seek(position)
+            content = csv_handle.read(step) + content
+
+    lines = content.decode().strip().split('\n')
+    row = lines[-1].strip().split(' ')
+
+    # The file is empty or only the header is there.
+    if len(row) != len(common.CANDLE_FEATURES) or \
+            row[0] == common.CANDLE_FEATURES[0]:
+        return None
+
+    return row
+
+
+def drop_partial_row(csv_file):
+    """ Drop the incomplete last line an interrupted append may have left,
+        keeping every complete row before it.
+
+        Args:
+            csv_file: string. Location of an existing raw candle file.
+
+        Returns:
+            dropped: boolean. Whether an incomplete line was dropped.
+    """
+    with open(csv_file, 'rb+') as csv_handle:
+        # Rows are complete once their line ends, find the last line end.
+        csv_handle.seek(0, os.SEEK_END)
+        size = csv_handle.tell()
+        position = size
+        content = b''
+        while position > 0 and b'\n' not in content:
+            step = min(READ_BLOCK_SIZE, position)
+            position -= step
+            csv_handle.seek(position)
+            content = csv_handle.read(step) + content
+
+        end = position + content.rfind(b'\n') + 1
+        dropped = end < size
+        if dropped:
+            csv_handle.truncate(end)
+            logger.warning("Dropped an incomplete row at the end of %s.", \
+                    csv_file)
+
+    return dropped
+
+
+def sync_daily_candles(instrument, end_date):
+    """ Bring the raw daily candle file of the instrument up to end_date.
+        Only the candles after the last stored date are fetched and appended.
+        The last stored candle is fetched again and has to match the stored
+        one, otherwise the whole history is downloaded again.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            end_date: string. Formatted end date. e.g. '2015-11-28'.
+
+        Returns:
+            count: int. Number of candles received after the stored ones.
+    """
+    out_file = common.get_raw_data(instrument)
+    last_row = read_last_row(out_file)
+
+    # Nothing stored yet, fetch everything.
+    if last_row is None:
+        candles = get_daily_candles(instrument, common.START_DATE, end_date)
+        write_candles_to_csv(candles, out_file)
+        return len(candles)
+
+    # Already up to date.
+    start_date = last_row[0]
+    if start_date >= end_date:
+        logger.info("Daily candles for %s are up to date.", instrument)
+        return 0
+
+    # The first candle received overlaps with the last one stored. Nothing
+    # is received over a gap, e.g. a holiday, try again next time.
+    candles = get_daily_candles(instrument, start_date, end_date)
+    if not candles:
+        logger.info("No daily candles for %s since %s.", instrument, \
+                start_date)
+        return 0
+
+    overlap = [str(x) for x in candle_to_row(candles[0])]
+
+    if overlap != last_row:
+        logger.warning("Stored candle of %s on %s does not match, "
+                       "fetching all candles again.", instrument, start_date)
+        candles = get_daily_candles(instrument, common.START_DATE, end_date)
+        write_candles_to_csv(candles, out_file)
+        return len(candles)
+
+    append_candles_to_csv(candles[1:], out_file)
+
+    return len(candles) - 1
+
+
+def import_instrument_candles(instrument, end_date, incremental=True):
+    """ Fetch daily candles from common.START_DATE to end_date for one
+        currency pair and save them to its raw data file and columnar store.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            end_date: string. Formatted end date. e.g. '2015-11-28'.
+            incremental: boolean. Whether to only fetch the candles missing
+                from the stored file rather than the whole history.
 
+        Returns:
+            void.
+    """
+    if incremental:
+        sync_daily_candles(instrument, end_date)
+    else:
         # Get the candles and write to file.
-        candles = get_daily_candles(instrument, start_date, end_date)
+        out_file_path = common.get_raw_data(instrument)
+        candles = get_daily_candles(instrument, common.START_DATE, end_date)
         write_candles_to_csv(candles, out_file_path)
 
+    # Keep the columnar store in line with the file.
+    columnar.build(instrument)
+
+    return
+
+
+def import_daily_candles(incremental=True, workers=common.FETCH_WORKERS):
+    """ Fetch daily candles from common.START_DATE to date
+        for all currency pairs. Pairs are fetched concurrently, sharing the
+        pooled connections and the request rate limit of the host.
+
+        Args:
+            incremental: boolean. Whether to only fetch the candles missing
+                from the stored files rather than the whole history.
+            workers: int. Maximum number of pairs fetched at the same time.
+
+        Returns:
+            void.
+    """
+    end_date = str(datetime.date.today() - datetime.timedelta(1))
+
+    with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(import_instrument_candles, instrument, end_date, \
+                incremental) for instrument in common.ALL_PAIRS]
+
+        # Raise any failure of the jobs here.
+        for job in jobs:
+            job.result()
+
     return
 
 
 def main():
     """ Main in data component.
         1. Fetch daily candles from common.START_DATE to date
-        for all currency pairs in common.ALL_PAIRS.
+        for all currency pairs in common.ALL_PAIRS. Only the candles not yet
+        stored are fetched.
     """
     import_daily_candles()
 
@@ -0,0 +1,128 @@
+""" This is the malt.data.test.test_columnar module.
+    This module is responsible for testing malt.data.columnar.
+"""
+
+# External imports
+import os
+import shutil
+import unittest
+import numpy as np
+
+# Internal imports
+from malt import common
+from malt.data import columnar
+from malt.strategies.euler import transformer
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestColumnar(unittest.TestCase):
+    """ Class for testing columnar."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        self.raw_file = "{0}/GBP_USD_test_raw.csv".format(test_dir)
+        self.tmp_dir = 'tmp_columns'
+        self.tmp_file = 'tmp.csv'
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        if os.path.isdir(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+
+        if os.path.isfile(self.tmp_file):
+            os.remove(self.tmp_file)
+
+        return
+
+
+    def test_round_trip(self):
+        """ Test the store is memory mapped and exports the same file."""
+        columns = columnar.read_csv_columns(self.raw_file)
+        columnar.write_columns(columns, self.tmp_dir)
+        columns = columnar.load_columns(self.tmp_dir)
+
+        # Typed, memory mapped and read-only.
+        self.assertTrue(isinstance(columns['openBid'], np.memmap))
+        self.assertEqual(columns['openBid'].dtype, np.float64)
+        self.assertEqual(columns['volume'].dtype, np.int64)
+        self.assertEqual(str(columns['time'][0]), '2005-01-02')
+        self.assertEqual(columns['closeAsk'][0], 1.9047)
+        self.assertFalse(columns['lowBid'].flags.writeable)
+
+        # Exporting gives back exactly the same file.
+        columnar.export_to_csv(columns, self.tmp_file)
+        with open(self.raw_file, 'rb') as raw_handle:
+            with open(self.tmp_file, 'rb') as tmp_handle:
+                self.assertEqual(raw_handle.read(), tmp_handle.read())
+
+        return
+
+
+    def test_versions(self):
+        """ Test builds switch all fields at once, and stale stores are not
+            used.
+        """
+        shutil.copyfile(self.raw_file, self.tmp_file)
+        get_candle_data = common.get_candle_data
+        get_columnar_data = common.get_columnar_data
+        common.get_candle_data = lambda instrument, granularity: self.tmp_file
+        common.get_columnar_data = lambda instrument, granularity='D': \
+                self.tmp_dir
+
+        try:
+            # Nothing built yet.
+            self.assertEqual(columnar.load_current('TMP', self.tmp_file), None)
+            columnar.build('TMP')
+            columns = columnar.load_current('TMP', self.tmp_file)
+
+            # Readers get what they would parse from the file.
+            self.assertEqual(columnar.get_rows(columns), \
+                    transformer.read_raw_file(self.tmp_file))
+            self.assertTrue(np.array_equal(columnar.get_prices(columns), \
+                    transformer.read_raw_prices(self.tmp_file)))
+
+            # Unchanged file, nothing to build.
+            columnar.build('TMP')
+            self.assertEqual(columnar.read_manifest(self.tmp_dir)['version'], 1)
+
+            # A changed file is not read from the old store.
+            with open(self.tmp_file, 'a') as tmp_handle:
+                tmp_handle.write('2015-12-20 1 1 1 1 1 1 1 1 1000\n')
+            self.assertEqual(columnar.load_current('TMP', self.tmp_file), None)
+
+            columnar.build('TMP')
+            columns = columnar.load_current('TMP', self.tmp_file)
+            self.assertEqual(len(columns['volume']), 2855)
+
+            # Fields of a version still being written are not seen.
+            np.save(columnar.get_field_file(self.tmp_dir, 'time', 3), \
+                    np.arange(3))
+            columns = columnar.load('TMP')
+            self.assertEqual(set(len(x) for x in columns.values()), {2855})
+
+            # Only the previous version is kept.
+            columnar.write_columns(columns, self.tmp_dir)
+            self.assertFalse(os.path.isfile(columnar.get_field_file( \
+                    self.tmp_dir, 'time', 1)))
+            self.assertTrue(os.path.isfile(columnar.get_field_file( \
+                    self.tmp_dir, 'time', 2)))
+        finally:
+            common.get_candle_data = get_candle_data
+            common.get_columnar_data = get_columnar_data
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
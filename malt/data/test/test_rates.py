@@ -4,11 +4,14 @@
 
 # External imports
 import csv
+import datetime
 import os
 import unittest
 
 # Internal imports
+from malt import common
 from malt.data import rates
+from malt.exec import sandbox
 
 #===============================================================================
 #   Classes:
@@ -68,10 +71,232 @@ class TestRates(unittest.TestCase):
         return
 
 
+    def test_read_last_row(self):
+        """ Test reading the last stored candle of a file."""
+        # No file and header only.
+        self.assertEqual(rates.read_last_row(self.tmp_file), None)
+        rates.write_candles_to_csv([], self.tmp_file)
+        self.assertEqual(rates.read_last_row(self.tmp_file), None)
+
+        # Write candles of a Wednesday, a Thursday and a Friday.
+        candles = [get_candle('2015-11-11', 1.1), get_candle('2015-11-12', 1.2)]
+        rates.write_candles_to_csv(candles, self.tmp_file)
+        rates.append_candles_to_csv([get_candle('2015-11-13', 1.3)], \
+                self.tmp_file)
+
+        # The Friday candle is skipped.
+        row = rates.read_last_row(self.tmp_file)
+        self.assertEqual(row, [str(x) for x in rates.candle_to_row(candles[1])])
+
+        return
+
+
+    def test_sync_daily_candles(self):
+        """ Test stored candles are appended to, or fetched again when the
+            last stored one doesn't match.
+        """
+        raw_file = common.PROJECT_DIR + \
+                '/strategies/euler/test/GBP_USD_test_raw.csv'
+        with open(raw_file, 'r') as raw_handle:
+            lines = raw_handle.readlines()
+
+        # Serve the recorded candles, and store them in the temporary file.
+        server, url = sandbox.serve(sandbox.Sandbox({'GBP_USD': raw_file}))
+        game_url = common.GAME_URL
+        get_raw_data = common.get_raw_data
+        common.GAME_URL = url
+        common.get_raw_data = lambda instrument: self.tmp_file
+
+        try:
+            # Only the candles after the stored ones are appended.
+            with open(self.tmp_file, 'w') as tmp_handle:
+                tmp_handle.writelines(lines[:2001])
+            appended = rates.sync_daily_candles('GBP_USD', '2015-12-18')
+            with open(self.tmp_file, 'r') as tmp_handle:
+                synced = tmp_handle.readlines()
+
+            up_to_date = rates.sync_daily_candles('GBP_USD', '2015-12-17')
+
+            # Nothing received after the stored candles, nothing changes.
+            rates.append_candles_to_csv([get_candle('2015-12-20', 1.5)], \
+                    self.tmp_file)
+            gap = rates.sync_daily_candles('GBP_USD', '2015-12-24')
+            with open(self.tmp_file, 'r') as tmp_handle:
+                gap_rows = tmp_handle.readlines()
+
+            # A changed candle makes the whole history fetched again.
+            changed = lines[2000].split(' ')
+            changed[4] = '1.0'
+            with open(self.tmp_file, 'w') as tmp_handle:
+                tmp_handle.writelines(lines[:2000] + [' '.join(changed)])
+            fetched = rates.sync_daily_candles('GBP_USD', '2015-12-18')
+            with open(self.tmp_file, 'r') as tmp_handle:
+                refetched = tmp_handle.readlines()
+        finally:
+            common.GAME_URL = game_url
+            common.get_raw_data = get_raw_data
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(appended, len(lines) - 2001)
+        self.assertEqual([line.split() for line in synced], \
+                [line.split() for line in lines])
+        self.assertEqual(up_to_date, 0)
+        self.assertEqual(gap, 0)
+        self.assertEqual(gap_rows, synced + gap_rows[-1:])
+        self.assertTrue(gap_rows[-1].startswith('2015-12-20 '))
+        self.assertEqual(fetched, len(lines) - 1)
+        self.assertEqual([line.split() for line in refetched], \
+                [line.split() for line in lines])
+
+        return
+
+
+    def test_fetch_candles(self):
+        """ Test fetching hourly candles in chunks and resuming."""
+        # Serve made up hourly candles, at most 100 per request.
+        get_candles = rates.get_candles
+        candles_dir = common.CANDLES
+        max_candles = common.MAX_CANDLES_PER_REQUEST
+        rates.get_candles = get_hourly_candles
+        common.CANDLES = os.path.dirname(os.path.abspath(self.tmp_file))
+        common.MAX_CANDLES_PER_REQUEST = 100
+
+        try:
+            first = rates.fetch_candles('TMP', 'H1', '2016-01-04', '2016-01-12')
+            second = rates.fetch_candles('TMP', 'H1', '2016-01-04', \
+                    '2016-01-13')
+            out_file = common.get_candle_data('TMP', 'H1')
+            with open(out_file, 'r') as csv_handle:
+                rows = csv_handle.read().split('\n')[1:-1]
+            os.remove(out_file)
+            os.rmdir(os.path.dirname(out_file))
+        finally:
+            rates.get_candles = get_candles
+            common.CANDLES = candles_dir
+            common.MAX_CANDLES_PER_REQUEST = max_candles
+
+        # Both ends are included, and nothing is fetched twice.
+        self.assertEqual(first, 8 * 24 + 1)
+        self.assertEqual(second, 24)
+        self.assertEqual(len(set(rows)), len(rows))
+        self.assertTrue(rows[-1].startswith('2016-01-13T00:00:00'))
+
+        return
+
+
+    def test_candle_chunks(self):
+        """ Test no request asks for more candles than the data source
+            answers.
+        """
+        raw_file = common.PROJECT_DIR + \
+                '/strategies/euler/test/GBP_USD_test_raw.csv'
+        server, url = sandbox.serve(sandbox.Sandbox({'GBP_USD': raw_file}))
+        game_url = common.GAME_URL
+        max_candles = common.MAX_CANDLES_PER_REQUEST
+        common.GAME_URL = url
+        common.MAX_CANDLES_PER_REQUEST = 3
+
+        # From the first candle of a week, the days of a week are contiguous.
+        start = sandbox.day_start('2005-01-02')
+        try:
+            chunks = list(rates.iter_candle_chunks('GBP_USD', 'D', start, \
+                    start + datetime.timedelta(14)))
+        finally:
+            common.GAME_URL = game_url
+            common.MAX_CANDLES_PER_REQUEST = max_candles
+            server.shutdown()
+            server.server_close()
+
+        dates = [candle['time'][:10] for chunk in chunks for candle in chunk]
+        self.assertEqual(max(len(chunk) for chunk in chunks), 3)
+        self.assertEqual(len(dates), 11)
+        self.assertEqual(len(set(dates)), 11)
+
+        return
+
+
+    def test_resume_partial_row(self):
+        """ Test a row cut by a crash is dropped and fetched again, keeping
+            the rows before it.
+        """
+        get_candles = rates.get_candles
+        candles_dir = common.CANDLES
+        rates.get_candles = get_hourly_candles
+        common.CANDLES = os.path.dirname(os.path.abspath(self.tmp_file))
+
+        try:
+            rates.fetch_candles('TMP', 'H1', '2016-01-04', '2016-01-05')
+            out_file = common.get_candle_data('TMP', 'H1')
+            with open(out_file, 'r') as csv_handle:
+                content = csv_handle.read()
+            with open(out_file, 'w') as csv_handle:
+                csv_handle.write(content[:-20])
+
+            count = rates.fetch_candles('TMP', 'H1', '2016-01-04', \
+                    '2016-01-05')
+            with open(out_file, 'r') as csv_handle:
+                resumed = csv_handle.read()
+            os.remove(out_file)
+            os.rmdir(os.path.dirname(out_file))
+        finally:
+            rates.get_candles = get_candles
+            common.CANDLES = candles_dir
+
+        self.assertEqual(count, 1)
+        self.assertEqual(resumed, content)
+
+        return
+
+
 #===============================================================================
 #   Functions:
 #===============================================================================
 
+def get_candle(date, price):
+    """ Make up a candle with all prices the same.
+
+        Args:
+            date: string. Formatted date. e.g. '2015-11-24'.
+            price: float. The price for all of open, high, low and close.
+
+        Returns:
+            candle: dict. Standard candle with time, bid/ask OHLC and volume.
+    """
+    candle = {field: price for field in common.CANDLE_FEATURES[1:-1]}
+    candle['time'] = '{0}T22:00:00.000000Z'.format(date)
+    candle['volume'] = 1000
+    candle['complete'] = True
+
+    return candle
+
+
+def get_hourly_candles(instrument, granularity, start, end, include_first):
+    """ Stand-in for rates.get_candles making up at most 100 hourly candles.
+
+        Args:
+            Same as rates.get_candles.
+
+        Returns:
+            candles: list of dictionaries. Same as in rates.get_candles.
+    """
+    assert instrument == 'TMP' and granularity == 'H1'
+    time = rates.parse_time(start)
+    end = rates.parse_time(end)
+
+    if not include_first:
+        time += datetime.timedelta(hours=1)
+
+    candles = []
+    while time <= end and len(candles) < 100:
+        candle = get_candle(str(time.date()), 1.0)
+        candle['time'] = time.strftime('%Y-%m-%dT%H:%M:%S.000000Z')
+        candles.append(candle)
+        time += datetime.timedelta(hours=1)
+
+    return candles
+
+
 # Main.
 if __name__ == "__main__":
     unittest.main()
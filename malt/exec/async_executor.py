@@ -0,0 +1,321 @@
+""" This is the malt.exec.async_executor module.
+    This module defines the AsyncExecutor class, executing trades with
+    asyncio so that bulk operations send all their requests at once. The
+    requests go over the pooled connections of malt.session, in threads.
+    SyncExecutor gives blocking callers the same methods as exec.Executor.
+"""
+
+# External imports
+import asyncio
+import functools
+import threading
+import time
+from concurrent import futures
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+from malt.exec.executor import Executor
+
+# Rate limiters shared by all executors of the same account and rate.
+LIMITERS = {}
+LIMITERS_LOCK = threading.Lock()
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class AsyncRateLimiter():
+    """ Class responsible for spacing out requests to a maximum rate, without
+        blocking the event loop.
+    """
+
+    def __init__(self, rate):
+        """ Initialize the AsyncRateLimiter class.
+
+            Args:
+                rate: float. Maximum number of requests per second.
+                    No limit if it is not positive.
+
+            Returns:
+                void.
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+        return
+
+
+    async def wait(self):
+        """ Wait until the next request is allowed to go.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        # Reserve the next free slot, executors may run in other loops.
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+        return
+
+
+class AsyncExecutor():
+    """ Class responsible for executing trades and orders concurrently."""
+
+    def __init__(self, account_id, concurrency=common.MAX_CONNECTIONS, \
+            rate=common.MAX_REQUEST_RATE):
+        """ Initialize the AsyncExecutor class.
+
+            Args:
+                account_id: int. Account number of the account.
+                concurrency: int. Maximum number of requests in flight.
+                rate: float. Maximum number of requests per second for the
+                    account, shared with the other executors of the account.
+
+            Returns:
+                void.
+        """
+        self.executor = Executor(account_id)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.limiter = get_limiter(account_id, rate)
+        self.threads = futures.ThreadPoolExecutor(max_workers=concurrency)
+
+        return
+
+
+    async def call(self, method, *args, **kwargs):
+        """ Run a blocking method of exec.Executor within the limits.
+
+            Args:
+                method: function. A method of self.executor.
+                args: positional arguments of method.
+                kwargs: named arguments of method.
+
+            Returns:
+                result: the return of method.
+        """
+        async with self.slots:
+            await self.limiter.wait()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.threads, \
+                    functools.partial(method, *args, **kwargs))
+
+        return result
+
+
+    async def make_trade(self, instrument, units, **controls):
+        """ Executes a market order.
+
+            Args:
+                Same as exec.Executor.make_trade.
+
+            Returns:
+                trade_id: int or None. Return trade_id if opened a trade.
+        """
+        trade_id = await self.call(self.executor.make_trade, instrument, \
+                units, **controls)
+
+        return trade_id
+
+
+    async def close_trade(self, trade_id):
+        """ Close a given trade.
+
+            Args:
+                trade_id: int. id of the open trade to be closed.
+
+            Returns:
+                profit_loss: float. Profit or loss from closing the trade.
+        """
+        profit_loss = await self.call(self.executor.close_trade, trade_id)
+
+        return profit_loss
+
+
+    async def get_all_trades(self):
+        """ Get a list of all open trades.
+
+            Args:
+                void.
+
+            Returns:
+                trades. list of dicts. Each entry includes the details of a trade.
+        """
+        trades = await self.call(self.executor.get_all_trades)
+
+        return trades
+
+
+    async def make_trades(self, orders):
+        """ Execute market orders for many instruments at once.
+
+            Args:
+                orders: dict. Instrument to its order, a tuple of the signed
+                    units and a dict of controls as in make_trade.
+
+            Returns:
+                trade_ids: dict. Instrument to its trade_id, or to the
+                    exception if the order failed.
+        """
+        instruments = list(orders)
+        results = await asyncio.gather(*[self.make_trade(instrument, \
+                orders[instrument][0], **orders[instrument][1]) \
+                for instrument in instruments], return_exceptions=True)
+
+        for instrument, result in zip(instruments, results):
+            if isinstance(result, Exception):
+                logger.error("Order for %s failed. %s", instrument, result)
+
+        trade_ids = dict(zip(instruments, results))
+
+        return trade_ids
+
+
+    async def close_all_trades(self):
+        """ Close all open trades at once.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        trades = await self.get_all_trades()
+        results = await asyncio.gather(*[self.close_trade(trade['id']) \
+                for trade in trades], return_exceptions=True)
+
+        for trade, result in zip(trades, results):
+            if isinstance(result, Exception):
+                logger.error("Closing trade %s failed. %s", trade['id'], \
+                        result)
+
+        return
+
+
+    def close(self):
+        """ Stop the threads sending the requests.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        self.threads.shutdown()
+
+        return
+
+
+class SyncExecutor():
+    """ Class responsible for giving blocking callers the methods of
+        exec.Executor, run by an AsyncExecutor in a background event loop.
+    """
+
+    def __init__(self, account_id, **kwargs):
+        """ Initialize the SyncExecutor class.
+
+            Args:
+                account_id: int. Account number of the account.
+                kwargs: other arguments of AsyncExecutor.
+
+            Returns:
+                void.
+        """
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.async_executor = AsyncExecutor(account_id, **kwargs)
+
+        return
+
+
+    def run(self, coroutine):
+        """ Run a coroutine in the background event loop and wait for it.
+
+            Args:
+                coroutine: coroutine. A call of an AsyncExecutor method.
+
+            Returns:
+                result: the return of the coroutine.
+        """
+        result = asyncio.run_coroutine_threadsafe(coroutine, self.loop). \
+                result()
+
+        return result
+
+
+    def make_trade(self, instrument, units, **controls):
+        """ Same as AsyncExecutor.make_trade, blocking."""
+        return self.run(self.async_executor.make_trade(instrument, units, \
+                **controls))
+
+
+    def close_trade(self, trade_id):
+        """ Same as AsyncExecutor.close_trade, blocking."""
+        return self.run(self.async_executor.close_trade(trade_id))
+
+
+    def get_all_trades(self):
+        """ Same as AsyncExecutor.get_all_trades, blocking."""
+        return self.run(self.async_executor.get_all_trades())
+
+
+    def make_trades(self, orders):
+        """ Same as AsyncExecutor.make_trades, blocking."""
+        return self.run(self.async_executor.make_trades(orders))
+
+
+    def close_all_trades(self):
+        """ Same as AsyncExecutor.close_all_trades, blocking."""
+        return self.run(self.async_executor.close_all_trades())
+
+
+    def close(self):
+        """ Stop the background event loop and its threads.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.async_executor.close()
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_limiter(account_id, rate=common.MAX_REQUEST_RATE):
+    """ Obtain the rate limiter shared by all executors of the account with
+        the same rate.
+
+        Args:
+            account_id: int. Account number of the account.
+            rate: float. Maximum number of requests per second.
+
+        Returns:
+            limiter: AsyncRateLimiter. The limiter of the account.
+    """
+    with LIMITERS_LOCK:
+        if (account_id, rate) not in LIMITERS:
+            LIMITERS[account_id, rate] = AsyncRateLimiter(rate)
+        limiter = LIMITERS[account_id, rate]
+
+    return limiter
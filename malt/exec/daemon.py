@@ -0,0 +1,235 @@
+""" This is the malt.exec.daemon module.
+    This module is responsible for running daily_run as a resident process
+    instead of a cron job. The process keeps its imports, strategies and
+    connections between days, and wakes up at the exact close and open in
+    America/New York time, whatever the time zone of the machine. Newly
+    published strategies are reloaded in the background.
+"""
+
+# External imports
+import datetime
+import signal
+import threading
+from zoneinfo import ZoneInfo
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+from malt.exec import daily_run
+from malt.exec.async_executor import SyncExecutor
+from malt.strategies import artifacts
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+NEW_YORK = ZoneInfo(common.TIMEZONE)
+
+# Longest single sleep in seconds, so that changes of the clock are noticed.
+MAX_SLEEP = 60
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class Daemon():
+    """ Class responsible for running the close and open of every trading
+        day, until stopped.
+    """
+
+    def __init__(self, instruments=common.ALL_PAIRS, executor=None):
+        """ Initialize the Daemon class.
+
+            Args:
+                instruments: list of strings. The currency pairs to trade.
+                executor: exec.SyncExecutor or None. The object for executing
+                    trades. A new one for the staging account if None.
+
+            Returns:
+                void.
+        """
+        self.instruments = instruments
+        self.executor = executor or SyncExecutor(common.GAME_STAGING_ACCOUNT)
+        self.watcher = artifacts.Watcher(instruments, daily_run.load_strategy)
+        self.stopped = threading.Event()
+
+        return
+
+
+    def wait_until(self, moment):
+        """ Sleep until the moment has passed, or the daemon is stopped.
+
+            Args:
+                moment: datetime.datetime. The time to wait for, with a time
+                    zone.
+
+            Returns:
+                reached: boolean. False if stopped before the moment.
+        """
+        while not self.stopped.is_set():
+            # Compare in UTC, times in the same zone are compared on the
+            # wall clock, across changes of daylight saving time too.
+            now = datetime.datetime.now(datetime.timezone.utc)
+            delay = (moment - now).total_seconds()
+            if delay <= 0:
+                return True
+            self.stopped.wait(min(delay, MAX_SLEEP))
+
+        return False
+
+
+    def run_day(self, close_time):
+        """ Run one trading day: warm up, close at close_time and open right
+            after. Call it before close_time.
+
+            Args:
+                close_time: datetime.datetime. The close, as returned by
+                    get_next_close.
+
+            Returns:
+                void.
+        """
+        weekday = close_time.weekday()
+
+        # Take the latest strategies, the day trades with these even if new
+        # ones are published meanwhile. Failing to must not keep the trades
+        # of the day open.
+        strategies = {}
+        if weekday in common.OPEN_DAYS:
+            try:
+                self.watcher.check()
+                strategies = self.watcher.snapshot()
+                daily_run.open_connections(len(strategies))
+            except Exception:
+                logger.exception("Daemon: Warm-up failed.")
+
+        if not self.wait_until(close_time):
+            return
+
+        if weekday in common.CLOSE_DAYS:
+            logger.info("Daemon: Closing day of %s.", close_time.date())
+            try:
+                daily_run.run_at_day_close(self.executor)
+            except Exception:
+                logger.exception("Daemon: Close failed.")
+
+        if strategies and self.wait_until(get_open(close_time)):
+            logger.info("Daemon: Opening day after %s.", close_time.date())
+            daily_run.run_at_day_open(self.executor, strategies)
+
+        return
+
+
+    def run(self):
+        """ Run every trading day until stopped.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        logger.info("Daemon: Starting.")
+        self.watcher.start()
+
+        while not self.stopped.is_set():
+            close_time = get_next_close()
+            warm_up_time = close_time - \
+                    datetime.timedelta(seconds=common.WARM_UP_LEAD)
+            logger.info("Daemon: Next close at %s.", close_time)
+
+            if not self.wait_until(warm_up_time):
+                break
+
+            # A failed day must not stop the next ones.
+            try:
+                self.run_day(close_time)
+            except Exception:
+                logger.exception("Daemon: Day of %s failed.", \
+                        close_time.date())
+
+        self.watcher.stop()
+        self.executor.close()
+        logger.info("Daemon: Stopped.")
+
+        return
+
+
+    def stop(self):
+        """ Ask the daemon to stop, waking it up if asleep.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        self.stopped.set()
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_next_close(now=None):
+    """ Obtain the next close of a trading day, weekends included.
+
+        Args:
+            now: datetime.datetime or None. Current time with a time zone.
+                Now if None.
+
+        Returns:
+            close_time: datetime.datetime. The first close after now, in
+                America/New York time.
+    """
+    now = (now or datetime.datetime.now(NEW_YORK)).astimezone(NEW_YORK)
+
+    close_time = datetime.datetime.combine(now.date(), common.DAY_CLOSE, \
+            NEW_YORK)
+    if close_time <= now:
+        close_time = datetime.datetime.combine( \
+                now.date() + datetime.timedelta(1), common.DAY_CLOSE, NEW_YORK)
+
+    return close_time
+
+
+def get_open(close_time):
+    """ Obtain the open of the next trading day right after a close.
+
+        Args:
+            close_time: datetime.datetime. As returned by get_next_close.
+
+        Returns:
+            open_time: datetime.datetime. The open, in America/New York time.
+    """
+    open_time = datetime.datetime.combine(close_time.date(), \
+            common.DAY_OPEN, NEW_YORK)
+
+    return open_time
+
+
+def main():
+    """ Main in daemon. Run the daily trading until terminated.
+
+        Args:
+            void.
+
+        Returns:
+            void.
+    """
+    daemon = Daemon()
+
+    # Stop cleanly on kill or Ctrl-C.
+    for signum in [signal.SIGTERM, signal.SIGINT]:
+        signal.signal(signum, lambda *_: daemon.stop())
+
+    daemon.run()
+
+    return
+
+
+# Main.
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,21 @@
 """ This is the malt.exec.daily_run module.
     This module is responsible for making daily trades. It should be scheduled
-    to run everyday at just before 17:00 America/New York time.
+    to run everyday at just before 17:00 America/New York time. Everything
+    that can be done before the open is, so that the orders go out within
+    about one request of 17:00.
 """
 
 # External imports
 import datetime
-import json
 import time
-from sklearn.externals import joblib
+from concurrent import futures
 
 # Internal imports
-from malt import common
+from malt import common, session
 logger = common.get_logger(__name__)
 from malt.data import rates
-from malt.exec.executor import Executor
+from malt.exec.async_executor import SyncExecutor
+from malt.strategies import artifacts
 
 #===============================================================================
 #   Functions:
@@ -43,7 +45,7 @@ def run_at_day_close(executor):
     """ Run the operations at day's close. Close all open trades.
 
         Args:
-            executor: exec.Executor. The object for executing trades.
+            executor: exec.SyncExecutor. The object for executing trades.
 
         Returns:
             void.
@@ -53,41 +55,152 @@ def run_at_day_close(executor):
     return
 
 
-def run_at_day_open(executor, instrument):
-    """ Run the operations at day's open. Gather yesterday's prices, predict
-        today's price changes and take appropriate actions.
+def load_strategy(instrument, manifest=None):
+    """ Load the published strategy of the instrument for live trading.
+        Models exported as flat arrays are loaded without sklearn.
 
         Args:
-            executor: exec.Executor. The object for executing trades.
             instrument: string. The currency pair. e.g. 'EUR_USD'.
+            manifest: dict or None. The version to load, as read by
+                strategies.artifacts.read_manifest. Current if None.
 
         Returns:
-            void.
+            strategy: Strategy instance in live mode, with its parameters and
+                model set.
     """
-    # Log.
-    logger.info("Daily run: On %s.", instrument)
-
-    # Get yesterday's candle first.
-    yesterdays_candle = get_yesterdays_candle(instrument)
-
     # Load the model strategy parameters.
-    model_loc, param_loc = common.get_strategy_loc(instrument)
-    model = joblib.load(model_loc)
-    strategy_params = json.load(open(param_loc, 'r'))
+    model, strategy_params = artifacts.load(instrument, manifest)
     logger.info("Strategy: %s.", str(strategy_params))
 
     # Instantiate the right strategy object from name.
     name = strategy_params['name']
     module = common.get_strategy_module(name)
-    strategy = getattr(module, name)(instrument)
+    strategy = getattr(module, name)(instrument, common.MODE_LIVE)
 
     # Set the parameters.
     strategy.set_params(**strategy_params)
     strategy.model = model
     logger.info("Model: %s.", str(model))
 
-    # Execute.
-    strategy.execute(executor, yesterdays_candle)
+    return strategy
+
+
+def warm_up(instruments):
+    """ Prepare everything that doesn't depend on yesterday's candle before
+        the market opens: load the strategies and open the connections.
+        An instrument whose strategy fails to load is not traded, the others
+        still are.
+
+        Args:
+            instruments: list of strings. The currency pairs.
+
+        Returns:
+            strategies: dict. Instrument to its strategy, as returned by
+                load_strategy.
+    """
+    strategies = {}
+    for instrument in instruments:
+        try:
+            strategies[instrument] = load_strategy(instrument)
+        except Exception:
+            logger.exception("Daily run: Failed to load %s.", instrument)
+
+    # Only a head start, requests open their connections otherwise.
+    try:
+        open_connections(len(strategies))
+    except Exception as err:
+        logger.warning("Daily run: Failed to open connections. %s", err)
+
+    return strategies
+
+
+def open_connections(count):
+    """ Open the connections used at the open ahead of time.
+
+        Args:
+            count: int. Number of instruments traded.
+
+        Returns:
+            void.
+    """
+    # One connection per candle request, ready at the open.
+    session.get_pool(common.GAME_URL).warm(count)
+
+    return
+
+
+def get_open_time(now=None):
+    """ Obtain the time the market opens for the next day, at the next full
+        minute since this runs just before 17:00.
+
+        Args:
+            now: datetime.datetime or None. Current time. Now if None.
+
+        Returns:
+            open_time: datetime.datetime. The next full minute.
+    """
+    now = now or datetime.datetime.now()
+    open_time = now.replace(second=0, microsecond=0) + \
+            datetime.timedelta(minutes=1)
+
+    return open_time
+
+
+def wait_until(moment):
+    """ Sleep until the moment has passed.
+
+        Args:
+            moment: datetime.datetime. The time to wait for.
+
+        Returns:
+            void.
+    """
+    delay = (moment - datetime.datetime.now()).total_seconds()
+    if delay > 0:
+        time.sleep(delay)
+
+    return
+
+
+def run_at_day_open(executor, strategies):
+    """ Run the operations at day's open. Gather yesterday's prices of all
+        instruments at once, predict today's price changes and send all
+        orders at once. An instrument whose candle or order fails is
+        skipped, the orders of the others are still sent.
+
+        Args:
+            executor: exec.SyncExecutor. The object for executing trades.
+            strategies: dict. Instrument to its strategy, as returned by
+                warm_up.
+
+        Returns:
+            void.
+    """
+    instruments = list(strategies)
+    if not instruments:
+        return
+
+    # Get yesterday's candles first.
+    with futures.ThreadPoolExecutor(max_workers=len(instruments)) as pool:
+        jobs = {instrument: pool.submit(get_yesterdays_candle, instrument) \
+                for instrument in instruments}
+
+    # Decide all orders, it takes no time compared to the requests.
+    orders = {}
+    for instrument in instruments:
+        logger.info("Daily run: On %s.", instrument)
+        try:
+            orders[instrument] = strategies[instrument].get_order( \
+                    jobs[instrument].result())
+        except Exception:
+            logger.exception("Daily run: No order on %s.", instrument)
+
+    if not orders:
+        return
+
+    # Send all orders.
+    # TODO: Report failure.
+    executor.make_trades(orders)
 
     return
 
@@ -105,21 +218,27 @@ def main():
     logger.info("Daily run: Starting.")
 
     # Initialize executor and check today's weekday.
-    executor = Executor(common.GAME_STAGING_ACCOUNT)
+    executor = SyncExecutor(common.GAME_STAGING_ACCOUNT)
     weekday = datetime.date.today().weekday()
+    open_time = get_open_time()
 
-    # Need to run daily close on Monday - Friday.
-    if weekday in [0, 1, 2, 3, 4]:
+    # Need to run daily close on Monday - Friday. Close first, so that
+    # nothing in preparing the open keeps the trades of the day open.
+    if weekday in common.CLOSE_DAYS:
         # TODO: Report PL from yesterday.
         run_at_day_close(executor)
 
-    # Sleep 60 seconds until the market opens for the next day.
-    time.sleep(60)
+    # Need to run daily open on Sunday - Thursday. Prepare for it now.
+    strategies = {}
+    if weekday in common.OPEN_DAYS:
+        strategies = warm_up(common.ALL_PAIRS)
+
+    # Wait until the market opens for the next day.
+    wait_until(open_time)
+
+    run_at_day_open(executor, strategies)
 
-    # Need to run daily open on Sunday - Thursday.
-    if weekday in [6, 0, 1, 2, 3]:
-        for instrument in common.ALL_PAIRS:
-            run_at_day_open(executor, instrument)
+    executor.close()
 
     # Log exit.
     logger.info("Daily run: Done.")
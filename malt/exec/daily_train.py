@@ -2,47 +2,124 @@
     This module is responsible for updating data, re-training models as well as
     selecting the best strategy during the day. It should be scheduled to run
     everyday at any time after 17:00. Currently it runs at 17:10.
+    Fetching, transformation, model selection and serialization run as a
+    pipeline of stages per strategy and instrument, independent stages at the
+    same time. Stages whose input files did not change are skipped.
 """
 
 # External imports
 import datetime
+from concurrent import futures
 
 # Internal imports
 from malt import common
 logger = common.get_logger(__name__)
 from malt.data import rates
+from malt.exec import pipeline
 
 #===============================================================================
 #   Functions:
 #===============================================================================
 
-def run(strategy_name):
-    """ Run transformation and model seletion for each strategy.
+def get_transformer(strategy_name):
+    """ Obtain the transformer module of the strategy.
 
         Args:
             strategy_name: string. Name of the strategy. e.g. 'Euler'.
 
         Returns:
-            void.
+            transformer: module variable, where the data of the strategy is
+                transformed.
     """
-    # Find the transformer and the strategy module.
     module_name = strategy_name.lower()
-
-    # The transformer.
     malt = __import__('malt.strategies.' + module_name + '.transformer')
     strategies = getattr(malt, 'strategies')
     transformer = getattr(getattr(strategies, module_name), 'transformer')
 
-    # The strategy module.
-    strategy_module = common.get_strategy_module(strategy_name)
+    return transformer
 
-    # Run their respective main functions.
-    transformer.main()
-    strategy_module.main()
+
+def serialize(strategy):
+    """ Serialize the strategy selected by a stage, if one was.
+
+        Args:
+            strategy: Strategy instance or None. None if the serialized
+                strategy was kept.
+
+        Returns:
+            void.
+    """
+    if strategy is not None:
+        strategy.serialize()
 
     return
 
 
+def get_stages(strategy_names, instruments, end_date, pool=None):
+    """ Build the stages of the daily training. Each instrument is fetched
+        once, then transformed, selected and serialized for each strategy.
+
+        Args:
+            strategy_names: list of strings. Names of the strategies.
+            instruments: list of strings. The currency pairs.
+            end_date: string. Formatted date of the last candle to fetch.
+            pool: concurrent.futures.ProcessPoolExecutor or None. Processes
+                shared by the model selection of all stages.
+
+        Returns:
+            stages: list of pipeline.Stage instances.
+    """
+    stages = []
+    for instrument in instruments:
+        fetch = 'fetch:{0}'.format(instrument)
+        stages.append(pipeline.Stage(fetch, rates.import_instrument_candles, \
+                args=(instrument, end_date)))
+        raw_file = common.get_raw_data(instrument)
+
+        for strategy_name in strategy_names:
+            transformer = get_transformer(strategy_name)
+            strategy_module = common.get_strategy_module(strategy_name)
+            names = ['{0}:{1}:{2}'.format(stage, strategy_name, instrument) \
+                    for stage in ['transform', 'select', 'serialize']]
+
+            stages.append(pipeline.Stage(names[0], \
+                    transformer.transform_instrument, args=(instrument,), \
+                    deps=[fetch], inputs=[raw_file]))
+            stages.append(pipeline.Stage(names[1], strategy_module.train, \
+                    args=(instrument, True, pool), deps=[names[0]], \
+                    inputs=[raw_file, transformer.get_output_file(instrument)]))
+            stages.append(pipeline.Stage(names[2], serialize, \
+                    deps=[names[1]], uses=names[1]))
+
+    return stages
+
+
+def run(strategy_names, instruments, end_date):
+    """ Run the daily training of the strategies on the instruments.
+
+        Args:
+            strategy_names: list of strings. Names of the strategies.
+            instruments: list of strings. The currency pairs.
+            end_date: string. Formatted date of the last candle to fetch.
+
+        Returns:
+            statuses: dict. Stage name to its outcome, as in pipeline.
+    """
+    # Stages selecting models at the same time share the processes, so the
+    # training scales with the cores whatever the number of instruments.
+    with futures.ProcessPoolExecutor(max_workers=common.TRAIN_WORKERS) \
+            as pool:
+        stages = get_stages(strategy_names, instruments, end_date, pool)
+        statuses = pipeline.Pipeline(stages).run()
+
+    failed = sorted(name for name, status in statuses.items() \
+            if status in [pipeline.FAILED, pipeline.BLOCKED])
+    if failed:
+        logger.error("Daily train: Stages not done: %s.", failed)
+
+    return statuses
+
+
 def main():
     """ Main in daily_train. Run daily maintainance operations.
 
@@ -53,17 +130,14 @@ def main():
             void.
     """
     # Run only on Sunday - Thursday.
-    if datetime.date.today().weekday() in [6, 0, 1, 2, 3]:
+    if datetime.date.today().weekday() in common.OPEN_DAYS:
 
         # Log enter.
         logger.info("Daily train: Starting.")
 
-        # Fetch all and save new rates.
-        rates.main()
-
-        # Run transformation and parameter selection for each strategy.
-        for strategy_name in common.ALL_STRATEGIES:
-            run(strategy_name)
+        # Fetch new rates, then transform and select for each strategy.
+        end_date = str(datetime.date.today() - datetime.timedelta(1))
+        run(common.ALL_STRATEGIES, common.ALL_PAIRS, end_date)
 
         # Log exit.
         logger.info("Daily train: Done.")
@@ -73,5 +147,3 @@ def main():
 # Main.
 if __name__ == "__main__":
     main()
-
-
@@ -3,11 +3,10 @@
 """
 
 # External imports
-import http.client
 import json
 
 # Internal imports
-from malt import common
+from malt import common, session
 logger = common.get_logger(__name__)
 
 #===============================================================================
@@ -15,7 +14,9 @@ logger = common.get_logger(__name__)
 #===============================================================================
 
 class Executor():
-    """ Class responsible for executing trades and orders."""
+    """ Class responsible for executing trades and orders. Requests go over
+        the connections pooled by malt.session, shared with malt.data.rates.
+    """
 
     def __init__(self, account_id):
         """ Initialize the Executor class.
@@ -72,13 +73,10 @@ class Executor():
         if 'trailing_stop' in controls and controls['trailing_stop'] > 0:
             body += '&trailingStop={0}'.format(controls['trailing_stop'])
 
-        # Open connection. Send request. Get response.
+        # Send request over a pooled connection. Get response.
         # TODO: Distinguish between game and trade.
-        conn = http.client.HTTPSConnection(common.GAME_URL)
-        conn.request("POST", url, body, common.GAME_HEADER)
-        response = conn.getresponse()
-        response_content = json.loads(response.read().decode())
-        conn.close()
+        response_content = json.loads(session.request(common.GAME_URL, \
+                "POST", url, body, common.GAME_HEADER))
 
         # Parse the JSON from the response and return the newly created trade id.
         new_trade = response_content['tradeOpened']
@@ -102,12 +100,9 @@ class Executor():
         # Construct request strings.
         url = "/v1/accounts/{0}/trades/{1}".format(self.account_id, trade_id)
 
-        # Open connection. Send request. Get response.
-        conn = http.client.HTTPSConnection(common.GAME_URL)
-        conn.request("DELETE", url, "", common.GAME_HEADER)
-        response = conn.getresponse()
-        response_content = json.loads(response.read().decode())
-        conn.close()
+        # Send request over a pooled connection. Get response.
+        response_content = json.loads(session.request(common.GAME_URL, \
+                "DELETE", url, "", common.GAME_HEADER))
 
         # Parse the JSON from the response and return the profit_loss.
         if 'profit' in response_content:
@@ -134,12 +129,9 @@ class Executor():
         # Construct request url.
         url = ("/v1/accounts/{0}/trades".format(self.account_id))
 
-        # Open connection. Send request. Get response.
-        conn = http.client.HTTPSConnection(common.GAME_URL)
-        conn.request("GET", url, "", common.GAME_HEADER)
-        response = conn.getresponse()
-        response_content = json.loads(response.read().decode())
-        conn.close()
+        # Send request over a pooled connection. Get response.
+        response_content = json.loads(session.request(common.GAME_URL, \
+                "GET", url, "", common.GAME_HEADER))
 
         # Try return the trades:
         if 'trades' in response_content:
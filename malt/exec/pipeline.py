@@ -0,0 +1,282 @@
+""" This is the malt.exec.pipeline module.
+    This module is responsible for running the stages of the daily training
+    as a graph. Each stage runs as soon as the stages it depends on are done,
+    independent stages at the same time. A stage whose input files have the
+    same content as when it last succeeded is skipped.
+"""
+
+# External imports
+import hashlib
+import json
+import os
+from concurrent import futures
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+# Outcomes of stages.
+DONE = 'DONE'
+SKIPPED = 'SKIPPED'
+FAILED = 'FAILED'
+BLOCKED = 'BLOCKED'
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class Stage():
+    """ Class describing one stage of a pipeline."""
+
+    def __init__(self, name, func, args=(), deps=(), inputs=(), uses=None):
+        """ Initialize the Stage class.
+
+            Args:
+                name: string. Unique name of the stage.
+                func: function. Run by the stage.
+                args: tuple. Positional arguments of func.
+                deps: list of strings. Names of the stages to run before.
+                inputs: list of strings. Files the stage reads. The stage is
+                    skipped if they didn't change since it last succeeded.
+                    Always run if empty.
+                uses: string or None. Name of one of deps, whose return is
+                    given to func after args. The stage is skipped along
+                    with it.
+
+            Returns:
+                void.
+        """
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.uses = uses
+
+        return
+
+
+class Pipeline():
+    """ Class responsible for running stages in the order of their
+        dependencies, skipping those with unchanged inputs.
+    """
+
+    def __init__(self, stages, state_file=common.PIPELINE_STATE, \
+            workers=common.PIPELINE_WORKERS):
+        """ Initialize the Pipeline class.
+
+            Args:
+                stages: list of Stage instances. With unique names, each
+                    depending only on stages of the list.
+                state_file: string. Location of the hashes of the inputs of
+                    the stages that succeeded.
+                workers: int. Maximum number of stages running at once.
+
+            Returns:
+                void.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.workers = workers
+
+        for stage in stages:
+            missing = set(stage.deps) - set(self.stages)
+            if missing:
+                raise ValueError("Stage {0} depends on unknown {1}.". \
+                        format(stage.name, sorted(missing)))
+            if stage.uses is not None and stage.uses not in stage.deps:
+                raise ValueError("Stage {0} uses {1} without depending on "
+                        "it.".format(stage.name, stage.uses))
+
+        return
+
+
+    def read_state(self):
+        """ Read the hashes of the inputs of the stages that succeeded.
+
+            Args:
+                void.
+
+            Returns:
+                state: dict. Stage name to the hash of its inputs.
+        """
+        try:
+            with open(self.state_file, 'r') as in_handle:
+                state = json.load(in_handle)
+        except (FileNotFoundError, ValueError):
+            state = {}
+
+        return state
+
+
+    def write_state(self, state):
+        """ Replace the hashes of the stages atomically.
+
+            Args:
+                state: dict. Stage name to the hash of its inputs.
+
+            Returns:
+                void.
+        """
+        tmp_file = '{0}.{1}.tmp'.format(self.state_file, os.getpid())
+        with open(tmp_file, 'w') as out_handle:
+            json.dump(state, out_handle, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.state_file)
+
+        return
+
+
+    def get_descendants(self, name):
+        """ Find all stages that depend on a stage, directly or not.
+
+            Args:
+                name: string. Name of the stage.
+
+            Returns:
+                descendants: set of strings. Names of the stages.
+        """
+        descendants = set()
+        frontier = [name]
+        while frontier:
+            current = frontier.pop()
+            for stage in self.stages.values():
+                if current in stage.deps and stage.name not in descendants:
+                    descendants.add(stage.name)
+                    frontier.append(stage.name)
+
+        return descendants
+
+
+    def start(self, stage, statuses, results, state, hashes, pool):
+        """ Skip a stage whose dependencies are finished, or submit it.
+
+            Args:
+                stage: Stage instance. With all its dependencies finished.
+                statuses: dict. Stage name to its outcome so far.
+                results: dict. Stage name to its return.
+                state: dict. As returned by read_state.
+                hashes: dict. Stage name to the hash of its inputs.
+                pool: concurrent.futures.Executor. Running the stages.
+
+            Returns:
+                future: concurrent.futures.Future or None. The running stage,
+                    None if it was not run.
+        """
+        deps = [statuses[dep] for dep in stage.deps]
+        if FAILED in deps or BLOCKED in deps:
+            statuses[stage.name] = BLOCKED
+            return None
+
+        if stage.uses is not None and statuses[stage.uses] == SKIPPED:
+            statuses[stage.name] = SKIPPED
+            return None
+
+        hashes[stage.name] = get_hash(stage)
+        if hashes[stage.name] is not None and \
+                state.get(stage.name) == hashes[stage.name]:
+            logger.info("Pipeline: Skipped %s, inputs unchanged.", stage.name)
+            statuses[stage.name] = SKIPPED
+            return None
+
+        args = stage.args
+        if stage.uses is not None:
+            args += (results[stage.uses],)
+
+        future = pool.submit(stage.func, *args)
+
+        return future
+
+
+    def run(self):
+        """ Run all stages, each once its dependencies are finished. A failed
+            stage blocks the stages depending on it, not the others.
+
+            Args:
+                void.
+
+            Returns:
+                statuses: dict. Stage name to its outcome, one of DONE,
+                    SKIPPED, FAILED or BLOCKED.
+        """
+        state = self.read_state()
+        statuses, results, hashes = {}, {}, {}
+        waiting = dict(self.stages)
+        running = {}
+
+        with futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while waiting or running:
+                # Start every stage whose dependencies are finished. Skipped
+                # stages can make others ready, so go until none is.
+                ready = True
+                while ready:
+                    ready = [stage for stage in waiting.values() \
+                            if all(dep in statuses for dep in stage.deps)]
+                    for stage in ready:
+                        del waiting[stage.name]
+                        future = self.start(stage, statuses, results, \
+                                state, hashes, pool)
+                        if future is not None:
+                            running[future] = stage.name
+
+                if not running:
+                    if waiting:
+                        raise ValueError("Stages {0} depend on each other.". \
+                                format(sorted(waiting)))
+                    break
+
+                done, _ = futures.wait(running, \
+                        return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                        statuses[name] = DONE
+                    except Exception:
+                        logger.exception("Pipeline: Stage %s failed.", name)
+                        statuses[name] = FAILED
+
+        # Remember the inputs of the stages done, unless a stage after them
+        # didn't succeed and needs them to run again.
+        for name, status in statuses.items():
+            if status != DONE or hashes.get(name) is None:
+                continue
+            if all(statuses[x] in [DONE, SKIPPED] \
+                    for x in self.get_descendants(name)):
+                state[name] = hashes[name]
+        self.write_state(state)
+
+        return statuses
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_hash(stage):
+    """ Hash the content of the input files of a stage.
+
+        Args:
+            stage: Stage instance.
+
+        Returns:
+            digest: string or None. Hex digest of the inputs. None if the
+                stage has no inputs or some are missing.
+    """
+    if not stage.inputs:
+        return None
+
+    digest = hashlib.sha1(stage.name.encode())
+    for path in stage.inputs:
+        digest.update(path.encode())
+        try:
+            with open(path, 'rb') as in_handle:
+                for chunk in iter(lambda: in_handle.read(2**20), b''):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            return None
+
+    return digest.hexdigest()
@@ -0,0 +1,491 @@
+""" This is the malt.exec.sandbox module.
+    This module provides a local stand-in for the OANDA v1 REST end-points
+    used by MaLT: candles, orders, trades and closing trades. It replays
+    recorded candle files, fills market orders at the last recorded prices
+    and can inject latency and errors, so that the whole pipeline can be
+    tested and benchmarked without network access. Point common.GAME_URL at
+    it, e.g. with "Url-Game": "http://localhost:8080" in the account info.
+"""
+
+# External imports
+import argparse
+import datetime
+import glob
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+from zoneinfo import ZoneInfo
+
+# Internal imports
+from malt import common
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+# Bid and ask used to fill orders on instruments without recorded candles.
+DEFAULT_QUOTE = (1.0, 1.0002)
+
+# Daily candles start at 17:00 America/New York time.
+NEW_YORK = ZoneInfo('America/New_York')
+DAY_OPEN = datetime.time(17, 0, 0)
+
+# Routes of the end-points.
+CANDLES_ROUTE = re.compile(r'^/v1/candles$')
+ORDERS_ROUTE = re.compile(r'^/v1/accounts/(\w+)/orders$')
+TRADES_ROUTE = re.compile(r'^/v1/accounts/(\w+)/trades$')
+TRADE_ROUTE = re.compile(r'^/v1/accounts/(\w+)/trades/(\d+)$')
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class Sandbox():
+    """ Class responsible for the state and the responses of the stand-in
+        end-points.
+    """
+
+    def __init__(self, candle_files, latency=0, error_rate=0, seed=None):
+        """ Initialize the Sandbox class.
+
+            Args:
+                candle_files: dict. Currency pair to the location of its raw
+                    daily candle file, in the format of malt.data.rates.
+                latency: float. Seconds to wait before each response.
+                error_rate: float. Probability of answering a request with
+                    an injected server error.
+                seed: int or None. Seed for injecting errors.
+
+            Returns:
+                void.
+        """
+        self.candles = {instrument: read_candles(candle_file) \
+                for instrument, candle_file in candle_files.items()}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        # Requests to fail no matter the error rate.
+        self.fail_next = 0
+
+        # Open trades per account, and the last trade id given out.
+        self.trades = {}
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+        return
+
+
+    def get_quote(self, instrument):
+        """ Current bid and ask, taken from the last recorded candle.
+
+            Args:
+                instrument: string. The currency pair. e.g. 'EUR_USD'.
+
+            Returns:
+                quote: tuple of floats. The bid and the ask.
+        """
+        if not self.candles.get(instrument):
+            return DEFAULT_QUOTE
+
+        candle = self.candles[instrument][-1]
+        quote = (candle['closeBid'], candle['closeAsk'])
+
+        return quote
+
+
+    def respond(self, method, path, body):
+        """ Answer a request to one of the end-points.
+
+            Args:
+                method: string. HTTP method. e.g. 'GET'.
+                path: string. Path and query of the request.
+                body: string. Form encoded body of the request.
+
+            Returns:
+                status: int. HTTP status code.
+                content: dict. Content of the JSON response.
+        """
+        time.sleep(self.latency)
+
+        # Inject errors.
+        with self.lock:
+            failing = self.fail_next > 0 or \
+                    self.random.random() < self.error_rate
+            self.fail_next = max(self.fail_next - 1, 0)
+
+        if failing:
+            return 500, error(500, "Injected error.")
+
+        url = parse.urlparse(path)
+        query = dict(parse.parse_qsl(url.query))
+        form = dict(parse.parse_qsl(body))
+
+        if method == 'GET' and CANDLES_ROUTE.match(url.path):
+            return self.get_candles(**query)
+
+        match = ORDERS_ROUTE.match(url.path)
+        if method == 'POST' and match:
+            return self.make_order(match.group(1), **form)
+
+        match = TRADES_ROUTE.match(url.path)
+        if method == 'GET' and match:
+            return self.get_trades(match.group(1))
+
+        match = TRADE_ROUTE.match(url.path)
+        if method == 'DELETE' and match:
+            return self.close_trade(match.group(1), int(match.group(2)))
+
+        return 404, error(404, "Unknown end-point.")
+
+
+    def get_candles(self, instrument, start, end, **query):
+        """ Answer a request for candles by replaying the recorded ones.
+
+            Args:
+                instrument: string. The currency pair. e.g. 'EUR_USD'.
+                start: string. Formatted start date or RFC3339 time.
+                end: string. Formatted end date or RFC3339 time.
+                query: other query parameters, including:
+                    granularity: string. Only 'D' is recorded.
+                    includeFirst: string. 'true' or 'false'.
+
+            Returns:
+                status: int. HTTP status code.
+                content: dict. Including the candles.
+        """
+        if instrument not in self.candles:
+            return 400, error(400, "Invalid instrument.")
+
+        if query.get('granularity', 'S5') != 'D':
+            return 400, error(400, "Only daily candles are recorded.")
+
+        start = parse_time(start)
+        end = parse_time(end)
+        include_first = query.get('includeFirst', 'true') == 'true'
+
+        candles = [candle for candle in self.candles[instrument] \
+                if (start < candle['start'] or \
+                    (include_first and start == candle['start'])) and \
+                candle['start'] <= end]
+
+        # The data source answers at most so many candles per request.
+        if len(candles) > common.MAX_CANDLES_PER_REQUEST:
+            return 400, error(400, "Too many candles requested.")
+
+        # Hide the parsed start time.
+        candles = [{key: value for key, value in candle.items() \
+                if key != 'start'} for candle in candles]
+
+        content = {'instrument': instrument, 'granularity': 'D', \
+                'candles': candles}
+
+        return 200, content
+
+
+    def make_order(self, account_id, instrument, units, side, **form):
+        """ Answer a market order by filling it at the current price.
+
+            Args:
+                account_id: string. Account number of the account.
+                instrument: string. The currency pair. e.g. 'EUR_USD'.
+                units: string. Number of units.
+                side: string. Either common.BUY or common.SELL.
+                form: other order fields, including stopLoss, takeProfit and
+                    trailingStop.
+
+            Returns:
+                status: int. HTTP status code.
+                content: dict. Including the opened trade.
+        """
+        bid, ask = self.get_quote(instrument)
+        price = ask if side == common.BUY else bid
+
+        with self.lock:
+            self.last_id += 1
+            trade = {'id': self.last_id, 'instrument': instrument, \
+                    'units': int(units), 'side': side, 'price': price, \
+                    'time': format_time(utc_now()), \
+                    'stopLoss': float(form.get('stopLoss', 0)), \
+                    'takeProfit': float(form.get('takeProfit', 0)), \
+                    'trailingStop': float(form.get('trailingStop', 0))}
+            self.trades.setdefault(account_id, []).append(trade)
+
+        content = {'instrument': instrument, 'time': trade['time'], \
+                'price': price, 'tradesClosed': [], 'tradeReduced': {}, \
+                'tradeOpened': {key: trade[key] for key in ['id', 'units', \
+                    'side', 'stopLoss', 'takeProfit', 'trailingStop']}}
+
+        return 200, content
+
+
+    def get_trades(self, account_id):
+        """ Answer a request for all open trades.
+
+            Args:
+                account_id: string. Account number of the account.
+
+            Returns:
+                status: int. HTTP status code.
+                content: dict. Including the open trades, newest first.
+        """
+        with self.lock:
+            trades = list(reversed(self.trades.get(account_id, [])))
+
+        return 200, {'trades': trades}
+
+
+    def close_trade(self, account_id, trade_id):
+        """ Answer a request for closing a trade at the current price.
+
+            Args:
+                account_id: string. Account number of the account.
+                trade_id: int. id of the open trade to be closed.
+
+            Returns:
+                status: int. HTTP status code.
+                content: dict. Including the profit of the trade.
+        """
+        with self.lock:
+            trades = self.trades.get(account_id, [])
+            found = [trade for trade in trades if trade['id'] == trade_id]
+            for trade in found:
+                trades.remove(trade)
+
+        if not found:
+            return 404, error(404, "Trade not found.")
+
+        # Buy closes at the bid, sell closes at the ask.
+        trade = found[0]
+        bid, ask = self.get_quote(trade['instrument'])
+        if trade['side'] == common.BUY:
+            price = bid
+            profit = trade['units'] * (bid - trade['price'])
+        else:
+            price = ask
+            profit = trade['units'] * (trade['price'] - ask)
+
+        content = {'id': trade_id, 'instrument': trade['instrument'], \
+                'side': trade['side'], 'price': price, \
+                'profit': round(profit, 4), \
+                'time': format_time(utc_now())}
+
+        return 200, content
+
+
+class SandboxHandler(BaseHTTPRequestHandler):
+    """ Class responsible for handling HTTP requests to the sandbox."""
+
+    # Keep connections alive like the actual end-points.
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """ Handle a GET request."""
+        self.handle_method('GET')
+
+
+    def do_POST(self):
+        """ Handle a POST request."""
+        self.handle_method('POST')
+
+
+    def do_DELETE(self):
+        """ Handle a DELETE request."""
+        self.handle_method('DELETE')
+
+
+    def handle_method(self, method):
+        """ Read the request, get the answer from the sandbox and write it.
+
+            Args:
+                method: string. HTTP method. e.g. 'GET'.
+
+            Returns:
+                void.
+        """
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode()
+
+        status, content = self.server.sandbox.respond(method, self.path, body)
+        content = json.dumps(content).encode()
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        self.wfile.write(content)
+
+        return
+
+
+    def log_message(self, *args):
+        """ Do not log every request."""
+        pass
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def read_candles(candle_file):
+    """ Read a raw daily candle file into candles as sent by the end-point.
+
+        Args:
+            candle_file: string. Location of the raw daily candle file.
+
+        Returns:
+            candles: list of dicts. Candles with time, bid/ask OHLC, volume
+                and the parsed start time, in order.
+    """
+    with open(candle_file, 'r') as candle_handle:
+        # First line is header.
+        rows = [line.split() for line in candle_handle.readlines()[1:]]
+
+    candles = []
+    for row in rows:
+        start = day_start(row[0])
+        candle = {field: float(value) for field, value \
+                in zip(common.CANDLE_FEATURES[1:-1], row[1:-1])}
+        candle['volume'] = int(row[-1])
+        candle['time'] = format_time(start)
+        candle['complete'] = True
+        candle['start'] = start
+        candles.append(candle)
+
+    return candles
+
+
+def day_start(date):
+    """ Start time of the trading day, at 17:00 America/New York time.
+
+        Args:
+            date: string. Formatted date. e.g. '2015-11-24'.
+
+        Returns:
+            start: datetime.datetime. The start in UTC, without time zone.
+    """
+    day = datetime.datetime.strptime(date, '%Y-%m-%d').date()
+    start = datetime.datetime.combine(day, DAY_OPEN, NEW_YORK)
+    start = start.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    return start
+
+
+def parse_time(time_string):
+    """ Parse a formatted date or a RFC3339 time from a request.
+
+        Args:
+            time_string: string. e.g. '2015-11-24' or '2015-11-24T13:00:00Z'.
+
+        Returns:
+            time: datetime.datetime. The time in UTC, without time zone.
+    """
+    time_string = time_string.rstrip('Z')[:19]
+    if len(time_string) == common.DATE_LENGTH:
+        time_string += 'T00:00:00'
+
+    parsed = datetime.datetime.strptime(time_string, '%Y-%m-%dT%H:%M:%S')
+
+    return parsed
+
+
+def format_time(time_obj):
+    """ Format a time the way the end-points do.
+
+        Args:
+            time_obj: datetime.datetime. The time in UTC, without time zone.
+
+        Returns:
+            time_string: string. e.g. '2015-11-15T22:00:00.000000Z'.
+    """
+    time_string = time_obj.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    return time_string
+
+
+def utc_now():
+    """ Current time in UTC.
+
+        Args:
+            void.
+
+        Returns:
+            now: datetime.datetime. The time in UTC, without time zone.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+    return now
+
+
+def error(code, message):
+    """ Content of an error response.
+
+        Args:
+            code: int. Error code.
+            message: string. Description of the error.
+
+        Returns:
+            content: dict. The error in the format of the end-points.
+    """
+    content = {'code': code, 'message': message, 'moreInfo': ''}
+
+    return content
+
+
+def serve(sandbox, port=0):
+    """ Serve the sandbox on localhost from a background thread.
+
+        Args:
+            sandbox: Sandbox. The state of the stand-in end-points.
+            port: int. Port to listen on. Any free port if 0.
+
+        Returns:
+            server: ThreadingHTTPServer. The running server, with the sandbox
+                as its attribute 'sandbox'. Stop it with shutdown().
+            url: string. The end-point to use as common.GAME_URL.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), SandboxHandler)
+    server.daemon_threads = True
+    server.sandbox = sandbox
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    url = 'http://127.0.0.1:{0}'.format(server.server_port)
+
+    return server, url
+
+
+def main():
+    """ Main in sandbox. Serve the stored daily candles until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--candles', default=common.DAILY_CANDLES, \
+            help="Directory of the raw daily candle files to replay.")
+    parser.add_argument('--latency', type=float, default=0, \
+            help="Seconds to wait before each response.")
+    parser.add_argument('--error-rate', type=float, default=0, \
+            help="Probability of answering with a server error.")
+    args = parser.parse_args()
+
+    candle_files = {os.path.basename(path)[:-4]: path \
+            for path in glob.glob('{0}/*.csv'.format(args.candles))}
+    sandbox = Sandbox(candle_files, args.latency, args.error_rate)
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), SandboxHandler)
+    server.sandbox = sandbox
+    print("Serving on http://127.0.0.1:{0}".format(args.port))
+    server.serve_forever()
+
+    return
+
+
+# Main.
+if __name__ == "__main__":
+    main()
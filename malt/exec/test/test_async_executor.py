@@ -0,0 +1,94 @@
+""" This is the malt.exec.test.test_async_executor module.
+    This module is responsible for testing malt.exec.async_executor, by
+    running it against malt.exec.sandbox.
+"""
+
+# External imports
+import time
+import unittest
+
+# Internal imports
+from malt import common, session
+from malt.exec import async_executor, sandbox
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestAsyncExecutor(unittest.TestCase):
+    """ Class for testing async_executor."""
+
+    def setUp(self):
+        """ Start a slow sandbox and point the end-point to it."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        raw_file = "{0}/GBP_USD_test_raw.csv".format(test_dir)
+
+        self.sandbox = sandbox.Sandbox({'GBP_USD': raw_file}, latency=0.3)
+        self.server, url = sandbox.serve(self.sandbox)
+        self.game_url = common.GAME_URL
+        common.GAME_URL = url
+
+        # Only the executor limits the requests.
+        name, secure = session.parse_host(url)
+        session.POOLS[url] = session.ConnectionPool(name, rate=0, \
+                secure=secure)
+
+        self.executor = async_executor.SyncExecutor(common.GAME_DEV_ACCOUNT, \
+                rate=0)
+
+        return
+
+
+    def tearDown(self):
+        """ Stop the sandbox and restore the end-point."""
+        self.executor.close()
+        session.POOLS.pop(common.GAME_URL).close()
+        common.GAME_URL = self.game_url
+        self.server.shutdown()
+        self.server.server_close()
+
+        return
+
+
+    def test_bulk_operations(self):
+        """ Test orders are sent and trades are closed all at once."""
+        orders = {'GBP_USD': (100, {'trailing_stop': 8.3}), \
+                'USD_CAD': (-50, {}), 'EUR_USD': (20, {}), 'AUD_USD': (0, {})}
+
+        start = time.monotonic()
+        trade_ids = self.executor.make_trades(orders)
+        self.assertTrue(time.monotonic() - start < 0.6)
+
+        # No trade for no units.
+        self.assertEqual(trade_ids['AUD_USD'], None)
+        self.assertEqual(len(self.executor.get_all_trades()), 3)
+
+        # One round trip for the trades, one for closing them all.
+        start = time.monotonic()
+        self.executor.close_all_trades()
+        self.assertTrue(time.monotonic() - start < 0.9)
+        self.assertEqual(self.executor.get_all_trades(), [])
+
+        return
+
+
+    def test_failed_order(self):
+        """ Test a failed order doesn't stop the others."""
+        self.sandbox.fail_next = 1
+        trade_ids = self.executor.make_trades({'GBP_USD': (10, {})})
+        self.assertIsInstance(trade_ids['GBP_USD'], Exception)
+
+        trade_id = self.executor.make_trade('GBP_USD', 10)
+        self.assertEqual(self.executor.get_all_trades()[0]['id'], trade_id)
+        self.assertTrue(self.executor.close_trade(trade_id) != 0)
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
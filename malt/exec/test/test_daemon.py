@@ -0,0 +1,121 @@
+""" This is the malt.exec.test.test_daemon module.
+    This module is responsible for testing malt.exec.daemon.
+"""
+
+# External imports
+import datetime
+import threading
+import time
+import unittest
+
+# Internal imports
+from malt.exec import daemon
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class RecordingExecutor():
+    """ Executor recording the calls instead of trading."""
+
+    def __init__(self):
+        """ Initialize the RecordingExecutor class."""
+        self.calls = []
+
+        return
+
+
+    def close_all_trades(self):
+        """ Record the close."""
+        self.calls.append('close_all_trades')
+
+        return
+
+
+    def close(self):
+        """ Record the end."""
+        self.calls.append('close')
+
+        return
+
+
+class TestDaemon(unittest.TestCase):
+    """ Class for testing daemon."""
+
+    def setUp(self):
+        """ Set up a daemon trading nothing."""
+        self.executor = RecordingExecutor()
+        self.daemon = daemon.Daemon(instruments=[], executor=self.executor)
+
+        return
+
+
+    def tearDown(self):
+        """ Stop the daemon."""
+        self.daemon.stop()
+
+        return
+
+
+    def test_get_next_close(self):
+        """ Test the next close is found in New York time, across changes of
+            daylight saving time.
+        """
+        utc = datetime.timezone.utc
+
+        # 20:00 UTC is 16:00 in summer, the close is the same day.
+        close_time = daemon.get_next_close(datetime.datetime(2016, 7, 1, 20, \
+                tzinfo=utc))
+        self.assertEqual(close_time.astimezone(utc), \
+                datetime.datetime(2016, 7, 1, 20, 59, tzinfo=utc))
+
+        # 22:00 UTC is 17:00 in winter, the close is the next day.
+        close_time = daemon.get_next_close(datetime.datetime(2016, 1, 8, 22, \
+                tzinfo=utc))
+        self.assertEqual(close_time.astimezone(utc), \
+                datetime.datetime(2016, 1, 9, 21, 59, tzinfo=utc))
+        self.assertEqual(daemon.get_open(close_time).astimezone(utc), \
+                datetime.datetime(2016, 1, 9, 22, 0, tzinfo=utc))
+
+        # The day clocks go back is 25 hours long.
+        close_time = daemon.get_next_close(datetime.datetime(2016, 11, 5, \
+                21, tzinfo=utc))
+        self.assertEqual(close_time.astimezone(utc), \
+                datetime.datetime(2016, 11, 6, 21, 59, tzinfo=utc))
+
+        return
+
+
+    def test_run_day(self):
+        """ Test the close runs on weekdays only."""
+        friday = datetime.datetime(2016, 1, 8, 16, 59, tzinfo=daemon.NEW_YORK)
+        self.daemon.run_day(friday)
+        self.daemon.run_day(friday + datetime.timedelta(1))
+        self.assertEqual(self.executor.calls, ['close_all_trades'])
+
+        return
+
+
+    def test_stop(self):
+        """ Test a sleeping daemon stops right away."""
+        thread = threading.Thread(target=self.daemon.run)
+        thread.start()
+        time.sleep(0.1)
+
+        start = time.monotonic()
+        self.daemon.stop()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(time.monotonic() - start < 1)
+        self.assertEqual(self.executor.calls, ['close'])
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
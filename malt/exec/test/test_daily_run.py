@@ -0,0 +1,134 @@
+""" This is the malt.exec.test.test_daily_run module.
+    This module is responsible for testing malt.exec.daily_run, by running
+    it against malt.exec.sandbox.
+"""
+
+# External imports
+import datetime
+import os
+import tempfile
+import unittest
+
+# Internal imports
+from malt import common
+from malt.exec import daily_run, sandbox
+from malt.exec.async_executor import SyncExecutor
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class FixedStrategy():
+    """ Strategy always deciding the same order."""
+
+    def __init__(self, units):
+        """ Initialize the FixedStrategy class."""
+        self.units = units
+        self.candles = []
+
+        return
+
+
+    def get_order(self, candle):
+        """ Decide the fixed order, remembering the candle."""
+        self.candles.append(candle)
+
+        return self.units, {'trailing_stop': 8.3}
+
+
+class TestDailyRun(unittest.TestCase):
+    """ Class for testing daily_run."""
+
+    def setUp(self):
+        """ Start the sandbox with candles up to yesterday."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        with open("{0}/GBP_USD_test_raw.csv".format(test_dir), 'r') as raw:
+            lines = raw.readlines()[:8]
+
+        # Shift the recorded days to the week before today.
+        today = datetime.date.today()
+        days = len(lines) - 1
+        rows = [str(today - datetime.timedelta(days - i)) + \
+                line[line.index(' '):] for i, line in enumerate(lines[1:])]
+
+        handle, self.raw_file = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as raw:
+            raw.writelines([lines[0]] + rows)
+
+        candle_files = {'GBP_USD': self.raw_file, 'EUR_USD': self.raw_file}
+        self.sandbox = sandbox.Sandbox(candle_files, seed=888)
+        self.server, url = sandbox.serve(self.sandbox)
+        self.game_url = common.GAME_URL
+        common.GAME_URL = url
+
+        return
+
+
+    def tearDown(self):
+        """ Stop the sandbox and restore the end-point."""
+        common.GAME_URL = self.game_url
+        self.server.shutdown()
+        self.server.server_close()
+        os.remove(self.raw_file)
+
+        return
+
+
+    def test_get_open_time(self):
+        """ Test the open is at the next full minute."""
+        now = datetime.datetime(2016, 3, 1, 16, 59, 1, 500)
+        self.assertEqual(daily_run.get_open_time(now), \
+                datetime.datetime(2016, 3, 1, 17, 0))
+
+        return
+
+
+    def test_warm_up(self):
+        """ Test a strategy failing to load only leaves out its instrument."""
+        loader = daily_run.load_strategy
+        daily_run.load_strategy = lambda instrument: \
+                {'GBP_USD': FixedStrategy(120)}[instrument]
+        try:
+            strategies = daily_run.warm_up(['EUR_USD', 'GBP_USD'])
+        finally:
+            daily_run.load_strategy = loader
+
+        self.assertEqual(list(strategies), ['GBP_USD'])
+
+        return
+
+
+    def test_run_at_day_open(self):
+        """ Test the orders of all instruments are sent, except those whose
+            candle failed.
+        """
+        executor = SyncExecutor(common.GAME_DEV_ACCOUNT)
+        strategies = {'GBP_USD': FixedStrategy(120), \
+                'EUR_USD': FixedStrategy(-40), 'USD_JPY': FixedStrategy(10)}
+
+        daily_run.run_at_day_open(executor, strategies)
+
+        # Every strategy decided on yesterday's candle.
+        yesterday = datetime.date.today() - datetime.timedelta(1)
+        self.assertEqual(strategies['USD_JPY'].candles, [])
+        for strategy in [strategies['GBP_USD'], strategies['EUR_USD']]:
+            self.assertEqual(len(strategy.candles), 1)
+            self.assertEqual(strategy.candles[0]['time'][:10], \
+                    str(yesterday))
+
+        trades = executor.get_all_trades()
+        self.assertEqual(sorted(trade['instrument'] for trade in trades), \
+                ['EUR_USD', 'GBP_USD'])
+        executor.close_all_trades()
+        executor.close()
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
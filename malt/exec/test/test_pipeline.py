@@ -0,0 +1,141 @@
+""" This is the malt.exec.test.test_pipeline module.
+    This module is responsible for testing malt.exec.pipeline.
+"""
+
+# External imports
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Internal imports
+from malt.exec import pipeline
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestPipeline(unittest.TestCase):
+    """ Class for testing pipeline."""
+
+    def setUp(self):
+        """ Set up a temporary directory for inputs and the state."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.state_file = self.tmp_dir + '/state.json'
+        self.input_file = self.tmp_dir + '/input.csv'
+        with open(self.input_file, 'w') as out_handle:
+            out_handle.write('2017-03-01,1.2\n')
+        self.calls = []
+
+        return
+
+
+    def tearDown(self):
+        """ Delete the temporary directory."""
+        shutil.rmtree(self.tmp_dir)
+
+        return
+
+
+    def record(self, name, value=None):
+        """ Stage function recording its call."""
+        self.calls.append(name)
+
+        return name
+
+
+    def fail(self, name):
+        """ Stage function failing."""
+        raise RuntimeError(name)
+
+
+    def get_pipeline(self, stages):
+        """ Pipeline of the stages on the temporary state."""
+        return pipeline.Pipeline(stages, self.state_file, workers=4)
+
+
+    def test_order(self):
+        """ Test stages run after their dependencies, independent ones at the
+            same time, and results are passed on.
+        """
+        barrier = threading.Barrier(2, timeout=5)
+        def wait(name):
+            barrier.wait()
+            return self.record(name)
+
+        stages = [pipeline.Stage('serialize', self.record, args=('s',), \
+                deps=['left', 'right'], uses='left'),
+                pipeline.Stage('left', wait, args=('l',), deps=['fetch']),
+                pipeline.Stage('right', wait, args=('r',), deps=['fetch']),
+                pipeline.Stage('fetch', self.record, args=('f',))]
+        statuses = self.get_pipeline(stages).run()
+
+        self.assertEqual(set(statuses.values()), {pipeline.DONE})
+        self.assertEqual(self.calls[0], 'f')
+        self.assertEqual(sorted(self.calls[1:3]), ['l', 'r'])
+        self.assertEqual(self.calls[3:], ['s'])
+
+        # Dependencies must exist.
+        with self.assertRaises(ValueError):
+            self.get_pipeline(stages[:3])
+
+        return
+
+
+    def test_skip(self):
+        """ Test stages with unchanged inputs are skipped, along with the
+            stages using their results.
+        """
+        stages = [pipeline.Stage('fetch', self.record, args=('f',)),
+                pipeline.Stage('select', self.record, args=('s',), \
+                        deps=['fetch'], inputs=[self.input_file]),
+                pipeline.Stage('serialize', self.record, args=('z',), \
+                        deps=['select'], uses='select')]
+
+        self.get_pipeline(stages).run()
+        statuses = self.get_pipeline(stages).run()
+        self.assertEqual(statuses, {'fetch': pipeline.DONE, \
+                'select': pipeline.SKIPPED, 'serialize': pipeline.SKIPPED})
+        self.assertEqual(self.calls, ['f', 's', 'z', 'f'])
+
+        # New data runs it again.
+        with open(self.input_file, 'a') as out_handle:
+            out_handle.write('2017-03-02,1.3\n')
+        statuses = self.get_pipeline(stages).run()
+        self.assertEqual(set(statuses.values()), {pipeline.DONE})
+        self.assertEqual(self.calls[4:], ['f', 's', 'z'])
+
+        return
+
+
+    def test_failure(self):
+        """ Test a failure blocks the stages after it only, and the stages
+            before it run again next time.
+        """
+        stages = [pipeline.Stage('select', self.record, args=('s',), \
+                inputs=[self.input_file]),
+                pipeline.Stage('serialize', self.fail, args=('z',), \
+                        deps=['select']),
+                pipeline.Stage('publish', self.record, args=('p',), \
+                        deps=['serialize']),
+                pipeline.Stage('other', self.record, args=('o',))]
+
+        statuses = self.get_pipeline(stages).run()
+        self.assertEqual(statuses, {'select': pipeline.DONE, \
+                'serialize': pipeline.FAILED, 'publish': pipeline.BLOCKED, \
+                'other': pipeline.DONE})
+
+        statuses = self.get_pipeline(stages).run()
+        self.assertEqual(statuses['select'], pipeline.DONE)
+        self.assertEqual(sorted(self.calls), ['o', 'o', 's', 's'])
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
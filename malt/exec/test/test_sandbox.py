@@ -0,0 +1,89 @@
+""" This is the malt.exec.test.test_sandbox module.
+    This module is responsible for testing malt.exec.sandbox, by running
+    malt.data.rates and malt.exec.executor against it.
+"""
+
+# External imports
+import unittest
+
+# Internal imports
+from malt import common
+from malt.data import rates
+from malt.exec import sandbox
+from malt.exec.executor import Executor
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestSandbox(unittest.TestCase):
+    """ Class for testing sandbox."""
+
+    def setUp(self):
+        """ Start the sandbox and point the end-point to it."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        raw_file = "{0}/GBP_USD_test_raw.csv".format(test_dir)
+
+        self.sandbox = sandbox.Sandbox({'GBP_USD': raw_file}, seed=888)
+        self.server, url = sandbox.serve(self.sandbox)
+        self.game_url = common.GAME_URL
+        common.GAME_URL = url
+
+        return
+
+
+    def tearDown(self):
+        """ Stop the sandbox and restore the end-point."""
+        common.GAME_URL = self.game_url
+        self.server.shutdown()
+        self.server.server_close()
+
+        return
+
+
+    def test_candles(self):
+        """ Test replaying the recorded candles."""
+        candles = rates.get_daily_candles('GBP_USD', '2005-01-04', \
+                '2005-01-07')
+
+        self.assertEqual(len(candles), 3)
+        self.assertEqual(candles[0]['time'], '2005-01-04T22:00:00.000000Z')
+        self.assertEqual(candles[0]['lowBid'], 1.8729)
+        self.assertEqual(candles[2]['volume'], 34945)
+
+        return
+
+
+    def test_open_close_trades(self):
+        """ Test open and close of trades, and injected errors."""
+        executor = Executor(common.GAME_DEV_ACCOUNT)
+
+        # Buy and close it. Closing again does nothing.
+        buy_trade = executor.make_trade('GBP_USD', 213, trailing_stop=8.3)
+        self.assertTrue(executor.close_trade(buy_trade) < 0)
+        self.assertEqual(executor.close_trade(buy_trade), 0)
+
+        # Open a couple of sell trades and close them all.
+        sell_trade = executor.make_trade('USD_CAD', -55, stop_loss=3.0)
+        executor.make_trade('GBP_USD', -20)
+        trades = executor.get_all_trades()
+        self.assertEqual(len(trades), 2)
+        self.assertEqual(trades[-1]['id'], sell_trade)
+
+        executor.close_all_trades()
+        self.assertEqual(len(executor.get_all_trades()), 0)
+
+        # Failed requests.
+        self.sandbox.fail_next = 1
+        self.assertEqual(executor.get_all_trades(), [])
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
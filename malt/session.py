@@ -0,0 +1,310 @@
+""" This is the malt.session module.
+    This module provides pooled keep-alive connections and request rate
+    limiting, shared by all components talking to the REST end-points.
+"""
+
+# External imports
+import http.client
+import threading
+import time
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+
+# Methods whose requests can be sent again without changing the outcome.
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+
+# Connection pools shared by the whole process, one per host.
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class RateLimiter():
+    """ Class responsible for spacing out requests to a maximum rate."""
+
+    def __init__(self, rate):
+        """ Initialize the RateLimiter class.
+
+            Args:
+                rate: float. Maximum number of requests per second.
+                    No limit if it is not positive.
+
+            Returns:
+                void.
+        """
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+
+        return
+
+
+    def wait(self):
+        """ Block until the next request is allowed to go.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        # Reserve the next free slot, then sleep outside of the lock.
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+        return
+
+
+class ConnectionPool():
+    """ Class responsible for keeping connections to a host alive and sharing
+        them among threads.
+    """
+
+    def __init__(self, host, size=common.MAX_CONNECTIONS, \
+            rate=common.MAX_REQUEST_RATE, secure=True, \
+            timeout=common.REQUEST_TIMEOUT, idle_timeout=common.IDLE_TIMEOUT, \
+            retries=common.MAX_RETRIES):
+        """ Initialize the ConnectionPool class.
+
+            Args:
+                host: string. Host name, optionally with port.
+                    e.g. 'api-fxpractice.oanda.com'.
+                size: int. Maximum number of concurrent connections.
+                rate: float. Maximum number of requests per second.
+                secure: boolean. Whether to connect through HTTPS.
+                timeout: float. Seconds to wait for the connection and for
+                    each response.
+                idle_timeout: float. Seconds an idle connection is reused.
+                retries: int. Number of times a request is sent again after
+                    its connection failed.
+
+            Returns:
+                void.
+        """
+        self.host = host
+        self.size = size
+        self.secure = secure
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.retries = retries
+        self.limiter = RateLimiter(rate)
+
+        # Connections not in use with the time they were last used, and the
+        # cap on connections in use.
+        self.idle = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(size)
+
+        return
+
+
+    def new_connection(self):
+        """ Open a new connection to the host.
+
+            Args:
+                void.
+
+            Returns:
+                conn: http.client.HTTPConnection. The new connection.
+        """
+        if self.secure:
+            conn = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+        return conn
+
+
+    def get_connection(self):
+        """ Take the most recently used idle connection, dropping the ones
+            idle for too long. Open a new one if none is left.
+
+            Args:
+                void.
+
+            Returns:
+                conn: http.client.HTTPConnection. The connection to use.
+                reused: boolean. Whether the connection was opened before.
+        """
+        with self.lock:
+            now = time.monotonic()
+            expired = [conn for last_used, conn in self.idle \
+                    if now - last_used >= self.idle_timeout]
+            self.idle = [(last_used, conn) for last_used, conn in self.idle \
+                    if now - last_used < self.idle_timeout]
+            conn = self.idle.pop()[1] if self.idle else None
+
+        for idle_conn in expired:
+            idle_conn.close()
+
+        if conn is None:
+            return self.new_connection(), False
+
+        return conn, True
+
+
+    def put_connection(self, conn):
+        """ Give back a connection for later requests.
+
+            Args:
+                conn: http.client.HTTPConnection. A connection, idle.
+
+            Returns:
+                void.
+        """
+        with self.lock:
+            self.idle.append((time.monotonic(), conn))
+
+        return
+
+
+    def request(self, method, url, body, headers):
+        """ Send a request over a pooled connection and read the response.
+            A request failing on its connection is sent again over a new
+            one, if it is safe to repeat or never left.
+
+            Args:
+                method: string. HTTP method. e.g. 'GET'.
+                url: string. Path and query of the request.
+                body: string. Body of the request.
+                headers: dict. HTTP request headers.
+
+            Returns:
+                content: string. The decoded response body.
+        """
+        with self.slots:
+            attempt = 0
+            while True:
+                conn, reused = self.get_connection()
+                self.limiter.wait()
+
+                sent = False
+                try:
+                    conn.request(method, url, body, headers)
+                    sent = True
+                    response = conn.getresponse()
+                    content = response.read().decode()
+                    break
+                except (http.client.HTTPException, OSError) as err:
+                    conn.close()
+                    if attempt >= self.retries or \
+                            (sent and method not in IDEMPOTENT_METHODS):
+                        raise
+                    attempt += 1
+                    logger.warning("Session: %s %s failed on %s connection, "
+                            "sending again. %s", method, url, \
+                            'a reused' if reused else 'a new', repr(err))
+
+            # Keep the connection only if the server keeps it open.
+            if response.will_close:
+                conn.close()
+            else:
+                self.put_connection(conn)
+
+        return content
+
+
+    def warm(self, count):
+        """ Open connections ahead of time so that later requests don't wait
+            for the connection to be set up.
+
+            Args:
+                count: int. Number of idle connections wanted, at most the
+                    size of the pool.
+
+            Returns:
+                void.
+        """
+        with self.lock:
+            missing = min(count, self.size) - len(self.idle)
+
+        for _ in range(missing):
+            conn = self.new_connection()
+            conn.connect()
+            self.put_connection(conn)
+
+        return
+
+
+    def close(self):
+        """ Close all idle connections.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        with self.lock:
+            for _, conn in self.idle:
+                conn.close()
+            self.idle = []
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def parse_host(host):
+    """ Split a configured end-point into the host and the scheme. End-points
+        without a scheme use HTTPS.
+
+        Args:
+            host: string. End-point. e.g. 'api-fxpractice.oanda.com' or
+                'http://localhost:8080'.
+
+        Returns:
+            name: string. Host name, optionally with port.
+            secure: boolean. Whether to connect through HTTPS.
+    """
+    secure = not host.startswith('http://')
+    name = host.split('://')[-1].rstrip('/')
+
+    return name, secure
+
+
+def get_pool(host):
+    """ Obtain the connection pool shared by the whole process for the host.
+
+        Args:
+            host: string. End-point. e.g. common.GAME_URL.
+
+        Returns:
+            pool: ConnectionPool. The pool of connections to the host.
+    """
+    with POOLS_LOCK:
+        if host not in POOLS:
+            name, secure = parse_host(host)
+            POOLS[host] = ConnectionPool(name, secure=secure)
+        pool = POOLS[host]
+
+    return pool
+
+
+def request(host, method, url, body, headers):
+    """ Send a request to the host through its shared connection pool.
+
+        Args:
+            host: string. End-point. e.g. common.GAME_URL.
+            method: string. HTTP method. e.g. 'GET'.
+            url: string. Path and query of the request.
+            body: string. Body of the request.
+            headers: dict. HTTP request headers.
+
+        Returns:
+            content: string. The decoded response body.
+    """
+    content = get_pool(host).request(method, url, body, headers)
+
+    return content
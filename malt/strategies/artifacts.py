@@ -0,0 +1,388 @@
+""" This is the malt.strategies.artifacts module.
+    This module is responsible for publishing serialized strategies as
+    versions. The files of a version are written to their own directory,
+    never changed afterwards, then made current by atomically replacing the
+    manifest of the instrument. Readers going through the manifest always
+    get a complete model and the parameters it was selected with. Watcher
+    reloads strategies in the background as new versions are published.
+"""
+
+# External imports
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+from malt.strategies import flat_tree
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+# Files of a version.
+MODEL_FILE = 'model.pkl'
+FLAT_MODEL_FILE = 'model.npy'
+PARAM_FILE = 'params.json'
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class Watcher():
+    """ Class responsible for keeping the latest published strategies loaded,
+        and swapping new versions in without blocking their users.
+    """
+
+    def __init__(self, instruments, loader, directory=common.DAILY_STRATEGY, \
+            interval=common.RELOAD_INTERVAL):
+        """ Initialize the Watcher class.
+
+            Args:
+                instruments: list of strings. The currency pairs to watch.
+                loader: function. Taking an instrument and its manifest, and
+                    returning its strategy. e.g. exec.daily_run.load_strategy.
+                directory: string. Directory of the published strategies.
+                interval: float. Seconds between checks for new versions.
+
+            Returns:
+                void.
+        """
+        self.instruments = instruments
+        self.loader = loader
+        self.directory = directory
+        self.interval = interval
+
+        # Loaded strategies and their versions, None for unversioned ones.
+        # Checks run one at a time, users only wait for the swap.
+        self.strategies = {}
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.check_lock = threading.Lock()
+
+        self.stopped = threading.Event()
+        self.thread = None
+
+        return
+
+
+    def check(self):
+        """ Load the instruments with a new version and swap them in. A
+            version failing to load leaves the previous one in place.
+
+            Args:
+                void.
+
+            Returns:
+                reloaded: list of strings. The instruments swapped in.
+        """
+        reloaded = []
+        with self.check_lock:
+            for instrument in self.instruments:
+                manifest = read_manifest(instrument, self.directory)
+                version = manifest['version'] if manifest else None
+                if instrument in self.strategies and \
+                        version == self.versions[instrument]:
+                    continue
+
+                try:
+                    strategy = self.loader(instrument, manifest)
+                except Exception as err:
+                    logger.warning("Artifacts: Failed to load %s version "
+                            "%s. %s", instrument, version, err)
+                    continue
+
+                with self.lock:
+                    self.strategies[instrument] = strategy
+                    self.versions[instrument] = version
+                reloaded.append(instrument)
+                logger.info("Artifacts: Loaded %s version %s.", instrument, \
+                        version)
+
+        return reloaded
+
+
+    def snapshot(self):
+        """ Obtain the current strategies, unchanged by later reloads.
+
+            Args:
+                void.
+
+            Returns:
+                strategies: dict. Instrument to its loaded strategy.
+        """
+        with self.lock:
+            strategies = dict(self.strategies)
+
+        return strategies
+
+
+    def watch(self):
+        """ Check for new versions until stopped.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        while not self.stopped.is_set():
+            self.check()
+            self.stopped.wait(self.interval)
+
+        return
+
+
+    def start(self):
+        """ Start checking for new versions in the background.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.watch)
+        self.thread.daemon = True
+        self.thread.start()
+
+        return
+
+
+    def stop(self):
+        """ Stop checking for new versions.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_manifest_loc(instrument, directory=common.DAILY_STRATEGY):
+    """ Obtain the location of the manifest of the instrument.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            directory: string. Directory of the published strategies.
+
+        Returns:
+            manifest_loc: string. Path to the manifest.
+    """
+    manifest_loc = "{0}/{1}.manifest".format(directory, instrument)
+
+    return manifest_loc
+
+
+def get_version_dir(instrument, version, directory=common.DAILY_STRATEGY):
+    """ Obtain the directory holding the files of a version.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            version: int. The version.
+            directory: string. Directory of the published strategies.
+
+        Returns:
+            version_dir: string. Path to the directory of the version.
+    """
+    version_dir = "{0}/{1}/{2}".format(directory, instrument, version)
+
+    return version_dir
+
+
+def get_digest(path):
+    """ Hash the content of a file.
+
+        Args:
+            path: string. Location of the file.
+
+        Returns:
+            digest: string. Hex digest of the content.
+    """
+    with open(path, 'rb') as in_handle:
+        digest = hashlib.sha1(in_handle.read()).hexdigest()
+
+    return digest
+
+
+def read_manifest(instrument, directory=common.DAILY_STRATEGY):
+    """ Read the manifest of the current version of the instrument.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            directory: string. Directory of the published strategies.
+
+        Returns:
+            manifest: dict or None. With the version and the digest of each
+                of its files. None if nothing was published.
+    """
+    try:
+        with open(get_manifest_loc(instrument, directory), 'r') as in_handle:
+            manifest = json.load(in_handle)
+    except FileNotFoundError:
+        manifest = None
+
+    return manifest
+
+
+def publish(instrument, model, params, directory=common.DAILY_STRATEGY, \
+        keep=common.KEEP_VERSIONS):
+    """ Publish a strategy as the new current version of the instrument.
+        Trees are also exported as flat arrays for live trading.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            model: sklearn Classifier or Regressor. The trained model.
+            params: dict. Parameters of the strategy.
+            directory: string. Directory of the published strategies.
+            keep: int. Number of latest versions kept on disk.
+
+        Returns:
+            manifest: dict. The manifest of the new version.
+    """
+    # Import late, live trading loads exported models without sklearn.
+    from sklearn.externals import joblib
+
+    # Claim the next version, creating its directory fails if taken.
+    current = read_manifest(instrument, directory)
+    version = current['version'] + 1 if current else 1
+    os.makedirs("{0}/{1}".format(directory, instrument), exist_ok=True)
+    while True:
+        try:
+            os.mkdir(get_version_dir(instrument, version, directory))
+            break
+        except FileExistsError:
+            version += 1
+
+    # Write the files of the version.
+    version_dir = get_version_dir(instrument, version, directory)
+    joblib.dump(model, "{0}/{1}".format(version_dir, MODEL_FILE))
+    with open("{0}/{1}".format(version_dir, PARAM_FILE), 'w') as out_handle:
+        json.dump(params, out_handle)
+    if flat_tree.is_exportable(model):
+        flat_tree.FlatTree.from_model(model).save("{0}/{1}".format( \
+                version_dir, FLAT_MODEL_FILE))
+
+    files = {name: get_digest("{0}/{1}".format(version_dir, name)) \
+            for name in sorted(os.listdir(version_dir))}
+    manifest = {'version': version, 'files': files}
+
+    # Make it current.
+    manifest_loc = get_manifest_loc(instrument, directory)
+    tmp_loc = '{0}.{1}.tmp'.format(manifest_loc, os.getpid())
+    with open(tmp_loc, 'w') as out_handle:
+        json.dump(manifest, out_handle)
+    os.replace(tmp_loc, manifest_loc)
+    logger.info("Artifacts: Published %s version %d.", instrument, version)
+
+    prune(instrument, version, directory, keep)
+
+    return manifest
+
+
+def prune(instrument, current, directory=common.DAILY_STRATEGY, \
+        keep=common.KEEP_VERSIONS):
+    """ Delete the versions older than the latest ones kept.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            current: int. The current version.
+            directory: string. Directory of the published strategies.
+            keep: int. Number of latest versions kept, current included.
+
+        Returns:
+            void.
+    """
+    instrument_dir = "{0}/{1}".format(directory, instrument)
+    for name in os.listdir(instrument_dir):
+        if name.isdigit() and int(name) <= current - keep:
+            shutil.rmtree("{0}/{1}".format(instrument_dir, name), \
+                    ignore_errors=True)
+
+    return
+
+
+def load(instrument, manifest=None, flat=True, \
+        directory=common.DAILY_STRATEGY):
+    """ Load the model and parameters of a published version. Strategies
+        serialized before versioning are loaded from their legacy files.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            manifest: dict or None. The version to load. Current if None.
+            flat: boolean. Whether to load the exported flat tree if there
+                is one, without sklearn.
+            directory: string. Directory of the published strategies.
+
+        Returns:
+            model: object with a predict method. The serialized model.
+            params: dict. Parameters of the strategy.
+    """
+    manifest = manifest or read_manifest(instrument, directory)
+    if manifest is None:
+        return load_legacy(instrument, flat)
+
+    version_dir = get_version_dir(instrument, manifest['version'], directory)
+    files = manifest['files']
+    model_file = FLAT_MODEL_FILE if flat and FLAT_MODEL_FILE in files \
+            else MODEL_FILE
+
+    # Files are never changed once published, so a mismatch is corruption.
+    for name in [model_file, PARAM_FILE]:
+        if get_digest("{0}/{1}".format(version_dir, name)) != files[name]:
+            raise ValueError("{0} of {1} version {2} is corrupted.".format( \
+                    name, instrument, manifest['version']))
+
+    with open("{0}/{1}".format(version_dir, PARAM_FILE), 'r') as in_handle:
+        params = json.load(in_handle)
+
+    model_loc = "{0}/{1}".format(version_dir, model_file)
+    if model_file == FLAT_MODEL_FILE:
+        model = flat_tree.FlatTree.load(model_loc)
+    else:
+        from sklearn.externals import joblib
+        model = joblib.load(model_loc)
+
+    return model, params
+
+
+def load_legacy(instrument, flat=True):
+    """ Load a strategy serialized before versioning.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            flat: boolean. Whether to load the exported flat tree if there
+                is one, without sklearn.
+
+        Returns:
+            model: object with a predict method. The serialized model.
+            params: dict. Parameters of the strategy.
+    """
+    model_loc, param_loc = common.get_strategy_loc(instrument)
+    flat_loc = common.get_flat_model_loc(instrument)
+
+    with open(param_loc, 'r') as in_handle:
+        params = json.load(in_handle)
+
+    if flat and os.path.isfile(flat_loc):
+        model = flat_tree.FlatTree.load(flat_loc)
+    else:
+        from sklearn.externals import joblib
+        model = joblib.load(model_loc)
+
+    return model, params
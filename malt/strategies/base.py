@@ -4,6 +4,9 @@
 """
 
 # External imports
+import hashlib
+import json
+import os
 import numpy as np
 
 # Internal imports
@@ -18,18 +21,40 @@ class BaseStrategy(object):
         properties of strategy classes.
     """
 
-    def __init__(self, instrument):
+    def __init__(self, instrument, mode=common.MODE_BACKTEST):
         """ Initialize the BaseStrategy class.
 
             Args:
                 instrument: string. The currency pair. e.g. 'EUR_USD'.
+                mode: string. One of MODE_LIVE or MODE_BACKTEST as defined in
+                    the module common.
 
             Returns:
                 void.
         """
+        assert mode in [common.MODE_LIVE, common.MODE_BACKTEST]
+
         self.instrument = instrument
         self.pip_factor = common.get_pip_factor(instrument)
         self.params = {}
+        self.mode = mode
+
+        return
+
+
+    def check_history(self):
+        """ Make sure the strategy may read historical data. Live strategies
+            must not, so that they start without touching it.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        if self.mode == common.MODE_LIVE:
+            raise RuntimeError("Strategy for {0} is live and can't read "
+                               "historical data.".format(self.instrument))
 
         return
 
@@ -51,6 +76,11 @@ class BaseStrategy(object):
         pass
 
 
+    def get_order(self, info):
+        """ Abstract method for deciding the trade of the day."""
+        pass
+
+
     def execute(self, executor, info):
         """ Abstract method for executing the strategy on a daily basis."""
         pass
@@ -61,6 +91,11 @@ class BaseStrategy(object):
         pass
 
 
+    def deserialize(self):
+        """ Abstract method for loading the serialized strategy."""
+        pass
+
+
     def get_best(self):
         """ Abstract method for getting the best instance of this strategy."""
         pass
@@ -90,3 +125,91 @@ def read_features(input_file):
     return mat
 
 
+def load_features(input_file, dtype=np.float64):
+    """ Load a space or comma separated file to a float array. The parsed
+        array is cached in a binary sidecar file next to the input file and
+        is memory mapped from there. The sidecar is rebuilt only when the
+        input file changes, by modification time and size or else by hash.
+
+        Args:
+            input_file: string. Name of the file to read.
+            dtype: np.dtype. Type of the values. e.g. np.float32.
+
+        Returns:
+            mat: np.array of dim 2. Read-only array memory mapped from the
+                sidecar file.
+    """
+    dtype = np.dtype(dtype)
+    sidecar = '{0}.{1}.npy'.format(input_file, dtype.name)
+    meta_file = sidecar + '.meta'
+
+    # Describe the input file as it is now.
+    stat = os.stat(input_file)
+    meta = {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+    cached = {}
+    if os.path.isfile(sidecar) and os.path.isfile(meta_file):
+        with open(meta_file, 'r') as meta_handle:
+            cached = json.load(meta_handle)
+
+    # Same modification time and size, the sidecar is good.
+    if cached.get('mtime') == meta['mtime'] and \
+            cached.get('size') == meta['size']:
+        return np.load(sidecar, mmap_mode='r')
+
+    # Otherwise the content has to be the same.
+    meta['hash'] = get_file_hash(input_file)
+    if cached.get('hash') != meta['hash']:
+        mat = np.loadtxt(input_file, dtype=dtype, \
+                delimiter=get_delimiter(input_file), ndmin=2)
+        # Workers may rebuild the same sidecar at once, each writes its own.
+        tmp_sidecar = '{0}.{1}.tmp'.format(sidecar, os.getpid())
+        with open(tmp_sidecar, 'wb') as sidecar_handle:
+            np.save(sidecar_handle, mat)
+        os.replace(tmp_sidecar, sidecar)
+
+    tmp_meta = '{0}.{1}.tmp'.format(meta_file, os.getpid())
+    with open(tmp_meta, 'w') as meta_handle:
+        json.dump(meta, meta_handle)
+    os.replace(tmp_meta, meta_file)
+
+    mat = np.load(sidecar, mmap_mode='r')
+
+    return mat
+
+
+def get_delimiter(input_file):
+    """ Tell whether a file is comma or space separated from its first line.
+
+        Args:
+            input_file: string. Name of the file.
+
+        Returns:
+            delimiter: string or None. ',' for comma separated files, None
+                for any whitespace.
+    """
+    with open(input_file, 'r') as file_handle:
+        first_line = file_handle.readline()
+
+    delimiter = ',' if ',' in first_line else None
+
+    return delimiter
+
+
+def get_file_hash(input_file):
+    """ Hash the content of a file, reading it block by block.
+
+        Args:
+            input_file: string. Name of the file.
+
+        Returns:
+            digest: string. Hex digest of the SHA-1 of the content.
+    """
+    sha = hashlib.sha1()
+    with open(input_file, 'rb') as file_handle:
+        for block in iter(lambda: file_handle.read(1 << 20), b''):
+            sha.update(block)
+
+    digest = sha.hexdigest()
+
+    return digest
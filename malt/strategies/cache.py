@@ -0,0 +1,188 @@
+""" This is the malt.strategies.cache module.
+    This module is responsible for caching trained models on disk. A model is
+    found by a hash of everything its training depends on: the training data,
+    the model class, its parameters and the sample rate. Training again on
+    unchanged data is then a cache hit. The least recently used models are
+    evicted once the cache grows over its size.
+"""
+
+# External imports
+import hashlib
+import os
+import numpy as np
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_key(model, train_set, train_val, sample_rate=None):
+    """ Hash everything the training of model depends on.
+
+        Args:
+            model: sklearn Classifier or Regressor interface, with its
+                parameters set.
+            train_set: np.array of dim 2. Training samples, one per row.
+            train_val: np.array. Training values.
+            sample_rate: float or None. Proportion of data used for training.
+
+        Returns:
+            key: string. Hex digest identifying the trained model.
+    """
+    digest = hashlib.sha1()
+
+    # The model, with the parameters in a fixed order.
+    model_type = type(model)
+    digest.update('{0}.{1}'.format(model_type.__module__, \
+            model_type.__name__).encode())
+    digest.update(repr(sorted(model.get_params().items())).encode())
+    digest.update(repr(sample_rate).encode())
+
+    # The data, including its layout.
+    for data in [train_set, train_val]:
+        data = np.ascontiguousarray(data)
+        digest.update('{0}{1}'.format(data.dtype, data.shape).encode())
+        digest.update(data.data)
+
+    key = digest.hexdigest()
+
+    return key
+
+
+def get_path(key, cache_dir=common.MODEL_CACHE):
+    """ Obtain the location of a cached model.
+
+        Args:
+            key: string. As returned by get_key.
+            cache_dir: string. Directory of the cache.
+
+        Returns:
+            path: string. Path to the serialized model.
+    """
+    path = '{0}/{1}.pkl'.format(cache_dir, key)
+
+    return path
+
+
+def load(key, cache_dir=common.MODEL_CACHE):
+    """ Load a cached model and mark it as recently used.
+
+        Args:
+            key: string. As returned by get_key.
+            cache_dir: string. Directory of the cache.
+
+        Returns:
+            model: sklearn Classifier or Regressor, or None if not cached.
+    """
+    # Import late, live trading loads exported models without sklearn.
+    from sklearn.externals import joblib
+
+    path = get_path(key, cache_dir)
+    try:
+        model = joblib.load(path)
+        os.utime(path)
+    except FileNotFoundError:
+        model = None
+    except Exception as err:
+        # A broken file is a miss, it will be written again.
+        logger.warning("Cache: Failed to load %s. %s", path, err)
+        model = None
+
+    return model
+
+
+def store(key, model, cache_dir=common.MODEL_CACHE, \
+        max_size=common.MODEL_CACHE_SIZE):
+    """ Add a trained model to the cache, then evict the least recently used
+        models if the cache is too big.
+
+        Args:
+            key: string. As returned by get_key.
+            model: sklearn Classifier or Regressor. The trained model.
+            cache_dir: string. Directory of the cache.
+            max_size: int. Maximum size of the cache in bytes.
+
+        Returns:
+            void.
+    """
+    from sklearn.externals import joblib
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Replace atomically, other processes may be reading it.
+    path = get_path(key, cache_dir)
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+    evict(cache_dir, max_size)
+
+    return
+
+
+def evict(cache_dir=common.MODEL_CACHE, max_size=common.MODEL_CACHE_SIZE):
+    """ Delete the least recently used models until the cache fits its size.
+
+        Args:
+            cache_dir: string. Directory of the cache.
+            max_size: int. Maximum size of the cache in bytes.
+
+        Returns:
+            void.
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.pkl'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    # Oldest first.
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+    return
+
+
+def fit(model, train_set, train_val, sample_rate=None, \
+        cache_dir=common.MODEL_CACHE, max_size=common.MODEL_CACHE_SIZE):
+    """ Train model, or load it from the cache if it was trained the same way
+        before.
+
+        Args:
+            model: sklearn Classifier or Regressor interface, with its
+                parameters set.
+            train_set: np.array of dim 2. Training samples, one per row.
+            train_val: np.array. Training values.
+            sample_rate: float or None. Proportion of data used for training.
+            cache_dir: string. Directory of the cache.
+            max_size: int. Maximum size of the cache in bytes.
+
+        Returns:
+            model: sklearn Classifier or Regressor. The trained model. It is
+                a different object than the input if loaded from the cache.
+    """
+    key = get_key(model, train_set, train_val, sample_rate)
+
+    cached = load(key, cache_dir)
+    if cached is not None:
+        logger.debug("Cache: Hit %s.", key)
+        return cached
+
+    model.fit(train_set, train_val)
+    store(key, model, cache_dir, max_size)
+
+    return model
@@ -0,0 +1,212 @@
+""" This is the malt.strategies.euler.backtest module.
+    This module is responsible for back-testing strategy Euler on historical
+    prices with whole-array operations. It gives the same results as going
+    day by day with Euler.parse_units and util.get_profit_loss.
+"""
+
+# External imports
+import numpy as np
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_units(pred, threshold, unit_shape):
+    """ Vectorized Euler.parse_units over many predictions.
+
+        Args:
+            pred: np.array. Predicted changes in price.
+            threshold: positive float. Threshold for taking action.
+            unit_shape: string. One of UNIT_CONSTANT, UNIT_LINEAR, UNIT_SQUARE,
+                or UNIT_LOG as defined in the module common.
+
+        Returns:
+            units: np.array of ints. Same shape as pred. Number of units for
+                trade. Positive for buy, negative for sell.
+    """
+    pred = np.asarray(pred, dtype=float)
+    units = apply_threshold(pred, get_unit_sizes(pred, unit_shape), threshold)
+
+    return units
+
+
+def get_unit_sizes(pred, unit_shape):
+    """ Number of units for each prediction if it passes the threshold.
+
+        Args:
+            pred: np.array. Predicted changes in price.
+            unit_shape: string. One of UNIT_CONSTANT, UNIT_LINEAR, UNIT_SQUARE,
+                or UNIT_LOG as defined in the module common.
+
+        Returns:
+            sizes: np.array of floats. Same shape as pred. Number of units,
+                truncated like int() but not capped.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if unit_shape == common.UNIT_CONSTANT:
+            sizes = np.full(pred.shape, common.CONSTANT_FACTOR, dtype=float)
+
+        elif unit_shape == common.UNIT_LINEAR:
+            sizes = np.trunc(np.abs(pred * common.LINEAR_FACTOR))
+
+        elif unit_shape == common.UNIT_SQUARE:
+            sizes = np.trunc(pred ** 2 * common.SQUARE_FACTOR)
+
+        elif unit_shape == common.UNIT_LOG:
+            sizes = np.trunc(np.log(np.abs(pred)) * common.LOG_FACTOR)
+
+        else:
+            logger.warning("backtest.get_unit_sizes(): Unit shape has to be "
+                           "one of UNIT_CONSTANT, UNIT_LINEAR, UNIT_SQUARE, "
+                           "or UNIT_LOG as defined in 'common'.")
+            sizes = np.zeros(pred.shape)
+
+    return sizes
+
+
+def apply_threshold(pred, sizes, threshold):
+    """ Turn unit sizes into signed units, taking no action under threshold.
+
+        Args:
+            pred: np.array. Predicted changes in price.
+            sizes: np.array. Unit sizes from get_unit_sizes, broadcastable
+                with pred.
+            threshold: float or np.array broadcastable with pred. Threshold
+                for taking action.
+
+        Returns:
+            units: np.array of ints. Number of units for trade.
+                Positive for buy, negative for sell.
+    """
+    # Take no action if predicted price change under threshold.
+    sign = np.where(pred > threshold, 1, np.where(pred < -threshold, -1, 0))
+
+    # Make sure the absoulte value of units doesn't exceed the maximum.
+    with np.errstate(invalid='ignore'):
+        units = np.minimum(sizes, common.MAX_UNITS) * sign
+
+    units = np.where(sign != 0, units, 0).astype(np.int64)
+
+    return units
+
+
+def get_stop_loss_price(params):
+    """ Determine the stop loss price the way util.get_profit_loss does.
+
+        Args:
+            params: dict. Parameters of strategy Euler.
+
+        Returns:
+            stop_loss_price: float. Negative if there is no stop loss.
+    """
+    if 'stop_loss' in params:
+        stop_loss_price = params['stop_loss']
+    elif 'trailing_stop' in params:
+        stop_loss_price = params['trailing_stop']
+    else:
+        stop_loss_price = -1
+
+    return stop_loss_price
+
+
+def get_profit_loss(prices, units, stop_loss_price):
+    """ Vectorized util.get_profit_loss over many days.
+
+        Args:
+            prices: np.array of dim 2. One row per day with openBid, highBid,
+                lowBid, closeBid, openAsk, highAsk, lowAsk and closeAsk.
+            units: np.array of ints. Number of units for trade of each day,
+                either one run of dim 1 or many runs of dim 2, one per row.
+                Positive for buy and negative for sell.
+            stop_loss_price: float, or np.array of one row per run. Negative
+                if there is no stop loss.
+
+        Returns:
+            profit_loss: np.array of floats. Same shape as units. Profit or
+                loss of each day.
+    """
+    # TODO: Take profit.
+    stop = stop_loss_price > 0
+
+    # BUY. If stop loss set and lowBid droped below it, it triggers.
+    sold_price = np.where(stop & (prices[:, 2] < stop_loss_price), \
+            stop_loss_price, prices[:, 3])
+
+    # SELL. If stop loss set and highAsk rose above it, it triggers.
+    bought_price = np.where(stop & (prices[:, 5] > stop_loss_price), \
+            stop_loss_price, prices[:, 7])
+
+    # Now calculate profit/loss according to units and price.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bought = units - units * prices[:, 4] / sold_price
+        sold = units - units * prices[:, 0] / bought_price
+
+    profit_loss = np.where(units > 0, bought, np.where(units < 0, sold, 0.0))
+
+    return profit_loss
+
+
+def run(pred, prices, **params):
+    """ Back-test strategy Euler with the given parameters.
+
+        Args:
+            pred: np.array of dim 1. Predicted daily price changes.
+            prices: np.array of dim 2. Prices of the same days as pred, one
+                row per day as in get_profit_loss.
+            params: named parameters for strategy Euler, including
+                threshold, unit_shape and optionally stop_loss and
+                trailing_stop.
+
+        Returns:
+            units: np.array of ints. Number of units traded every day.
+            profit_loss: np.array of floats. Profit or loss of every day.
+            balance: np.array of floats. Accumulated profit/loss of every day.
+    """
+    units = get_units(pred, params['threshold'], params['unit_shape'])
+    profit_loss = get_profit_loss(prices, units, get_stop_loss_price(params))
+    balance = np.cumsum(profit_loss)
+
+    return units, profit_loss, balance
+
+
+def run_grid(pred, prices, params_grid):
+    """ Back-test strategy Euler with many sets of parameters at once. Every
+        set shares the same predictions, so the whole grid is evaluated with
+        one row per set in the same array operations as a single run.
+
+        Args:
+            pred: np.array of dim 1. Predicted daily price changes.
+            prices: np.array of dim 2. Prices of the same days as pred, one
+                row per day as in get_profit_loss.
+            params_grid: list of dicts. Each entry a set of parameters for
+                strategy Euler, as for run.
+
+        Returns:
+            balances: np.array of dim 2. Accumulated profit/loss of every day,
+                one row per set of parameters.
+            scores: np.array of dim 1. Score of each set of parameters, as
+                by util.get_strategy_score.
+    """
+    pred = np.asarray(pred, dtype=float)
+
+    # Unit sizes only depend on the shape, work them out once per shape.
+    shapes = set(params['unit_shape'] for params in params_grid)
+    sizes = {shape: get_unit_sizes(pred, shape) for shape in shapes}
+    sizes = np.array([sizes[params['unit_shape']] for params in params_grid])
+
+    # One column of threshold and stop loss for all days of each set.
+    thresholds = np.array([[params['threshold']] for params in params_grid])
+    stop_loss_prices = np.array([[get_stop_loss_price(params)] \
+            for params in params_grid])
+
+    units = apply_threshold(pred, sizes, thresholds)
+    profit_loss = get_profit_loss(prices, units, stop_loss_prices)
+    balances = np.cumsum(profit_loss, axis=1)
+
+    scores = (balances > 0).sum(axis=1) / float(pred.size)
+
+    return balances, scores
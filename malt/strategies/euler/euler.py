@@ -3,18 +3,22 @@
 """
 
 # External imports
-import json
 import math
-import numpy as np
-from sklearn.externals import joblib
+import os
 
 # Internal imports
 from malt import common
 logger = common.get_logger(__name__)
+from malt.data import columnar
+from malt.strategies import artifacts, ledger, reporting
 from malt.strategies.base import BaseStrategy
-from malt.strategies.euler import transformer, util
+from malt.strategies.euler import backtest, incremental, selection, \
+        transformer, util
 from malt.strategies.euler.learner import Learner
 
+# Raw candles for testing read by this process, by file.
+TEST_DATA = {}
+
 #===============================================================================
 #   Classes:
 #===============================================================================
@@ -24,27 +28,74 @@ class Euler(BaseStrategy):
         from open to close according to previous day's candle.
     """
 
-    # All predictive models used for strategy Euler.
-    all_models = util.get_all_models()
-
-    def __init__(self, instrument):
-        """ Initialize the strategy class Euler.
+    def __init__(self, instrument, mode=common.MODE_BACKTEST):
+        """ Initialize the strategy class Euler. The learner and the test
+            data are only loaded when first used.
 
             Args:
                 instrument: string. The currency pair. e.g. 'EUR_USD'.
+                mode: string. One of MODE_LIVE or MODE_BACKTEST as defined in
+                    the module common.
 
             Returns:
                 void.
         """
-        super(Euler, self).__init__(instrument)
+        super(Euler, self).__init__(instrument, mode)
 
-        # Initialize learner and model.
-        self.learner = Learner(instrument)
+        # Initialize model, the data is loaded on demand.
         self.model = None
+        self._learner = None
+        self._test_data = None
+        self._test_prices = None
+
+        return
+
+
+    @property
+    def learner(self):
+        """ Learner of the instrument's features, built on first use."""
+        if self._learner is None:
+            self.check_history()
+            self._learner = Learner(self.instrument, use_cache=True, \
+                    window=common.TRAIN_WINDOW)
+
+        return self._learner
+
+
+    @property
+    def test_data(self):
+        """ Raw daily candles for testing, as read by read_raw_file. Read on
+            first use and shared by the strategies of this process.
+        """
+        if self._test_data is None:
+            self.check_history()
+            self._test_data, self._test_prices = get_test_data(self.instrument)
+
+        return self._test_data
+
+
+    @property
+    def test_prices(self):
+        """ Prices of the test data, as returned by rows_to_prices."""
+        if self._test_prices is None:
+            self.check_history()
+            self._test_data, self._test_prices = get_test_data(self.instrument)
 
-        # Read in the raw data file for testing.
-        test_file = common.get_raw_data(instrument)
-        self.test_data = transformer.read_raw_file(test_file)
+        return self._test_prices
+
+
+    @test_data.setter
+    def test_data(self, data):
+        """ Set the raw daily candles for testing along with their prices.
+
+            Args:
+                data: list of list of Strings. Each entry is a daily candle.
+
+            Returns:
+                void.
+        """
+        self._test_data = data
+        self._test_prices = transformer.rows_to_prices(data)
 
         return
 
@@ -143,30 +194,45 @@ class Euler(BaseStrategy):
         return units
 
 
-    def execute(self, executor, candle):
-        """ Execute the strategy at day's open.
+    def get_order(self, candle):
+        """ Decide the trade of the day from yesterday's candle.
 
             Args:
-                executor: exec.Executor. The object for executing trades.
                 candle: dict. Yesterday's daily candle.
 
             Returns:
-                void.
+                units: signed int. Number of units for trade.
+                controls: dict. As returned by parse_controls.
         """
-        # TODO: Report failure.
-        # Build and format the features first.
-        features = transformer.candle_to_features(candle, self.pip_factor)
-        features = np.asarray(features).reshape(1, -1)
+        # Build the features first.
+        prices = transformer.candle_to_prices(candle)
+        features = transformer.get_features(prices, self.pip_factor)
 
         # Making and logging the prediction.
-        pred = self.model.predict(features)
+        pred = float(self.model.predict(features)[0])
         logger.info("Euler: Predicted price change for %s is %.2f.", \
-                self.instrument, float(pred))
+                self.instrument, pred)
 
         # Parse the parameters.
         controls = self.parse_controls()
         units = self.parse_units(pred)
 
+        return units, controls
+
+
+    def execute(self, executor, candle):
+        """ Execute the strategy at day's open.
+
+            Args:
+                executor: exec.Executor. The object for executing trades.
+                candle: dict. Yesterday's daily candle.
+
+            Returns:
+                void.
+        """
+        # TODO: Report failure.
+        units, controls = self.get_order(candle)
+
         # Make the decision.
         executor.make_trade(self.instrument, units, **controls)
 
@@ -183,65 +249,76 @@ class Euler(BaseStrategy):
                     last part of the test data.
                 kwargs: named arguments, including:
                     print_result: boolean. Whether to print dry run report.
+                        The report is only built if so.
                     export_plot: string. Name of the plot to be saved.
 
             Returns:
                 balance: np.array.  Accumulated profit/loss of every day.
         """
-        # Write report title.
-        report = "\nDry run report: {0}\n\n".format(self.instrument)
-        report += str(self.params) + '\n'
-        report += '=' * 80 + '\n'
-
-        # Initialize the balance.
+        # Back-test on the actual daily candles of the last part.
         test_size = pred.size
-        balance = np.zeros_like(pred)
+        prices = self.test_prices[-test_size:]
+        units, profit_loss, balance = backtest.run(pred, prices, **self.params)
 
-        # Now go through the actual daily candles and figure out actual PL.
-        data = self.test_data[-test_size:]
+        # Export the graphs if asked.
+        if 'export_plot' in kwargs:
+            # Do some plots.
+            common.plot(balance, kwargs['export_plot'])
 
-        for i in range(len(data)):
+        # Print the report if asked.
+        if 'print_result' in kwargs and kwargs['print_result']:
+            dates = [row[0] for row in self.test_data[-test_size:]]
+            actuals = util.get_price_changes(prices, self.pip_factor)
+            print(self.get_report(dates, units, pred, actuals, profit_loss, \
+                    balance))
 
-            # Fetch the row.
-            row = data[i]
+        return balance
 
-            # Fetch the predicted and actual price change.
-            predicted = pred[i]
-            actual = util.get_price_change(row, self.pip_factor)
 
-            # Figure out the action we take and the units.
-            units = self.parse_units(predicted)
-            controls = self.parse_controls()
+    def get_report(self, dates, units, pred, actuals, profit_loss, balance):
+        """ Produce the report of a dry run.
 
-            # Calculate profit/loss for this day.
-            p_l = util.get_profit_loss(row, units, **controls)
+            Args:
+                dates: list of strings. Dates of the days in the dry run.
+                units: np.array of ints. Number of units traded every day.
+                pred: np.array. Predicted daily price changes.
+                actuals: np.array. Actual daily price changes.
+                profit_loss: np.array. Profit or loss of every day.
+                balance: np.array. Accumulated profit/loss of every day.
 
-            # Update daily profit/loss
-            balance[i] = balance[i - 1] + p_l
+            Returns:
+                report: string. The report on the profitability of the run.
+        """
+        # Write report title.
+        lines = ["\nDry run report: {0}\n\n".format(self.instrument)]
+        lines.append(str(self.params) + '\n')
+        lines.append('=' * 80 + '\n')
 
-            # Add to the report. row[0] is date.
-            report += util.format_row(row[0], units, predicted, actual, p_l)
+        # One line per day.
+        for i, date in enumerate(dates):
+            lines.append(util.format_row(date, units[i], pred[i], actuals[i], \
+                    profit_loss[i]))
 
         # Add final total profit/loss to the report.
-        report += "Total profit/loss: {0}".format(balance[-1])
+        lines.append("Total profit/loss: {0}".format(balance[-1]))
+        report = ''.join(lines)
 
-        # Export the graphs if asked.
-        if 'export_plot' in kwargs:
-            # Do some plots.
-            common.plot(balance, kwargs['export_plot'])
+        return report
 
-        # Print the report if asked.
-        if 'print_result' in kwargs and kwargs['print_result']:
-            print(report)
-
-        return balance
 
-
-    def get_best(self):
+    def get_best(self, workers=1, top_k=common.PLOT_TOP_K, folds=1, \
+            prune=False, evaluations=None):
         """ Produce a best instance of this strategy.
 
             Args:
-                void.
+                workers: int. Number of processes for the model selection.
+                top_k: int. Number of best combinations to plot.
+                folds: int. Number of walk-forward folds of each model.
+                prune: boolean. Whether to search decision trees by fitting
+                    one tree and pruning it.
+                evaluations: strategies.ledger.Ledger or None. Where
+                    evaluations are kept, and skipped if done on the same
+                    data before.
 
             Returns:
                 self: Euler instance. With the params and model having the
@@ -250,55 +327,62 @@ class Euler(BaseStrategy):
         # Log enter.
         logger.info("Euler: Selecting best for %s.", self.instrument)
 
-        # Initialize the scores array and strategy parameters.
-        scores = []
-        strategy_params = util.get_euler_params()
+        # Run for all predictive models, model and strategy parameters.
+        datasets = {self.instrument: (self.learner, self.test_prices)}
+        results = selection.select([self.instrument], workers, datasets, \
+                folds, prune, evaluations)
 
-        # TODO: Do more than 1 run.
-        # Run for all predictive models.
-        counter = 0
-        for model in self.all_models:
-            scores_row = []
-            model_params = util.get_model_params(model)
+        return self.set_best(results[self.instrument], top_k)
 
-            # Try different model parameters.
-            for model_param in model_params:
-                scores_col = []
-                model = self.learner.build_model(model, 0.9, **model_param)
-                pred, _ = self.learner.test_model(model)
 
-                # And different strategy parameters, e.g. threshold.
-                for strategy_param in strategy_params:
-                    self.set_params(**strategy_param)
+    def set_best(self, result, top_k=common.PLOT_TOP_K):
+        """ Take the best combination found by the model selection. The model
+            is trained again on all data.
 
-                    # Do the dry run.
-                    plot_name = '{0}_{1}.png'.format(self.instrument, counter)
-                    balance = self.dry_run(pred, export_plot=plot_name)
+            Args:
+                result: dict. Result of selection.select for this instrument.
+                top_k: int. Number of best combinations to plot.
 
-                    # Determine the quality of the params via score.
-                    scores_col.append(util.get_strategy_score(balance))
-                    counter += 1
+            Returns:
+                self: Euler instance. With the params and model having the
+                    highest score among all combinations.
+        """
+        # Keep the balance of every combination, only plot the best ones.
+        reporter = reporting.Reporter(self.instrument)
+        scores = result['scores'].reshape(-1, result['scores'].shape[-1])
+        counter = 0
+        for balances, scores_col in zip(result['balances'], scores):
+            for balance, score in zip(balances, scores_col):
+                reporter.record(counter, balance, score)
+                counter += 1
 
-                scores_row.append(scores_col)
+        reporter.render_top(top_k)
+        logger.info("Best combinations:\n%s", reporter.get_report(top_k))
 
-            scores.append(scores_row)
+        # Import late, live trading loads exported models without sklearn.
+        from sklearn.base import clone
 
         # Get the best and set the parameters to the best.
-        best = np.unravel_index(np.argmax(scores), np.array(scores).shape)
+        best = result['best']
 
-        model = self.all_models[best[0]]
+        model = clone(util.get_all_models()[best[0]])
         model_param = util.get_model_params(model)[best[1]]
         model = self.learner.build_model(model, 1, **model_param)
 
-        logger.info("Best score is: %s.", str(np.array(scores)[best]))
-        self.set_params(**strategy_params[best[2]])
+        logger.info("Best score is: %s.", str(result['scores'][best]))
+        self.set_params(**util.get_euler_params()[best[2]])
         self.model = model
+        incremental.set_trained(self)
+
+        # The plots were drawn while the model was trained.
+        reporter.close()
 
         return self
 
 
     def serialize(self):
-        """ Serialize this strategy to the designated location.
+        """ Publish this strategy as a new version. Trees are also exported
+            as flat arrays for live trading.
 
             Args:
                 void.
@@ -306,27 +390,129 @@ class Euler(BaseStrategy):
             Returns:
                 void.
         """
-        # Get the designated locations.
-        model_loc, param_loc = common.get_strategy_loc(self.instrument)
-
-        # Dump the data.
-        joblib.dump(self.model, model_loc)
-        json.dump(self.params, open(param_loc, 'w'))
+        artifacts.publish(self.instrument, self.model, self.params)
 
         return
 
 
+    def deserialize(self):
+        """ Load the current version of this strategy.
+
+            Args:
+                void.
+
+            Returns:
+                self: Euler instance. With the serialized params and model.
+        """
+        self.model, params = artifacts.load(self.instrument, flat=False)
+        self.set_params(**params)
+
+        return self
+
+
 #===============================================================================
 #   Functions:
 #===============================================================================
 
-def main():
-    """ Main in selecting and serializing the best Euler strategy."""
-    for instrument in common.ALL_PAIRS:
+def get_test_data(instrument):
+    """ Read the raw candles of the instrument for testing, once per process
+        for as long as the file doesn't change. They come from the columnar
+        store if it was built from the file as it is.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+
+        Returns:
+            test_data: list of list of Strings. Each entry is a daily candle,
+                as read by transformer.read_raw_file.
+            test_prices: np.array of dim 2. Prices of the candles, as returned
+                by transformer.rows_to_prices.
+    """
+    test_file = common.get_raw_data(instrument)
+    stat = os.stat(test_file)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    if TEST_DATA.get(test_file, (None,))[0] != version:
+        # Take both from the columnar store if it is up to date.
+        columns = columnar.load_current(instrument, test_file)
+        if columns is not None:
+            test_data = columnar.get_rows(columns)
+            test_prices = columnar.get_prices(columns)
+        else:
+            test_data = transformer.read_raw_file(test_file)
+            test_prices = transformer.rows_to_prices(test_data)
+        TEST_DATA[test_file] = (version, test_data, test_prices)
+
+    _, test_data, test_prices = TEST_DATA[test_file]
+
+    return test_data, test_prices
+
+
+def train(instrument, incremental_mode=True, pool=None):
+    """ Select and train the best Euler strategy of one instrument.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            incremental_mode: boolean. Whether to only update the serialized
+                strategy on the new data, and select again only if it
+                drifted or is too old.
+            pool: concurrent.futures.ProcessPoolExecutor or None. Processes
+                for the model selection, shared with other instruments.
+
+        Returns:
+            strategy: Euler instance or None. The best strategy, still to be
+                serialized. None if the serialized one was kept.
+    """
+    if incremental_mode and not incremental.update(Euler(instrument)):
+        return None
+
+    # Keep every evaluation, and skip the ones done on the same data.
+    evaluations = ledger.Ledger()
+    try:
+        results = selection.select([instrument], common.TRAIN_WORKERS, \
+                folds=common.VALIDATION_FOLDS, prune=True, \
+                ledger=evaluations, pool=pool)
+    finally:
+        evaluations.close()
+
+    strategy = Euler(instrument).set_best(results[instrument])
+
+    return strategy
+
+
+def main(incremental_mode=True):
+    """ Main in selecting and serializing the best Euler strategy. The model
+        selection of all instruments runs in parallel.
+
+        Args:
+            incremental_mode: boolean. Whether to only update the serialized
+                strategies on the new data, and select again only those
+                that drifted or are too old.
+
+        Returns:
+            void.
+    """
+    instruments = common.ALL_PAIRS
+    if incremental_mode:
+        instruments = [x for x in instruments \
+                if incremental.update(Euler(x))]
+
+    # Keep every evaluation, and skip the ones done on the same data.
+    evaluations = ledger.Ledger()
+    try:
+        results = selection.select(instruments, common.TRAIN_WORKERS, \
+                folds=common.VALIDATION_FOLDS, prune=True, \
+                ledger=evaluations)
+    finally:
+        evaluations.close()
+
+    for instrument in instruments:
         strategy = Euler(instrument)
-        strategy = strategy.get_best()
+        strategy = strategy.set_best(results[instrument])
         strategy.serialize()
 
+    return
+
 # Main.
 if __name__ == "__main__":
     main()
@@ -0,0 +1,148 @@
+""" This is the malt.strategies.euler.incremental module.
+    This module is responsible for keeping a serialized Euler strategy up to
+    date as new days are added, without selecting it again every night.
+    Models that can learn incrementally learn the new rows. Others are kept
+    until they drift or grow too old. The training state is kept in the
+    strategy parameters.
+"""
+
+# External imports
+import datetime
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def set_trained(strategy, today=None):
+    """ Record in the parameters that the strategy was trained on all rows.
+
+        Args:
+            strategy: Euler instance. Just trained.
+            today: datetime.date or None. Date of the training. Today if None.
+
+        Returns:
+            void.
+    """
+    today = today or datetime.date.today()
+
+    strategy.params['trained_rows'] = strategy.learner.row_count
+    strategy.params['updated_rows'] = strategy.learner.row_count
+    strategy.params['trained_date'] = str(today)
+
+    return
+
+
+def get_rows_since(strategy, row_count):
+    """ Obtain the rows added after the first row_count rows.
+
+        Args:
+            strategy: Euler instance.
+            row_count: int. Number of rows of the whole history at a time.
+
+        Returns:
+            rows: np.array of dim 2. The rows added since, as a view. Only
+                the rows within the training window are available.
+    """
+    learner = strategy.learner
+    new_count = min(learner.row_count - row_count, learner.data_mat.shape[0])
+    rows = learner.data_mat[learner.data_mat.shape[0] - new_count:]
+
+    return rows
+
+
+def get_drift(strategy):
+    """ Measure how the model predicted the days since it was trained.
+
+        Args:
+            strategy: Euler instance. With its model and parameters.
+
+        Returns:
+            days: int. Number of days since the model was trained.
+            prop_op: float. Proportion of predictions in the wrong direction.
+    """
+    rows = get_rows_since(strategy, strategy.params['trained_rows'])
+    days = rows.shape[0]
+    if days == 0:
+        return days, 0.
+
+    pred = strategy.model.predict(rows[:, :-1])
+    results = strategy.learner.get_results(pred, rows[:, -1])
+
+    return days, results['prop_op']
+
+
+def needs_retrain(strategy, today=None):
+    """ Determine whether the strategy should be selected and trained again.
+
+        Args:
+            strategy: Euler instance. With its model and parameters.
+            today: datetime.date or None. Today if None.
+
+        Returns:
+            reason: string or None. Why to train again, None if not needed.
+    """
+    today = today or datetime.date.today()
+    params = strategy.params
+
+    # Strategies serialized before this module have no state.
+    if 'trained_rows' not in params or 'trained_date' not in params:
+        return 'no training state'
+
+    # The history was rebuilt.
+    if strategy.learner.row_count < params['trained_rows']:
+        return 'history shrank'
+
+    trained_date = datetime.datetime.strptime(params['trained_date'], \
+            '%Y-%m-%d').date()
+    if (today - trained_date).days > common.MAX_MODEL_AGE:
+        return 'trained on {0}'.format(params['trained_date'])
+
+    days, prop_op = get_drift(strategy)
+    if days >= common.MIN_DRIFT_DAYS and prop_op >= common.DRIFT_THRESHOLD:
+        return 'wrong on {0:.0%} of {1} days'.format(prop_op, days)
+
+    return None
+
+
+def update(strategy, today=None):
+    """ Bring a serialized strategy up to date with the new rows. Models with
+        partial_fit learn the rows added since their last update.
+
+        Args:
+            strategy: Euler instance. Its serialized version is updated.
+            today: datetime.date or None. Today if None.
+
+        Returns:
+            retrain: boolean. Whether the strategy has to be selected and
+                trained again instead.
+    """
+    try:
+        strategy.deserialize()
+    except (OSError, ValueError) as err:
+        logger.info("Incremental: No strategy for %s. %s", \
+                strategy.instrument, err)
+        return True
+
+    reason = needs_retrain(strategy, today)
+    if reason is not None:
+        logger.info("Incremental: Retrain %s, %s.", strategy.instrument, \
+                reason)
+        return True
+
+    # Learn the new rows if the model can.
+    params = strategy.params
+    rows = get_rows_since(strategy, params.get('updated_rows', \
+            params['trained_rows']))
+    if hasattr(strategy.model, 'partial_fit') and rows.shape[0] > 0:
+        strategy.model.partial_fit(rows[:, :-1], rows[:, -1])
+        params['updated_rows'] = strategy.learner.row_count
+        strategy.serialize()
+
+    logger.info("Incremental: Kept %s, %d new days.", strategy.instrument, \
+            rows.shape[0])
+
+    return False
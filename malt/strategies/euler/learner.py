@@ -6,10 +6,11 @@
 
 # External imports
 import numpy as np
+from concurrent import futures
 
 # Internal imports
-from malt.strategies import base
-from malt.strategies.euler import util
+from malt.strategies import base, cache
+from malt.strategies.euler import pruning, util
 
 #===============================================================================
 #   Classes:
@@ -20,19 +21,32 @@ class Learner:
         historical data.
     """
 
-    def __init__(self, instrument):
+    def __init__(self, instrument, dtype=np.float64, use_cache=False, \
+            window=None):
         """ Initialize the Learner class.
 
             Args:
                 instrument: string. The currency pair. e.g. 'EUR_USD'.
+                dtype: np.dtype. Type of the data. np.float32 halves memory.
+                use_cache: boolean. Whether to load models trained the same
+                    way before from malt.strategies.cache.
+                window: int or None. Only learn from this many of the latest
+                    rows, so that training costs the same as history grows.
+                    All rows if None.
 
             Returns:
                 void.
         """
         self.instrument = instrument
         self.data_file = util.get_clean_data(instrument)
-        self.data_mat = base.read_features(self.data_file)
+        self.data_mat = base.load_features(self.data_file, dtype)
         self.sample_index = 0
+        self.use_cache = use_cache
+
+        # Number of rows in the whole history, as a view keeps the latest.
+        self.row_count = self.data_mat.shape[0]
+        if window is not None:
+            self.data_mat = self.data_mat[-window:]
 
         # Checking input read from file.
         assert self.data_mat.shape[1] == 8
@@ -62,7 +76,7 @@ class Learner:
 
         # Build the model.
         model.set_params(**model_params)
-        model.fit(train_set, train_val)
+        model = self.fit(model, train_set, train_val, sample_rate)
 
         return model
 
@@ -87,6 +101,179 @@ class Learner:
 
         # Make and format the prediction results.
         test_pred = model.predict(test_set)
+        results = self.get_results(test_pred, test_val)
+
+        return test_pred, results
+
+
+    def get_folds(self, n_folds, sample_rate, window=None):
+        """ Split self.data_mat into walk-forward folds. The test sets follow
+            each other from the end of the first training set to the end of
+            self.data_mat, and each training set ends where its test set
+            starts.
+
+            Args:
+                n_folds: int. Number of folds.
+                sample_rate: float. Proportion of data in the first training
+                    set.
+                window: int or None. Number of rows in each training set.
+                    The training sets expand from the first row if None.
+
+            Returns:
+                folds: list of tuples. Slices of the rows of the training
+                    set and the test set of each fold.
+        """
+        size = self.data_mat.shape[0]
+        bounds = np.linspace(int(size * sample_rate), size, n_folds + 1)
+        bounds = bounds.astype(int)
+
+        folds = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            first = 0 if window is None else max(0, start - window)
+            folds.append((slice(first, start), slice(start, end)))
+
+        return folds
+
+
+    def walk_forward(self, model, n_folds, sample_rate, window=None, \
+            workers=1, **model_params):
+        """ Evaluate model with walk-forward validation. A copy of model is
+            trained on each fold and predicts its test set, so the test sets
+            together are predicted only from the past. With 1 fold this is
+            the same as build_model followed by test_model.
+
+            Args:
+                model: sklearn Classifier or Regressor interface.
+                    Copies of it will be trained on each fold.
+                n_folds: int. Number of folds.
+                sample_rate: float. Proportion of data in the first training
+                    set.
+                window: int or None. Number of rows in each training set.
+                    The training sets expand from the first row if None.
+                workers: int. Number of folds trained at the same time.
+                model_params: named arguments. Parameters for the model.
+
+            Returns:
+                test_pred: np.array of dim 1. Prediction results on the test
+                    sample from self.sample_index to the end of self.data_mat.
+                results: dictionary. As for test_model.
+        """
+        folds = self.get_folds(n_folds, sample_rate, window)
+        self.sample_index = folds[0][1].start
+
+        # Train every fold on its own copy of the model.
+        predict = lambda fold: self.predict_fold(model, fold, **model_params)
+
+        if workers > 1:
+            with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+                fold_preds = list(pool.map(predict, folds))
+        else:
+            fold_preds = [predict(fold) for fold in folds]
+
+        test_pred = np.concatenate(fold_preds)
+        test_val = self.data_mat[self.sample_index:, -1]
+        results = self.get_results(test_pred, test_val)
+
+        return test_pred, results
+
+
+    def walk_forward_grid(self, model, n_folds, sample_rate, params_grid, \
+            window=None):
+        """ Predict as walk_forward does for every set of model parameters,
+            fitting one decision tree per fold and pruning it for each set.
+
+            Args:
+                model: sklearn DecisionTreeRegressor. As checked by
+                    pruning.is_prunable.
+                n_folds: int. Number of folds.
+                sample_rate: float. Proportion of data in the first training
+                    set.
+                params_grid: list of dicts. Each entry a set of parameters for
+                    the model.
+                window: int or None. Number of rows in each training set.
+                    The training sets expand from the first row if None.
+
+            Returns:
+                test_preds: list of np.arrays of dim 1. Prediction results on
+                    the test sample for every set of parameters.
+        """
+        folds = self.get_folds(n_folds, sample_rate, window)
+        self.sample_index = folds[0][1].start
+
+        # One list of predictions per fold, each for every set of parameters.
+        fold_preds = [pruning.predict_grid(model, self.data_mat[train, :-1], \
+                self.data_mat[train, -1], self.data_mat[test, :-1], \
+                params_grid) for train, test in folds]
+
+        test_preds = [np.concatenate(preds) for preds in zip(*fold_preds)]
+
+        return test_preds
+
+
+    def predict_fold(self, model, fold, **model_params):
+        """ Train a copy of model on the training set of a fold and predict
+            its test set.
+
+            Args:
+                model: sklearn Classifier or Regressor interface.
+                fold: tuple. Slices of the rows of the training set and the
+                    test set, as returned by get_folds.
+                model_params: named arguments. Parameters for the model.
+
+            Returns:
+                fold_pred: np.array of dim 1. Prediction results on the test
+                    set of the fold.
+        """
+        # Import late, live trading loads exported models without sklearn.
+        from sklearn.base import clone
+
+        train, test = fold
+
+        # Slices of rows are views, no data is copied.
+        fold_model = clone(model).set_params(**model_params)
+        fold_model = self.fit(fold_model, self.data_mat[train, :-1], \
+                self.data_mat[train, -1])
+        fold_pred = fold_model.predict(self.data_mat[test, :-1])
+
+        return fold_pred
+
+
+    def fit(self, model, train_set, train_val, sample_rate=None):
+        """ Train model, through the cache if self.use_cache.
+
+            Args:
+                model: sklearn Classifier or Regressor interface.
+                train_set: np.array of dim 2. Training samples, one per row.
+                train_val: np.array. Training values.
+                sample_rate: float or None. Proportion of data used for
+                    training.
+
+            Returns:
+                model: sklearn Classifier or Regressor. The trained model.
+        """
+        if self.use_cache:
+            model = cache.fit(model, train_set, train_val, sample_rate)
+        else:
+            model.fit(train_set, train_val)
+
+        return model
+
+
+    def get_results(self, test_pred, test_val):
+        """ Measure the accuracy of predictions.
+
+            Args:
+                test_pred: np.array of dim 1. Predicted values.
+                test_val: np.array. Actual values.
+
+            Returns:
+                results: dictionary. Including:
+                    ave_diff: Average of prediction error.
+                    prop_op: Proportion of predictions in the wrong direction.
+        """
+        # Compare day by day, whatever the shape of the columns given.
+        test_pred = np.asarray(test_pred).ravel()
+        test_val = np.asarray(test_val).ravel()
 
         # Gather the results.
         results = {}
@@ -96,6 +283,6 @@ class Learner:
         wrongs = (np.multiply(test_pred, test_val) < 0).astype(int)
         results['prop_op'] = wrongs.sum() / wrongs.size
 
-        return test_pred, results
+        return results
 
 
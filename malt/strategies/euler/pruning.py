@@ -0,0 +1,172 @@
+""" This is the malt.strategies.euler.pruning module.
+    This module is responsible for searching the parameters of decision trees
+    by fitting one tree and pruning it, instead of fitting one tree for every
+    set of parameters. A tree limited in depth or in the samples needed to
+    split grows the same nodes as the unlimited tree, until the limit turns
+    a node into a leaf.
+"""
+
+# External imports
+import numpy as np
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+# Parameters that can be searched by pruning.
+PRUNED_PARAMS = {'max_depth', 'min_samples_split'}
+
+# Marker of leaves in the arrays of sklearn trees.
+LEAF = -1
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def is_prunable(model, params_grid):
+    """ Whether a parameter search on model can be done by pruning.
+
+        Args:
+            model: sklearn Classifier or Regressor interface.
+            params_grid: list of dicts. Each entry a set of parameters for
+                the model.
+
+        Returns:
+            prunable: boolean. True for regression trees searched only over
+                PRUNED_PARAMS.
+    """
+    # Import late, live trading loads exported models without sklearn.
+    from sklearn import tree
+
+    prunable = isinstance(model, tree.DecisionTreeRegressor) and \
+            all(set(params) <= PRUNED_PARAMS for params in params_grid)
+
+    return prunable
+
+
+def get_full_params(params_grid):
+    """ Obtain the least limited parameters of the grid. The tree fit with
+        them contains the trees of all sets of parameters.
+
+        Args:
+            params_grid: list of dicts. Each entry a set of parameters, as
+                checked by is_prunable.
+
+        Returns:
+            full_params: dict. Parameters for fitting the full tree.
+    """
+    depths = [params.get('max_depth') for params in params_grid]
+    splits = [params.get('min_samples_split', 2) for params in params_grid]
+
+    full_params = {'min_samples_split': min(splits)}
+    full_params['max_depth'] = None if None in depths else max(depths)
+
+    return full_params
+
+
+def get_paths(fitted, X):
+    """ Find the nodes every sample passes from the root to its leaf.
+
+        Args:
+            fitted: sklearn tree. A fitted decision tree.
+            X: np.array of dim 2. Samples, one per row.
+
+        Returns:
+            paths: np.array of ints, of dim 2. One row per sample, with the
+                node at each depth. Rows of shallow leaves repeat the leaf.
+    """
+    nodes = fitted.tree_
+    left, right = nodes.children_left, nodes.children_right
+
+    # Trees compare the features as float32, the same as sklearn does.
+    X = np.asarray(X, dtype=np.float32)
+    rows = np.arange(X.shape[0])
+
+    paths = np.zeros((X.shape[0], fitted.get_depth() + 1), dtype=np.int64)
+    for depth in range(1, paths.shape[1]):
+        node = paths[:, depth - 1]
+        go_left = X[rows, nodes.feature[node]] <= nodes.threshold[node]
+        child = np.where(go_left, left[node], right[node])
+        paths[:, depth] = np.where(left[node] == LEAF, node, child)
+
+    return paths
+
+
+def get_depths(fitted):
+    """ Find the depth of every node of a tree.
+
+        Args:
+            fitted: sklearn tree. A fitted decision tree.
+
+        Returns:
+            depths: np.array of ints. Depth of every node, 0 for the root.
+    """
+    nodes = fitted.tree_
+    depths = np.zeros(nodes.node_count, dtype=np.int64)
+
+    # Parents always come before their children.
+    for node in range(nodes.node_count):
+        if nodes.children_left[node] != LEAF:
+            depths[nodes.children_left[node]] = depths[node] + 1
+            depths[nodes.children_right[node]] = depths[node] + 1
+
+    return depths
+
+
+def predict_pruned(fitted, paths, depths, max_depth=None, \
+        min_samples_split=2):
+    """ Predict as the tree fit with more limited parameters would.
+
+        Args:
+            fitted: sklearn tree. The tree fit with get_full_params.
+            paths: np.array of dim 2. As returned by get_paths.
+            depths: np.array of ints. As returned by get_depths.
+            max_depth: int or None. Maximum depth of the tree.
+            min_samples_split: int. Minimum number of samples to split a node.
+
+        Returns:
+            pred: np.array of dim 1. Prediction of every sample.
+    """
+    nodes = fitted.tree_
+
+    # A node is a leaf of the limited tree if one of the limits stops it.
+    stops = (nodes.children_left == LEAF) | \
+            (nodes.n_node_samples < min_samples_split)
+    if max_depth is not None:
+        stops |= depths >= max_depth
+
+    # Every path ends in a leaf, so a stop is always found.
+    first_stop = np.argmax(stops[paths], axis=1)
+    leaves = paths[np.arange(paths.shape[0]), first_stop]
+    pred = nodes.value[leaves, 0, 0]
+
+    return pred
+
+
+def predict_grid(model, train_set, train_val, test_set, params_grid):
+    """ Predict the test set with model trained with every set of parameters,
+        fitting only one tree.
+
+        Args:
+            model: sklearn DecisionTreeRegressor. As checked by is_prunable.
+            train_set: np.array of dim 2. Training samples, one per row.
+            train_val: np.array of dim 1. Training values.
+            test_set: np.array of dim 2. Test samples, one per row.
+            params_grid: list of dicts. Each entry a set of parameters for
+                the model.
+
+        Returns:
+            preds: list of np.arrays. Prediction of the test set for every
+                set of parameters.
+    """
+    from sklearn.base import clone
+
+    fitted = clone(model).set_params(**get_full_params(params_grid))
+    fitted.fit(train_set, train_val)
+
+    paths = get_paths(fitted, test_set)
+    depths = get_depths(fitted)
+    preds = [predict_pruned(fitted, paths, depths, **params) \
+            for params in params_grid]
+
+    return preds
@@ -0,0 +1,322 @@
+""" This is the malt.strategies.euler.selection module.
+    This module is responsible for selecting the best models and parameters
+    of strategy Euler. Every (instrument, model, model parameters) job is
+    independent, so the jobs are spread across a pool of processes. Jobs
+    found in a ledger for the same data are not run again.
+"""
+
+# External imports
+import numpy as np
+from concurrent import futures
+
+# Internal imports
+from malt import common
+from malt.strategies.euler import backtest, pruning, transformer, util
+from malt.strategies.euler.learner import Learner
+from malt.strategies.ledger import get_data_version, get_file_version
+
+# Datasets loaded by this process, by instrument.
+DATASETS = {}
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_dataset(instrument):
+    """ Load the learner and the test prices of the instrument, once per
+        process.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+
+        Returns:
+            dataset: tuple. The Learner and the test prices as returned by
+                transformer.read_raw_prices.
+    """
+    if instrument not in DATASETS:
+        test_file = common.get_raw_data(instrument)
+        test_prices = transformer.read_raw_prices(test_file, instrument)
+        learner = Learner(instrument, use_cache=True, \
+                window=common.TRAIN_WINDOW)
+        DATASETS[instrument] = (learner, test_prices)
+
+    dataset = DATASETS[instrument]
+
+    return dataset
+
+
+def get_tasks(instruments, prune=False):
+    """ Group the jobs of the model selection into tasks, each run by one
+        worker.
+
+        Args:
+            instruments: list of strings. The currency pairs.
+            prune: boolean. Whether the jobs of a model that can be searched
+                by pruning are run together, fitting one model for all.
+
+        Returns:
+            tasks: list of lists of tuples. Jobs of each task. Each job is
+                the instrument, the index of the model in
+                util.get_all_models and the index of the model parameters in
+                util.get_model_params.
+    """
+    tasks = []
+    for instrument in instruments:
+        for i, model in enumerate(util.get_all_models()):
+            params_grid = util.get_model_params(model)
+            jobs = [(instrument, i, j) for j in range(len(params_grid))]
+
+            if prune and pruning.is_prunable(model, params_grid):
+                tasks.append(jobs)
+            else:
+                tasks.extend([job] for job in jobs)
+
+    return tasks
+
+
+def get_job_key(job):
+    """ Describe the model and model parameters of a job, as in a ledger.
+
+        Args:
+            job: tuple. One job of a task returned by get_tasks.
+
+        Returns:
+            model_name: string. Name of the model.
+            model_param: dict. Parameters of the model.
+    """
+    model = util.get_all_models()[job[1]]
+    model_param = util.get_model_params(model)[job[2]]
+
+    return type(model).__name__, model_param
+
+
+def run_task(task, sample_rate=0.9, dataset=None, folds=1):
+    """ Run the jobs of a task. Jobs of the same model are run by pruning.
+
+        Args:
+            task: list of tuples. As returned by get_tasks.
+            sample_rate: float. Proportion of data used for the first
+                training set.
+            dataset: tuple or None. As returned by get_dataset. Loaded by
+                instrument if None.
+            folds: int. Number of walk-forward folds.
+
+        Returns:
+            outputs: list of tuples. Output of evaluate for each job.
+    """
+    if len(task) == 1:
+        return [evaluate(task[0], sample_rate, dataset, folds)]
+
+    instrument, model_index, _ = task[0]
+    learner, test_prices = dataset or get_dataset(instrument)
+
+    model = util.get_all_models()[model_index]
+    params_grid = util.get_model_params(model)
+    params_grid = [params_grid[job[2]] for job in task]
+    preds = learner.walk_forward_grid(model, folds, sample_rate, params_grid)
+
+    # Dry run all strategy parameters of each model parameters at once.
+    outputs = [backtest.run_grid(pred, test_prices[-pred.size:], \
+            util.get_euler_params()) for pred in preds]
+
+    return outputs
+
+
+def run_tasks(tasks, dataset=None, folds=1):
+    """ Run a batch of tasks of one instrument in a worker process, so that
+        a dataset given is sent once for all of them.
+
+        Args:
+            tasks: list of lists of tuples. Tasks returned by get_tasks, all
+                of the same instrument.
+            dataset: tuple or None. As in run_task.
+            folds: int. Number of walk-forward folds.
+
+        Returns:
+            outputs: list of lists of tuples. Output of run_task for each
+                task.
+    """
+    outputs = [run_task(task, dataset=dataset, folds=folds) for task in tasks]
+
+    return outputs
+
+
+def get_batches(tasks, workers):
+    """ Split the tasks into batches of one instrument, as many per
+        instrument as there are workers. Tasks of the same model are spread
+        across the batches to balance them.
+
+        Args:
+            tasks: list of lists of tuples. As returned by get_tasks.
+            workers: int. Number of processes.
+
+        Returns:
+            batches: list of lists of ints. Indices of the tasks of each
+                batch.
+    """
+    indices = {}
+    for index, task in enumerate(tasks):
+        indices.setdefault(task[0][0], []).append(index)
+
+    batches = []
+    for instrument_indices in indices.values():
+        count = min(workers, len(instrument_indices))
+        batches.extend(instrument_indices[i::count] for i in range(count))
+
+    return batches
+
+
+def get_version(instrument, datasets):
+    """ Identify the data the jobs of an instrument run on. Datasets given
+        are hashed, otherwise the files the workers load them from, without
+        parsing them.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+            datasets: dict. Instrument to the dataset as returned by
+                get_dataset, for the ones given.
+
+        Returns:
+            data_version: string. Hex digest identifying the data.
+    """
+    if instrument in datasets:
+        return get_data_version(*datasets[instrument])
+
+    data_version = get_file_version([util.get_clean_data(instrument), \
+            common.get_raw_data(instrument)], common.TRAIN_WINDOW)
+
+    return data_version
+
+
+def evaluate(job, sample_rate=0.9, dataset=None, folds=1):
+    """ Train one model with one set of model parameters and dry run it with
+        all strategy parameters.
+
+        Args:
+            job: tuple. One job of a task returned by get_tasks.
+            sample_rate: float. Proportion of data used for the first
+                training set.
+            dataset: tuple or None. As returned by get_dataset. Loaded by
+                instrument if None.
+            folds: int. Number of walk-forward folds. The data after the
+                first training set is predicted by models trained only on
+                the data before it.
+
+        Returns:
+            balances: np.array of dim 2. Balance of every strategy parameter
+                in util.get_euler_params, one per row.
+            scores: np.array of dim 1. Score of every strategy parameter.
+    """
+    instrument, model_index, param_index = job
+    learner, test_prices = dataset or get_dataset(instrument)
+
+    # Every fold builds a fresh model, never one shared with other jobs.
+    model = util.get_all_models()[model_index]
+    model_param = util.get_model_params(model)[param_index]
+    pred, _ = learner.walk_forward(model, folds, sample_rate, **model_param)
+
+    # Dry run all strategy parameters, e.g. threshold, at once.
+    prices = test_prices[-pred.size:]
+    balances, scores = backtest.run_grid(pred, prices, util.get_euler_params())
+
+    return balances, scores
+
+
+def select(instruments, workers=common.TRAIN_WORKERS, datasets=None, folds=1, \
+        prune=False, ledger=None, pool=None):
+    """ Run all jobs of the model selection for the instruments. The results
+        do not depend on the number of workers.
+
+        Args:
+            instruments: list of strings. The currency pairs.
+            workers: int. Number of processes. Run in this process if 1.
+            datasets: dict or None. Instrument to the dataset as returned by
+                get_dataset, used instead of loading it. Sent to the worker
+                processes along with the tasks.
+            folds: int. Number of walk-forward folds of each job.
+            prune: boolean. Whether to search decision trees by fitting one
+                tree and pruning it. The results are the same as fitting
+                every tree, apart from ties between equally good splits that
+                the trees break differently.
+            ledger: strategies.ledger.Ledger or None. Jobs stored in it for
+                the same data are loaded instead of run, the others are
+                stored once run.
+            pool: concurrent.futures.ProcessPoolExecutor or None. Processes
+                shared with other selections running at the same time. A
+                pool of workers processes is started if None.
+
+        Returns:
+            results: dict. Instrument to a dict, including:
+                scores: np.array of dim 3. Score of every model, model
+                    parameters and strategy parameters.
+                balances: list of np.arrays. Balances of every job, in the
+                    same order as scores.
+                best: tuple of ints. Indices of the highest score.
+    """
+    tasks = get_tasks(instruments, prune)
+    datasets = datasets or {}
+
+    # Find the tasks already run on the same data.
+    stored = {}
+    if ledger is not None:
+        euler_params = util.get_euler_params()
+        method = {'folds': folds, 'prune': prune}
+        versions = {x: get_version(x, datasets) for x in instruments}
+        for index, task in enumerate(tasks):
+            outputs = [ledger.load(job[0], versions[job[0]], method, \
+                    *get_job_key(job), euler_params) for job in task]
+            if all(output[0] is not None for output in outputs):
+                stored[index] = outputs
+    pending = [task for index, task in enumerate(tasks) if index not in stored]
+
+    # Keep the jobs of an instrument together so that each worker only
+    # loads a few datasets, and datasets given are sent once per batch.
+    if (pool is not None or workers > 1) and pending:
+        batches = get_batches(pending, workers)
+        own_pool = pool is None
+        pool = pool or futures.ProcessPoolExecutor(max_workers=workers)
+        try:
+            submitted = [pool.submit(run_tasks, [pending[i] for i in batch], \
+                    datasets.get(pending[batch[0]][0][0]), folds) \
+                    for batch in batches]
+            outputs = [None] * len(pending)
+            for batch, future in zip(batches, submitted):
+                for index, task_outputs in zip(batch, future.result()):
+                    outputs[index] = task_outputs
+        finally:
+            if own_pool:
+                pool.shutdown()
+    else:
+        outputs = [run_task(task, dataset=datasets.get(task[0][0]), \
+                folds=folds) for task in pending]
+
+    # Store the new ones.
+    if ledger is not None:
+        for task, task_outputs in zip(pending, outputs):
+            for job, (balances, scores) in zip(task, task_outputs):
+                ledger.store(job[0], versions[job[0]], method, \
+                        *get_job_key(job), euler_params, balances, scores)
+
+    # Every job in the order of the tasks.
+    outputs = iter(outputs)
+    outputs = [stored[index] if index in stored else next(outputs) \
+            for index in range(len(tasks))]
+    jobs = [job for task in tasks for job in task]
+    outputs = [output for task_outputs in outputs for output in task_outputs]
+
+    # Gather the results in the order of the jobs.
+    results = {}
+    for instrument in instruments:
+        outcome = [(job, output) for job, output in zip(jobs, outputs) \
+                if job[0] == instrument]
+
+        scores = [[output[1] for job, output in outcome if job[1] == i] \
+                for i in range(len(util.get_all_models()))]
+        scores = np.array(scores)
+
+        results[instrument] = {
+            'scores': scores,
+            'balances': [output[0] for _, output in outcome],
+            'best': np.unravel_index(np.argmax(scores), scores.shape)}
+
+    return results
@@ -0,0 +1,102 @@
+""" This is the malt.strategies.euler.test.test_backtest module.
+    This module is responsible for testing malt.strategies.euler.backtest.
+"""
+
+# External imports
+import unittest
+import numpy as np
+
+# Internal imports
+from malt import common
+from malt.strategies.euler import backtest, transformer, util
+
+#===============================================================================
+# Classes:
+#===============================================================================
+
+class TestBacktest(unittest.TestCase):
+    """ Class for testing backtest."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        self.tmp_raw_file = "{0}/GBP_USD_test_raw.csv".format(test_dir)
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        pass
+
+
+    def test_get_units(self):
+        """ Test the units of every unit shape."""
+        pred = np.array([-700, -120.5, -30, 0, 50, 99.9, 180])
+
+        units = backtest.get_units(pred, 50, common.UNIT_CONSTANT)
+        self.assertEqual(units.tolist(), [-200, -200, 0, 0, 0, 200, 200])
+
+        units = backtest.get_units(pred, 50, common.UNIT_LINEAR)
+        self.assertEqual(units.tolist(), [-500, -120, 0, 0, 0, 99, 180])
+
+        units = backtest.get_units(pred, 50, common.UNIT_SQUARE)
+        self.assertEqual(units.tolist(), [-500, -500, 0, 0, 0, 499, 500])
+
+        units = backtest.get_units(pred, 50, common.UNIT_LOG)
+        self.assertEqual(units.tolist(), [-247, -180, 0, 0, 0, 173, 196])
+
+        return
+
+
+    def test_profit_loss(self):
+        """ Test the profit/loss is the same as going day by day."""
+        raw_data = transformer.read_raw_file(self.tmp_raw_file)
+        prices = transformer.rows_to_prices(raw_data)
+
+        # Buy, sell or nothing at random, with or without stop loss.
+        units = np.random.RandomState(888).randint(-3, 4, len(raw_data)) * 100
+        for controls in [{}, {'stop_loss': 1.8}, {'trailing_stop': 15}]:
+            stop_loss_price = backtest.get_stop_loss_price(controls)
+            profit_loss = backtest.get_profit_loss(prices, units, \
+                    stop_loss_price)
+            expected = [util.get_profit_loss(row, int(unit), **controls) \
+                    for row, unit in zip(raw_data, units)]
+            self.assertEqual(profit_loss.tolist(), expected)
+
+        # The balance accumulates the profit/loss.
+        pred = np.linspace(-300, 300, len(raw_data))
+        _, profit_loss, balance = backtest.run(pred, prices, threshold=60, \
+                unit_shape=common.UNIT_LINEAR)
+        self.assertEqual(balance.size, len(raw_data))
+        self.assertEqual(balance[-1], np.cumsum(profit_loss)[-1])
+
+        return
+
+
+    def test_run_grid(self):
+        """ Test the grid gives the same as running each set on its own."""
+        raw_data = transformer.read_raw_file(self.tmp_raw_file)
+        prices = transformer.rows_to_prices(raw_data)
+        pred = np.random.RandomState(888).normal(0, 100, len(raw_data))
+
+        params_grid = util.get_euler_params() + [{'threshold': 20, \
+                'unit_shape': common.UNIT_SQUARE, 'stop_loss': 1.8}]
+        balances, scores = backtest.run_grid(pred, prices, params_grid)
+        self.assertEqual(balances.shape, (17, len(raw_data)))
+
+        for i, params in enumerate(params_grid):
+            _, _, balance = backtest.run(pred, prices, **params)
+            self.assertEqual(balances[i].tolist(), balance.tolist())
+            self.assertEqual(scores[i], util.get_strategy_score(balance))
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
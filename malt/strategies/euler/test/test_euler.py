@@ -43,7 +43,7 @@ class TestEuler(unittest.TestCase):
 
         # Initialize learner and force load test data.
         learner = Learner("GBP_USD")
-        learner.data_mat = base.read_features(self.tmp_clean_file)
+        learner.data_mat = base.load_features(self.tmp_clean_file)
 
         # Build model and test preliminary results.
         learner.build_model(model, 0.78)
@@ -66,6 +66,23 @@ class TestEuler(unittest.TestCase):
         return
 
 
+    def test_live_mode(self):
+        """ Test live strategies don't read historical data."""
+        strategy = euler.Euler("GBP_USD", common.MODE_LIVE)
+        with self.assertRaises(RuntimeError):
+            strategy.learner
+        with self.assertRaises(RuntimeError):
+            strategy.test_data
+
+        # Backtest strategies read it on first use, once per process.
+        strategy = euler.Euler("GBP_USD")
+        other = euler.Euler("GBP_USD")
+        self.assertIs(strategy.test_data, other.test_data)
+        self.assertEqual(len(strategy.test_prices), len(strategy.test_data))
+
+        return
+
+
 #===============================================================================
 #   Functions:
 #===============================================================================
@@ -0,0 +1,82 @@
+""" This is the malt.strategies.euler.test.test_incremental module.
+    This module is responsible for testing malt.strategies.euler.incremental.
+"""
+
+# External imports
+import datetime
+import unittest
+from sklearn import tree
+
+# Internal imports
+from malt import common
+from malt.strategies import base
+from malt.strategies.euler import euler, incremental
+
+#===============================================================================
+# Classes:
+#===============================================================================
+
+class TestIncremental(unittest.TestCase):
+    """ Class for testing incremental."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        self.tmp_clean_file = "{0}/GBP_USD_test_clean.csv".format(test_dir)
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        pass
+
+
+    def test_needs_retrain(self):
+        """ Test strategies are trained again only when old or drifting."""
+        # Initialize Euler and force load test data.
+        strategy = euler.Euler("GBP_USD")
+        strategy.learner.data_mat = base.load_features(self.tmp_clean_file)
+        strategy.learner.row_count = strategy.learner.data_mat.shape[0]
+
+        # Train on all but the last 100 days.
+        model = tree.DecisionTreeRegressor(max_depth=4, random_state=888)
+        data_mat = strategy.learner.data_mat
+        strategy.model = model.fit(data_mat[:-100, :-1], data_mat[:-100, -1])
+        strategy.set_params(threshold=60, unit_shape=common.UNIT_LINEAR)
+        self.assertEqual(incremental.needs_retrain(strategy), \
+                'no training state')
+
+        today = datetime.date(2017, 3, 1)
+        incremental.set_trained(strategy, today)
+        strategy.params['trained_rows'] -= 100
+        self.assertEqual(incremental.get_rows_since(strategy, \
+                strategy.params['trained_rows']).shape[0], 100)
+
+        # Predicting well enough on the new days.
+        days, prop_op = incremental.get_drift(strategy)
+        self.assertEqual(days, 100)
+        self.assertLess(prop_op, common.DRIFT_THRESHOLD)
+        self.assertIsNone(incremental.needs_retrain(strategy, today))
+
+        # Too old.
+        later = today + datetime.timedelta(common.MAX_MODEL_AGE + 1)
+        self.assertEqual(incremental.needs_retrain(strategy, later), \
+                'trained on 2017-03-01')
+
+        # Drifting, always predicting the wrong direction.
+        model = tree.DecisionTreeRegressor(random_state=888)
+        strategy.model = model.fit(data_mat[-100:, :-1], -data_mat[-100:, -1])
+        self.assertTrue(incremental.needs_retrain(strategy, today) \
+                .startswith('wrong on'))
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
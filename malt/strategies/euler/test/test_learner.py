@@ -38,7 +38,7 @@ class TestLearner(unittest.TestCase):
 
         # Initialize learner and force load test data.
         learner = Learner("GBP_USD")
-        learner.data_mat = base.read_features(self.tmp_file)
+        learner.data_mat = base.load_features(self.tmp_file)
 
         # Build model and test preliminary results.
         learner.build_model(model, 0.78)
@@ -56,6 +56,45 @@ class TestLearner(unittest.TestCase):
         return
 
 
+    def test_walk_forward(self):
+        """ Test the walk-forward folds and predictions."""
+        model = tree.DecisionTreeRegressor(random_state=888)
+
+        # Initialize learner and force load test data.
+        learner = Learner("GBP_USD")
+        learner.data_mat = base.load_features(self.tmp_file)
+        size = learner.data_mat.shape[0]
+
+        # The test sets follow each other up to the end.
+        folds = learner.get_folds(4, 0.78)
+        self.assertEqual(folds[0][1].start, int(size * 0.78))
+        self.assertEqual(folds[-1][1].stop, size)
+        for train, test in folds:
+            self.assertEqual(train.start, 0)
+            self.assertEqual(train.stop, test.start)
+
+        # Sliding training sets have the same size.
+        folds = learner.get_folds(4, 0.78, window=500)
+        self.assertEqual([x.stop - x.start for x, _ in folds], [500] * 4)
+
+        # One fold is the same as building and testing the model.
+        pred, result = learner.walk_forward(model, 1, 0.78)
+        learner.build_model(model, 0.78)
+        expected, expected_result = learner.test_model(model)
+        self.assertEqual(pred.tolist(), expected.tolist())
+        self.assertEqual(result, expected_result)
+
+        # Parallel folds give the same predictions.
+        pred, result = learner.walk_forward(model, 4, 0.78, max_depth=5)
+        self.assertEqual(pred.size, 628)
+        self.assertEqual(learner.sample_index, size - 628)
+        pred_par, _ = learner.walk_forward(model, 4, 0.78, workers=4, \
+                max_depth=5)
+        self.assertEqual(pred.tolist(), pred_par.tolist())
+
+        return
+
+
 #===============================================================================
 #   Functions:
 #===============================================================================
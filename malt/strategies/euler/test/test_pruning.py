@@ -0,0 +1,78 @@
+""" This is the malt.strategies.euler.test.test_pruning module.
+    This module is responsible for testing malt.strategies.euler.pruning.
+"""
+
+# External imports
+import unittest
+import numpy as np
+from sklearn import tree
+
+# Internal imports
+from malt.strategies.euler import pruning
+
+#===============================================================================
+# Classes:
+#===============================================================================
+
+class TestPruning(unittest.TestCase):
+    """ Class for testing pruning."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        pass
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        pass
+
+
+    def test_get_full_params(self):
+        """ Test the full tree is the least limited of the grid."""
+        params_grid = [{'max_depth': x, 'min_samples_split': y} \
+                for x in [4, 8] for y in [6, 10]]
+        self.assertEqual(pruning.get_full_params(params_grid), \
+                {'max_depth': 8, 'min_samples_split': 6})
+
+        params_grid.append({'max_depth': None})
+        self.assertEqual(pruning.get_full_params(params_grid), \
+                {'max_depth': None, 'min_samples_split': 2})
+
+        model = tree.DecisionTreeRegressor()
+        self.assertTrue(pruning.is_prunable(model, params_grid))
+        self.assertFalse(pruning.is_prunable(model, [{'max_features': 3}]))
+
+        return
+
+
+    def test_predict_grid(self):
+        """ Test pruning predicts the same as fitting every tree."""
+        random = np.random.RandomState(888)
+        train_set = random.normal(size=(500, 7))
+        train_val = 3 * train_set[:, 0] + np.sin(2 * train_set[:, 1]) + \
+                random.normal(size=500)
+        test_set = random.normal(size=(200, 7))
+
+        # Big nodes only, so no two splits are equally good.
+        params_grid = [{'max_depth': x, 'min_samples_split': y} \
+                for x in [2, 3, 4] for y in [10, 40, 80]]
+        model = tree.DecisionTreeRegressor(random_state=888)
+        preds = pruning.predict_grid(model, train_set, train_val, test_set, \
+                params_grid)
+
+        self.assertEqual(len(preds), len(params_grid))
+        for pred, params in zip(preds, params_grid):
+            model = tree.DecisionTreeRegressor(random_state=888, **params)
+            expected = model.fit(train_set, train_val).predict(test_set)
+            self.assertTrue(np.allclose(pred, expected, rtol=0, atol=1e-12))
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+""" This is the malt.strategies.euler.test.test_selection module.
+    This module is responsible for testing malt.strategies.euler.selection.
+"""
+
+# External imports
+import unittest
+import numpy as np
+
+# Internal imports
+from malt import common
+from malt.strategies import base, ledger
+from malt.strategies.euler import selection, transformer, util
+from malt.strategies.euler.learner import Learner
+
+#===============================================================================
+# Classes:
+#===============================================================================
+
+class TestSelection(unittest.TestCase):
+    """ Class for testing selection."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        self.tmp_raw_file = "{0}/GBP_USD_test_raw.csv".format(test_dir)
+        self.tmp_clean_file = "{0}/GBP_USD_test_clean.csv".format(test_dir)
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        pass
+
+
+    def test_select(self):
+        """ Test the selection gives the results of every job in order."""
+        # Initialize learner and force load test data.
+        learner = Learner("GBP_USD")
+        learner.data_mat = base.load_features(self.tmp_clean_file)
+        test_prices = transformer.read_raw_prices(self.tmp_raw_file)
+        datasets = {"GBP_USD": (learner, test_prices)}
+
+        results = selection.select(["GBP_USD"], 1, datasets)
+        result = results["GBP_USD"]
+
+        # One score for every model, model parameters and strategy parameters.
+        model = util.get_all_models()[0]
+        shape = (1, len(util.get_model_params(model)), \
+                len(util.get_euler_params()))
+        self.assertEqual(result['scores'].shape, shape)
+        self.assertEqual(len(result['balances']), shape[1])
+        self.assertEqual(result['scores'][result['best']], \
+                result['scores'].max())
+
+        # Each job gives the same again, the models are seeded.
+        for job in [("GBP_USD", 0, 0), ("GBP_USD", 0, shape[1] - 1)]:
+            balances, scores = selection.evaluate(job, \
+                    dataset=datasets["GBP_USD"])
+            self.assertTrue(np.array_equal(balances, \
+                    result['balances'][job[2]]))
+            self.assertTrue(np.array_equal(scores, result['scores'][job[1:]]))
+
+        # Pruning gives one result for every job as well.
+        results = selection.select(["GBP_USD"], 1, datasets, prune=True)
+        self.assertEqual(results["GBP_USD"]['scores'].shape, shape)
+        self.assertEqual(len(results["GBP_USD"]['balances']), shape[1])
+
+        return
+
+
+    def test_select_workers(self):
+        """ Test the datasets given are used by the worker processes too."""
+        learner = Learner("GBP_USD")
+        learner.data_mat = base.load_features(self.tmp_clean_file)[:-300]
+        test_prices = transformer.read_raw_prices(self.tmp_raw_file)[:-300]
+        datasets = {"GBP_USD": (learner, test_prices)}
+
+        results = selection.select(["GBP_USD"], 1, datasets, prune=True)
+        parallel = selection.select(["GBP_USD"], 2, datasets, prune=True)
+
+        self.assertTrue(np.array_equal(parallel["GBP_USD"]['scores'], \
+                results["GBP_USD"]['scores']))
+
+        return
+
+
+    def test_get_batches(self):
+        """ Test batches are of one instrument, at most one per worker."""
+        tasks = selection.get_tasks(["GBP_USD", "EUR_USD"])
+        batches = selection.get_batches(tasks, 3)
+
+        self.assertEqual(len(batches), 6)
+        self.assertEqual(sorted(i for batch in batches for i in batch), \
+                list(range(len(tasks))))
+        for batch in batches:
+            self.assertEqual(len({tasks[i][0][0] for i in batch}), 1)
+
+        return
+
+
+    def test_select_ledger(self):
+        """ Test jobs stored in the ledger for the same data are not run."""
+        learner = Learner("GBP_USD")
+        learner.data_mat = base.load_features(self.tmp_clean_file)
+        test_prices = transformer.read_raw_prices(self.tmp_raw_file)
+        datasets = {"GBP_USD": (learner, test_prices)}
+
+        evaluations = ledger.Ledger(':memory:')
+        results = selection.select(["GBP_USD"], 1, datasets, \
+                ledger=evaluations)
+
+        # Nothing is run again.
+        run_task = selection.run_task
+        selection.run_task = None
+        try:
+            stored = selection.select(["GBP_USD"], 1, datasets, \
+                    ledger=evaluations)
+        finally:
+            selection.run_task = run_task
+        evaluations.close()
+
+        self.assertTrue(np.array_equal(stored["GBP_USD"]['scores'], \
+                results["GBP_USD"]['scores']))
+        for balances, stored_balances in zip(results["GBP_USD"]['balances'], \
+                stored["GBP_USD"]['balances']):
+            self.assertTrue(np.array_equal(balances, stored_balances))
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
@@ -62,6 +62,31 @@ class TestTransformer(unittest.TestCase):
         return
 
 
+    def test_vectorized_transformation(self):
+        """ Test the whole file transform is the same as row by row."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        in_file = "{0}/GBP_USD_test_raw.csv".format(test_dir)
+        transformer.transform(in_file, self.tmp_file, 10000)
+
+        # Transform row by row.
+        raw_data = transformer.read_raw_file(in_file)
+        expected = [' '.join(transformer.transform_row(raw_data[i], \
+                raw_data[i + 1], 10000)) for i in range(len(raw_data) - 1)]
+
+        with open(self.tmp_file, 'rb') as tmp_handle:
+            content = tmp_handle.read().decode()
+
+        self.assertEqual(content, '\r\n'.join(expected) + '\r\n')
+
+        # The numeric data is the same as the formatted one.
+        prices = transformer.read_raw_prices(in_file)
+        data = transformer.transform_prices(prices, 10000)
+        expected = [common.list_to_float(row.split(' ')) for row in expected]
+        self.assertEqual(data.tolist(), expected)
+
+        return
+
+
 #===============================================================================
 #   Functions:
 #===============================================================================
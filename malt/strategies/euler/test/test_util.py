@@ -56,6 +56,12 @@ class TestUtil(unittest.TestCase):
         # Check the calculation.
         self.assertEqual(price_change, '60.7')
 
+        # Numeric as well.
+        prices = np.array([common.list_to_float(row[1:-1])] * 2)
+        prices[1, 3] = 1.26
+        price_changes = util.get_price_changes(prices, 10000)
+        self.assertEqual(price_changes.tolist(), [60.7, 0.0])
+
         return
 
 
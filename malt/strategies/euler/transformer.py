@@ -4,10 +4,11 @@
 """
 
 # External imports
-import csv
+import numpy as np
 
 # Internal imports
 from malt import common
+from malt.data import columnar
 from malt.strategies.euler import util
 
 #===============================================================================
@@ -57,21 +58,31 @@ def candle_to_features(candle, pip_factor):
     return features
 
 
-def read_raw_file(input_file):
-    """ Read the raw input file to a list.
+def read_raw_file(input_file, instrument=None):
+    """ Read the raw input file to a list. The columnar store of the
+        instrument is used instead of parsing the file if it is up to date.
 
         Args:
             input_file: string. Location of the input raw data file.
+            instrument: string or None. The currency pair of the file, whose
+                columnar store may be used. e.g. 'EUR_USD'.
 
         Returns:
             data: list of list of Strings. Each entry is a daily candle.
                 Within a daily candle, it's date, OHLC of bidAsk and volume.
     """
-    with open(input_file, 'r') as input_handle:
-        # First line is header and last line is empty.
-        data = input_handle.read().split('\n')[1:-1]
+    columns = None
+    if instrument is not None:
+        columns = columnar.load_current(instrument, input_file)
 
-    data = [x.split(' ') for x in data]
+    if columns is not None:
+        data = columnar.get_rows(columns)
+    else:
+        with open(input_file, 'r') as input_handle:
+            # First line is header and last line is empty.
+            data = input_handle.read().split('\n')[1:-1]
+
+        data = [x.split(' ') for x in data]
 
     # Check validity of data since reading from file.
     # Last entry should be volume and should be large. The 200 is arbitrary.
@@ -80,6 +91,107 @@ def read_raw_file(input_file):
     return data
 
 
+def read_raw_prices(input_file, instrument=None):
+    """ Read the prices of the raw input file to an array. The columnar
+        store of the instrument is used instead of parsing the file if it is
+        up to date.
+
+        Args:
+            input_file: string. Location of the input raw data file.
+            instrument: string or None. The currency pair of the file, whose
+                columnar store may be used. e.g. 'EUR_USD'.
+
+        Returns:
+            prices: np.array of dim 2. One row per daily candle with openBid,
+                highBid, lowBid, closeBid, openAsk, highAsk, lowAsk and
+                closeAsk.
+    """
+    columns = None
+    if instrument is not None:
+        columns = columnar.load_current(instrument, input_file)
+
+    if columns is not None:
+        return columnar.get_prices(columns)
+
+    # First line is header. Skip date and volume.
+    prices = np.loadtxt(input_file, skiprows=1, usecols=range(1, 9), ndmin=2)
+
+    return prices
+
+
+def rows_to_prices(rows):
+    """ Convert rows read by read_raw_file to an array of prices.
+
+        Args:
+            rows: list of list of Strings. Each entry is a daily candle.
+
+        Returns:
+            prices: np.array of dim 2. Same as in read_raw_prices.
+    """
+    prices = np.array([row[1:-1] for row in rows], dtype=float)
+    prices = prices.reshape(-1, len(common.CANDLE_FEATURES) - 2)
+
+    return prices
+
+
+def candle_to_prices(candle):
+    """ Return the prices of a candle as a row of read_raw_prices.
+
+        Args:
+            candle: dict. A dictionary representing information in a candle.
+
+        Returns:
+            prices: np.array of dim 2. A single row of prices.
+    """
+    prices = np.array([[candle.get(field) \
+        for field in common.CANDLE_FEATURES[1:-1]]], dtype=float)
+
+    return prices
+
+
+def get_features(prices, pip_factor, rounded=True):
+    """ Vectorized and numeric list_to_features over many days.
+
+        Args:
+            prices: np.array of dim 2. Prices as returned by read_raw_prices.
+            pip_factor: int. The multiplier for calculating pip from price.
+            rounded: boolean. Whether to round to 1 decimal place in pips.
+
+        Returns:
+            features: np.array of dim 2. One row per day with highBid, lowBid,
+                closeBid, openAsk, highAsk, lowAsk and closeAsk.
+                All relative to openBid, and in pips.
+    """
+    diff = prices[:, 1:] - prices[:, :1]
+
+    if rounded:
+        features = common.prices_to_pips(diff, pip_factor)
+    else:
+        features = diff * pip_factor
+
+    return features
+
+
+def transform_prices(prices, pip_factor, rounded=True):
+    """ Vectorized and numeric transform_row over all days.
+
+        Args:
+            prices: np.array of dim 2. Prices as returned by read_raw_prices.
+            pip_factor: int. The multiplier for calculating pip from price.
+            rounded: boolean. Whether to round to 1 decimal place in pips.
+
+        Returns:
+            data: np.array of dim 2. One row less than prices. Each row has
+                the 7 features in pips followed by the target of the next day.
+    """
+    features = get_features(prices[:-1], pip_factor, rounded)
+    target = util.get_price_changes(prices[1:], pip_factor, rounded)
+
+    data = np.column_stack((features, target))
+
+    return data
+
+
 def transform_row(row, next_row, pip_factor):
     """ Return the transformed row with features and target variable.
 
@@ -100,7 +212,7 @@ def transform_row(row, next_row, pip_factor):
     return data_point
 
 
-def transform(input_file, output_file, pip_factor):
+def transform(input_file, output_file, pip_factor, instrument=None):
     """ Normalize daily candles.
         Features are:
             highBid, lowBid, closeBid, openAsk, highAsk,lowAsk,
@@ -117,20 +229,55 @@ def transform(input_file, output_file, pip_factor):
             output_file: string. Name of the normalized file, should be under
                 ./store.
             pip_factor: int. The multiplier for calculating pip from price.
+            instrument: string or None. The currency pair, whose columnar
+                store is read instead of the file if up to date.
 
         Returns:
             void.
     """
-    # Read the raw data and format.
-    raw_data = read_raw_file(input_file)
+    # Read the raw data and build the features and target variable at once.
+    # Leave the rounding to the formatting, like price_to_pip does.
+    prices = read_raw_prices(input_file, instrument)
+    data = transform_prices(prices, pip_factor, rounded=False)
 
-    # Go through each line, build the features and targe variable.
+    # Same format as writing transform_row through a csv.writer.
     with open(output_file, 'w') as output_handle:
-        writer = csv.writer(output_handle, delimiter=' ')
+        np.savetxt(output_handle, data, fmt='%.1f', delimiter=' ', \
+                newline='\r\n')
+
+    return
+
+
+def get_output_file(instrument):
+    """ Obtain the location of the transformed data of the instrument.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+
+        Returns:
+            out_file: string. Path to the transformed data file.
+    """
+    out_file = util.get_clean_data(instrument)
+
+    return out_file
 
-        for i in range(len(raw_data) - 1):
-            row = transform_row(raw_data[i], raw_data[i + 1], pip_factor)
-            writer.writerow(row)
+
+def transform_instrument(instrument):
+    """ Transform the raw daily candles of one instrument.
+
+        Args:
+            instrument: string. The currency pair. e.g. 'EUR_USD'.
+
+        Returns:
+            void.
+    """
+    # Gather necessary data.
+    in_file = common.get_raw_data(instrument)
+    out_file = get_output_file(instrument)
+    pip_factor = common.get_pip_factor(instrument)
+
+    # Transform.
+    transform(in_file, out_file, pip_factor, instrument)
 
     return
 
@@ -138,13 +285,7 @@ def transform(input_file, output_file, pip_factor):
 def main():
     """ Main in transforming data for strategy Euler."""
     for instrument in common.ALL_PAIRS:
-        # Gather necessary data.
-        in_file = common.get_raw_data(instrument)
-        out_file = util.get_clean_data(instrument)
-        pip_factor = common.get_pip_factor(instrument)
-
-        # Transform.
-        transform(in_file, out_file, pip_factor)
+        transform_instrument(instrument)
 
     return
 
@@ -5,7 +5,7 @@
 """
 
 # External imports
-from sklearn import tree
+import numpy as np
 
 # Internal imports
 from malt import common
@@ -17,6 +17,9 @@ from malt import common
 BIG_RISE = 1
 BIG_FALL = -1
 
+# Seed of the models, so that training gives the same models every time.
+RANDOM_STATE = 888
+
 
 #===============================================================================
 #   Functions:
@@ -31,7 +34,10 @@ def get_all_models():
         Returns:
             all_models: set. A set of bare-bone predictive models.
     """
-    all_models = [tree.DecisionTreeRegressor()]
+    # Import late, live trading loads exported models without sklearn.
+    from sklearn import tree
+
+    all_models = [tree.DecisionTreeRegressor(random_state=RANDOM_STATE)]
 
     return all_models
 
@@ -45,6 +51,8 @@ def get_model_params(model):
         Returns:
             params: list of dicts. Each entry a set of parameters for the model.
     """
+    from sklearn import tree
+
     if isinstance(model, tree.tree.BaseDecisionTree):
         # Params for tree models.
         params = [{'max_depth': x, 'min_samples_split': y} \
@@ -158,27 +166,49 @@ def get_price_change(row, pip_factor):
         Otherwise do nothing. Return 0.
 
         Args:
-            row: list of Strings. A row from data file in /data/store/
+            row: list. A row of the raw data file with the date, the prices
+                and the volume. Prices as strings, as read by
+                transformer.read_raw_file, or as numbers, e.g. from the
+                columnar store.
             pip_factor: int. The multiplier for calculating pip from price.
 
         Returns:
             price_change: string. Profitable price change for the day in pips,
                 formatted to 1 decimal place.
     """
-    row = common.list_to_float(row[1:-1])
-
-    if row[3] - row[4] > 0:
-        diff = row[3] - row[4]
-    elif row[7] - row[0] < 0:
-        diff = row[7] - row[0]
-    else:
-        diff = 0
+    prices = np.asarray(row[1:-1], dtype=np.float64).reshape(1, -1)
+    diff = get_price_changes(prices, 1, rounded=False)[0]
 
     price_change = common.price_to_pip(diff, pip_factor)
 
     return price_change
 
 
+def get_price_changes(prices, pip_factor, rounded=True):
+    """ Vectorized and numeric get_price_change over many days.
+
+        Args:
+            prices: np.array of dim 2. One row per day with openBid, highBid,
+                lowBid, closeBid, openAsk, highAsk, lowAsk and closeAsk.
+            pip_factor: int. The multiplier for calculating pip from price.
+            rounded: boolean. Whether to round to 1 decimal place in pips.
+
+        Returns:
+            price_changes: np.array of dim 1. Profitable price change of each
+                day in pips.
+    """
+    rise = prices[:, 3] - prices[:, 4]
+    fall = prices[:, 7] - prices[:, 0]
+    diff = np.where(rise > 0, rise, np.where(fall < 0, fall, 0.0))
+
+    if rounded:
+        price_changes = common.prices_to_pips(diff, pip_factor)
+    else:
+        price_changes = diff * pip_factor
+
+    return price_changes
+
+
 def get_strategy_score(balance):
     """ Calculate a score for a strategy if these were the account balances
         for a period of time.
@@ -204,7 +234,7 @@ def format_row(date, units, predicted, actual, profit_loss):
             units: signed int. Number of units for trade.
                 Positive for buy. Negative for sell.
             predicted: float. Predicted price change.
-            actual: float. Actual price change.
+            actual: float. Actual price change in pips.
             profit_loss: float. Profit or loss of the day.
 
         Returns:
@@ -218,7 +248,7 @@ def format_row(date, units, predicted, actual, profit_loss):
     else:
         words = "Sold {0} units".format(-units)
 
-    row = "{0}. {1}. Predicted: {2: >6}  Actual: {3: >6} PL: {4}.\n". \
+    row = "{0}. {1}. Predicted: {2: >6}  Actual: {3: >6.1f} PL: {4}.\n". \
            format(date, words, predicted, actual, profit_loss)
 
     return row
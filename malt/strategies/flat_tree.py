@@ -0,0 +1,188 @@
+""" This is the malt.strategies.flat_tree module.
+    This module is responsible for exporting trained decision trees as flat
+    arrays, and predicting with them using NumPy only. Live trading loads and
+    runs the exported trees without importing sklearn.
+"""
+
+# External imports
+import os
+import numpy as np
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+# Marker of leaves in the children arrays.
+LEAF = -1
+
+# Arrays describing a tree, one entry per node. They are saved as the
+# columns of one float64 array, which holds the node indices exactly.
+FIELDS = ['feature', 'threshold', 'children_left', 'children_right', 'value']
+INT_FIELDS = ['feature', 'children_left', 'children_right']
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class FlatTree():
+    """ Class responsible for predicting with a regression tree stored as
+        flat arrays.
+    """
+
+    def __init__(self, feature, threshold, children_left, children_right, \
+            value):
+        """ Initialize the FlatTree class.
+
+            Args:
+                feature: np.array of ints. Feature compared at each node.
+                threshold: np.array of floats. Samples with the feature at
+                    most the threshold go to the left child.
+                children_left: np.array of ints. Left child of each node,
+                    LEAF for leaves.
+                children_right: np.array of ints. Right child of each node,
+                    LEAF for leaves.
+                value: np.array of floats. Prediction of each node.
+
+            Returns:
+                void.
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+
+        return
+
+
+    def __repr__(self):
+        """ Describe the tree for logging."""
+        return 'FlatTree(nodes={0})'.format(self.value.size)
+
+
+    @classmethod
+    def from_model(cls, model):
+        """ Export a fitted sklearn regression tree.
+
+            Args:
+                model: sklearn DecisionTreeRegressor. A fitted tree.
+
+            Returns:
+                flat_tree: FlatTree. Predicting the same as model.
+        """
+        nodes = model.tree_
+        flat_tree = cls(nodes.feature.astype(np.int64), \
+                nodes.threshold.astype(np.float64), \
+                nodes.children_left.astype(np.int64), \
+                nodes.children_right.astype(np.int64), \
+                nodes.value[:, 0, 0].astype(np.float64))
+
+        return flat_tree
+
+
+    @classmethod
+    def load(cls, path):
+        """ Load a tree saved by save.
+
+            Args:
+                path: string. Location of the .npy file.
+
+            Returns:
+                flat_tree: FlatTree. The loaded tree.
+        """
+        columns = np.load(path)
+        arrays = [columns[:, i].astype(np.int64) if field in INT_FIELDS \
+                else columns[:, i] for i, field in enumerate(FIELDS)]
+        flat_tree = cls(*arrays)
+
+        return flat_tree
+
+
+    def save(self, path):
+        """ Save the tree as a .npy file, replacing it atomically.
+
+            Args:
+                path: string. Location of the .npy file.
+
+            Returns:
+                void.
+        """
+        columns = np.column_stack([getattr(self, x) for x in FIELDS])
+        with open(path + '.tmp', 'wb') as out_handle:
+            np.save(out_handle, columns.astype(np.float64))
+        os.replace(path + '.tmp', path)
+
+        return
+
+
+    def predict(self, X):
+        """ Predict many samples at once, one tree level at a time.
+
+            Args:
+                X: np.array of dim 2. Samples, one per row.
+
+            Returns:
+                pred: np.array of dim 1. Prediction of every sample.
+        """
+        # Trees compare the features as float32, the same as sklearn does.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])
+        nodes = np.zeros(X.shape[0], dtype=np.int64)
+        inner = self.children_left[nodes] != LEAF
+        while inner.any():
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            child = np.where(go_left, self.children_left[nodes], \
+                    self.children_right[nodes])
+            nodes = np.where(inner, child, nodes)
+            inner = self.children_left[nodes] != LEAF
+
+        pred = self.value[nodes]
+
+        return pred
+
+
+    def predict_row(self, row):
+        """ Predict a single sample, walking down the tree.
+
+            Args:
+                row: np.array of dim 1. Features of the sample.
+
+            Returns:
+                pred: float. Prediction of the sample.
+        """
+        row = np.asarray(row, dtype=np.float32).ravel()
+
+        node = 0
+        while self.children_left[node] != LEAF:
+            if row[self.feature[node]] <= self.threshold[node]:
+                node = self.children_left[node]
+            else:
+                node = self.children_right[node]
+
+        pred = float(self.value[node])
+
+        return pred
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def is_exportable(model):
+    """ Whether a model can be exported as a FlatTree.
+
+        Args:
+            model: sklearn Classifier or Regressor interface.
+
+        Returns:
+            exportable: boolean. True for fitted single-output regression
+                trees.
+    """
+    nodes = getattr(model, 'tree_', None)
+    exportable = nodes is not None and nodes.value.shape[1:] == (1, 1) and \
+            type(model).__name__.endswith('Regressor')
+
+    return exportable
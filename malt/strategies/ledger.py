@@ -0,0 +1,242 @@
+""" This is the malt.strategies.ledger module.
+    This module is responsible for keeping every evaluation of the model
+    selection in a SQLite database: the score and balance of each model,
+    model parameters and strategy parameters. Evaluations are keyed by a
+    version of the data they ran on, so that the ones already done are not
+    run again, and scores can be compared across days.
+"""
+
+# External imports
+import datetime
+import hashlib
+import json
+import sqlite3
+import numpy as np
+
+# Internal imports
+from malt import common
+from malt.strategies.base import get_file_hash
+
+#===============================================================================
+#   Constants:
+#===============================================================================
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS evaluations (
+        instrument TEXT NOT NULL,
+        data_version TEXT NOT NULL,
+        method TEXT NOT NULL,
+        model TEXT NOT NULL,
+        model_params TEXT NOT NULL,
+        strategy_params TEXT NOT NULL,
+        date TEXT NOT NULL,
+        score REAL NOT NULL,
+        balance BLOB NOT NULL,
+        PRIMARY KEY (instrument, data_version, method, model, model_params,
+            strategy_params))""",
+    """CREATE INDEX IF NOT EXISTS evaluations_date
+        ON evaluations (instrument, date)""",
+    """CREATE INDEX IF NOT EXISTS evaluations_model
+        ON evaluations (model, model_params, strategy_params)"""]
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class Ledger():
+    """ Class responsible for storing and querying evaluations."""
+
+    def __init__(self, path=common.LEDGER_FILE):
+        """ Initialize the Ledger class, creating the database if needed.
+
+            Args:
+                path: string. Location of the SQLite database.
+
+            Returns:
+                void.
+        """
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+        return
+
+
+    def store(self, instrument, data_version, method, model, model_params, \
+            params_grid, balances, scores, date=None):
+        """ Store the evaluation of one model with all strategy parameters.
+
+            Args:
+                instrument: string. The currency pair. e.g. 'EUR_USD'.
+                data_version: string. As returned by get_data_version.
+                method: dict. Settings of the validation, e.g. the folds.
+                model: string. Name of the model.
+                model_params: dict. Parameters of the model.
+                params_grid: list of dicts. Each entry a set of strategy
+                    parameters.
+                balances: np.array of dim 2. Balance of every set of
+                    strategy parameters, one per row.
+                scores: np.array of dim 1. Score of every set of strategy
+                    parameters.
+                date: datetime.date or None. Date of the evaluation. Today
+                    if None.
+
+            Returns:
+                void.
+        """
+        date = str(date or datetime.date.today())
+        key = [instrument, data_version, encode(method), model, \
+                encode(model_params)]
+
+        rows = [key + [encode(params), date, float(score), \
+                np.asarray(balance, dtype=np.float64).tobytes()] \
+                for params, balance, score \
+                in zip(params_grid, balances, scores)]
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO evaluations VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+        return
+
+
+    def load(self, instrument, data_version, method, model, model_params, \
+            params_grid):
+        """ Load the evaluation of one model with all strategy parameters.
+
+            Args:
+                Same as in store, without the results.
+
+            Returns:
+                balances: np.array of dim 2. As in store. None if any set of
+                    strategy parameters was not stored.
+                scores: np.array of dim 1. As in store. None if any set of
+                    strategy parameters was not stored.
+        """
+        cursor = self.conn.execute("SELECT strategy_params, score, balance "
+                "FROM evaluations WHERE instrument = ? AND data_version = ? "
+                "AND method = ? AND model = ? AND model_params = ?", \
+                (instrument, data_version, encode(method), model, \
+                encode(model_params)))
+        stored = {row[0]: row[1:] for row in cursor}
+
+        keys = [encode(params) for params in params_grid]
+        if not all(key in stored for key in keys):
+            return None, None
+
+        scores = np.array([stored[key][0] for key in keys])
+        balances = np.array([np.frombuffer(stored[key][1], dtype=np.float64) \
+                for key in keys])
+
+        return balances, scores
+
+
+    def get_history(self, instrument, model=None, model_params=None, \
+            strategy_params=None):
+        """ Query the scores of the instrument across days.
+
+            Args:
+                instrument: string. The currency pair. e.g. 'EUR_USD'.
+                model: string or None. Only of this model, if given.
+                model_params: dict or None. Only these model parameters, if
+                    given.
+                strategy_params: dict or None. Only these strategy parameters,
+                    if given.
+
+            Returns:
+                history: list of tuples. Each entry the date, the model, the
+                    model parameters, the strategy parameters and the score,
+                    in order of date.
+        """
+        query = "SELECT date, model, model_params, strategy_params, score " \
+                "FROM evaluations WHERE instrument = ?"
+        args = [instrument]
+
+        for column, value in [('model', model), \
+                ('model_params', model_params), \
+                ('strategy_params', strategy_params)]:
+            if value is not None:
+                query += " AND {0} = ?".format(column)
+                args.append(value if column == 'model' else encode(value))
+
+        cursor = self.conn.execute(query + " ORDER BY date, rowid", args)
+        history = [(datetime.datetime.strptime(date, '%Y-%m-%d').date(), \
+                model_name, json.loads(model_json), json.loads(params_json), \
+                score) for date, model_name, model_json, params_json, score \
+                in cursor]
+
+        return history
+
+
+    def close(self):
+        """ Close the database.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        self.conn.close()
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def encode(params):
+    """ Encode parameters the same way whatever the order of their keys.
+
+        Args:
+            params: dict. Parameters.
+
+        Returns:
+            encoded: string. JSON with sorted keys.
+    """
+    encoded = json.dumps(params, sort_keys=True)
+
+    return encoded
+
+
+def get_data_version(learner, test_prices):
+    """ Hash the data an evaluation runs on.
+
+        Args:
+            learner: Learner instance. With the training data.
+            test_prices: np.array of dim 2. Prices for the dry runs.
+
+        Returns:
+            data_version: string. Hex digest identifying the data.
+    """
+    digest = hashlib.sha1()
+    for data in [learner.data_mat, test_prices]:
+        data = np.ascontiguousarray(data)
+        digest.update('{0}{1}'.format(data.dtype, data.shape).encode())
+        digest.update(data.data)
+
+    data_version = digest.hexdigest()
+
+    return data_version
+
+
+def get_file_version(files, *settings):
+    """ Hash the files the data of an evaluation is loaded from, and the
+        settings of loading it, without parsing them.
+
+        Args:
+            files: list of strings. Locations of the files.
+            settings: other values changing the data loaded. e.g. a window.
+
+        Returns:
+            data_version: string. Hex digest identifying the data.
+    """
+    digest = hashlib.sha1(repr(settings).encode())
+    for input_file in files:
+        digest.update(get_file_hash(input_file).encode())
+
+    data_version = digest.hexdigest()
+
+    return data_version
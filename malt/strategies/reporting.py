@@ -0,0 +1,185 @@
+""" This is the malt.strategies.reporting module.
+    This module is responsible for keeping the balance curves of strategy
+    runs in memory, and only rendering plots and reports of the best ones,
+    or of the ones asked for. Rendering happens in a background worker so
+    that the runs never wait for it.
+"""
+
+# External imports
+import numpy as np
+from concurrent import futures
+
+# Internal imports
+from malt import common
+logger = common.get_logger(__name__)
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class Reporter():
+    """ Class responsible for recording and rendering balance curves."""
+
+    def __init__(self, name, background=True):
+        """ Initialize the Reporter class.
+
+            Args:
+                name: string. Prefix of the plots. e.g. 'EUR_USD'.
+                background: boolean. Whether to render in a background
+                    worker instead of in the calling thread.
+
+            Returns:
+                void.
+        """
+        self.name = name
+        self.curves = {}
+        self.scores = {}
+        self.pending = []
+
+        # One worker keeps the plots of a reporter in order. Reporters of
+        # different instruments can render at the same time, common.plot
+        # shares no figure between threads.
+        if background:
+            self.worker = futures.ThreadPoolExecutor(max_workers=1)
+        else:
+            self.worker = None
+
+        return
+
+
+    def record(self, key, curve, score):
+        """ Keep a balance curve and its score. Nothing is rendered.
+
+            Args:
+                key: int. Identifier of the run. e.g. its index in the search.
+                curve: np.array. Accumulated profit/loss of every day.
+                score: float. Score of the run, higher is better.
+
+            Returns:
+                void.
+        """
+        self.curves[key] = curve
+        self.scores[key] = score
+
+        return
+
+
+    def get_top(self, k):
+        """ Obtain the runs with the highest scores. Ties go to the run
+            recorded first.
+
+            Args:
+                k: int. Number of runs.
+
+            Returns:
+                keys: list. Keys of the best runs, best first.
+        """
+        keys = list(self.scores)
+        order = np.argsort([-self.scores[key] for key in keys], kind='stable')
+        keys = [keys[i] for i in order[:k]]
+
+        return keys
+
+
+    def get_plot_name(self, key):
+        """ Obtain the name of the plot of a run.
+
+            Args:
+                key: int. Identifier of the run.
+
+            Returns:
+                plot_name: string. e.g. 'EUR_USD_12.png'.
+        """
+        plot_name = '{0}_{1}.png'.format(self.name, key)
+
+        return plot_name
+
+
+    def render(self, keys):
+        """ Plot the balance curves of the runs.
+
+            Args:
+                keys: list. Keys of the runs to be plotted.
+
+            Returns:
+                void.
+        """
+        for key in keys:
+            plot_name = self.get_plot_name(key)
+            if self.worker is None:
+                common.plot(self.curves[key], plot_name)
+            else:
+                self.pending.append(self.worker.submit(common.plot, \
+                        self.curves[key], plot_name))
+
+        return
+
+
+    def render_top(self, k):
+        """ Plot the balance curves of the runs with the highest scores.
+
+            Args:
+                k: int. Number of runs.
+
+            Returns:
+                void.
+        """
+        self.render(self.get_top(k))
+
+        return
+
+
+    def get_report(self, k):
+        """ Summarize the runs with the highest scores.
+
+            Args:
+                k: int. Number of runs.
+
+            Returns:
+                report: string. One line per run, best first.
+        """
+        lines = ['{0: >6} {1: >8} {2: >10}'.format('Run', 'Score', 'Balance')]
+        for key in self.get_top(k):
+            lines.append('{0: >6} {1: >8.4f} {2: >10.4f}'.format(key, \
+                    self.scores[key], self.curves[key][-1]))
+
+        report = '\n'.join(lines)
+
+        return report
+
+
+    def wait(self):
+        """ Block until all plots asked for are saved.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        pending, self.pending = self.pending, []
+        for future in pending:
+            # Failing to plot shouldn't fail the search.
+            try:
+                future.result()
+            except Exception as err:
+                logger.warning("Reporter: Failed to plot. %s", err)
+
+        return
+
+
+    def close(self):
+        """ Wait for the plots and stop the background worker.
+
+            Args:
+                void.
+
+            Returns:
+                void.
+        """
+        self.wait()
+        if self.worker is not None:
+            self.worker.shutdown()
+            self.worker = None
+
+        return
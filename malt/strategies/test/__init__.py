@@ -0,0 +1,4 @@
+""" This is the malt.strategies.test package.
+    This package is responsible for testing the modules shared by all
+    strategies in the malt.strategies package.
+"""
@@ -0,0 +1,108 @@
+""" This is the malt.strategies.test.test_artifacts module.
+    This module is responsible for testing malt.strategies.artifacts.
+"""
+
+# External imports
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from sklearn import tree
+
+# Internal imports
+from malt.strategies import artifacts, flat_tree
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestArtifacts(unittest.TestCase):
+    """ Class for testing artifacts."""
+
+    def setUp(self):
+        """ Set up a temporary directory and a trained model."""
+        self.tmp_dir = tempfile.mkdtemp()
+
+        X = np.arange(40, dtype=np.float64).reshape(20, 2)
+        self.model = tree.DecisionTreeRegressor(max_depth=2).fit(X, X[:, 0])
+
+        return
+
+
+    def tearDown(self):
+        """ Delete the temporary directory."""
+        shutil.rmtree(self.tmp_dir)
+
+        return
+
+
+    def test_publish_load(self):
+        """ Test versions are published, loaded and pruned."""
+        for threshold in range(4):
+            manifest = artifacts.publish('GBP_USD', self.model, \
+                    {'threshold': threshold}, self.tmp_dir, keep=2)
+
+        self.assertEqual(manifest['version'], 4)
+        self.assertEqual(artifacts.read_manifest('GBP_USD', self.tmp_dir), \
+                manifest)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir + '/GBP_USD')), \
+                ['3', '4'])
+
+        # Live trading loads the flat tree.
+        model, params = artifacts.load('GBP_USD', directory=self.tmp_dir)
+        self.assertIsInstance(model, flat_tree.FlatTree)
+        self.assertEqual(params, {'threshold': 3})
+
+        model, _ = artifacts.load('GBP_USD', flat=False, \
+                directory=self.tmp_dir)
+        self.assertIsInstance(model, tree.DecisionTreeRegressor)
+
+        # Changed files are found out.
+        param_file = "{0}/{1}".format(artifacts.get_version_dir('GBP_USD', \
+                4, self.tmp_dir), artifacts.PARAM_FILE)
+        with open(param_file, 'w') as out_handle:
+            out_handle.write('{"threshold": 0}')
+        with self.assertRaises(ValueError):
+            artifacts.load('GBP_USD', directory=self.tmp_dir)
+
+        return
+
+
+    def test_watcher(self):
+        """ Test new versions are swapped in, and failures keep the old."""
+        loader = lambda instrument, manifest: artifacts.load(instrument, \
+                manifest, directory=self.tmp_dir)[1]
+        watcher = artifacts.Watcher(['GBP_USD'], loader, self.tmp_dir)
+
+        artifacts.publish('GBP_USD', self.model, {'threshold': 1}, \
+                self.tmp_dir)
+        self.assertEqual(watcher.check(), ['GBP_USD'])
+        self.assertEqual(watcher.check(), [])
+
+        # A day keeps trading with its snapshot.
+        strategies = watcher.snapshot()
+        artifacts.publish('GBP_USD', self.model, {'threshold': 2}, \
+                self.tmp_dir)
+        self.assertEqual(watcher.check(), ['GBP_USD'])
+        self.assertEqual(strategies['GBP_USD'], {'threshold': 1})
+        self.assertEqual(watcher.snapshot()['GBP_USD'], {'threshold': 2})
+
+        # A version that fails to load is not swapped in.
+        manifest = artifacts.publish('GBP_USD', self.model, \
+                {'threshold': 3}, self.tmp_dir)
+        shutil.rmtree(artifacts.get_version_dir('GBP_USD', \
+                manifest['version'], self.tmp_dir))
+        self.assertEqual(watcher.check(), [])
+        self.assertEqual(watcher.snapshot()['GBP_USD'], {'threshold': 2})
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
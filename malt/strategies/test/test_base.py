@@ -0,0 +1,93 @@
+""" This is the malt.strategies.test.test_base module.
+    This module is responsible for testing malt.strategies.base.
+"""
+
+# External imports
+import glob
+import os
+import shutil
+import unittest
+import numpy as np
+from concurrent import futures
+
+# Internal imports
+from malt import common
+from malt.strategies import base
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestBase(unittest.TestCase):
+    """ Class for testing base."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        test_dir = common.PROJECT_DIR + '/strategies/euler/test'
+        self.clean_file = "{0}/GBP_USD_test_clean.csv".format(test_dir)
+        self.tmp_file = 'tmp.csv'
+        shutil.copyfile(self.clean_file, self.tmp_file)
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        for tmp_file in glob.glob(self.tmp_file + '*'):
+            os.remove(tmp_file)
+
+        return
+
+
+    def test_load_features(self):
+        """ Test loading features through the binary sidecar."""
+        # Same values as read_features.
+        mat = base.load_features(self.tmp_file)
+        self.assertTrue(isinstance(mat, np.memmap))
+        self.assertEqual(mat.shape, (2853, 8))
+        self.assertTrue((mat == base.read_features(self.clean_file)).all())
+
+        # Half the memory.
+        mat_32 = base.load_features(self.tmp_file, np.float32)
+        self.assertEqual(mat_32.dtype, np.float32)
+        self.assertEqual(mat_32.nbytes * 2, mat.nbytes)
+
+        # Touching the file keeps the sidecar, changing it rebuilds it.
+        sidecar = self.tmp_file + '.float64.npy'
+        built = os.stat(sidecar).st_mtime_ns
+        os.utime(self.tmp_file, ns=(0, 0))
+        base.load_features(self.tmp_file)
+        self.assertEqual(os.stat(sidecar).st_mtime_ns, built)
+
+        with open(self.tmp_file, 'a') as tmp_handle:
+            tmp_handle.write('1 2 3 4 5 6 7 8\r\n')
+        mat = base.load_features(self.tmp_file)
+        self.assertEqual(mat.shape, (2854, 8))
+        self.assertEqual(mat[-1, -1], 8)
+
+        return
+
+
+    def test_concurrent_load(self):
+        """ Test processes rebuilding the same sidecar at once all load it."""
+        with futures.ProcessPoolExecutor(max_workers=4) as pool:
+            shapes = list(pool.map(get_shape, [self.tmp_file] * 8))
+
+        self.assertEqual(shapes, [(2853, 8)] * 8)
+        self.assertEqual(glob.glob(self.tmp_file + '*.tmp'), [])
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+def get_shape(input_file):
+    """ Load the features in a worker process, returning their shape."""
+    return base.load_features(input_file).shape
+
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
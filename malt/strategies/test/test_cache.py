@@ -0,0 +1,95 @@
+""" This is the malt.strategies.test.test_cache module.
+    This module is responsible for testing malt.strategies.cache.
+"""
+
+# External imports
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from sklearn import tree
+
+# Internal imports
+from malt.strategies import cache
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestCache(unittest.TestCase):
+    """ Class for testing cache."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        self.cache_dir = tempfile.mkdtemp()
+
+        random = np.random.RandomState(888)
+        self.train_set = random.normal(size=(200, 7))
+        self.train_val = random.normal(size=200)
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        shutil.rmtree(self.cache_dir)
+
+        return
+
+
+    def test_fit(self):
+        """ Test training the same way again loads the trained model."""
+        model = tree.DecisionTreeRegressor(max_depth=4, random_state=888)
+        fitted = cache.fit(model, self.train_set, self.train_val, 0.9, \
+                self.cache_dir)
+        self.assertIs(fitted, model)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        # A hit is loaded from disk, so it is a different object.
+        model = tree.DecisionTreeRegressor(max_depth=4, random_state=888)
+        cached = cache.fit(model, self.train_set, self.train_val, 0.9, \
+                self.cache_dir)
+        self.assertIsNot(cached, model)
+        self.assertEqual(cached.predict(self.train_set).tolist(), \
+                fitted.predict(self.train_set).tolist())
+
+        # Anything else changing is a miss.
+        key = cache.get_key(model, self.train_set, self.train_val, 0.9)
+        self.assertNotEqual(key, cache.get_key(model, self.train_set, \
+                self.train_val, 1))
+        self.assertNotEqual(key, cache.get_key(model, self.train_set[1:], \
+                self.train_val[1:], 0.9))
+        model.set_params(max_depth=5)
+        self.assertNotEqual(key, cache.get_key(model, self.train_set, \
+                self.train_val, 0.9))
+
+        return
+
+
+    def test_evict(self):
+        """ Test the least recently used models are evicted."""
+        keys = ['a', 'b', 'c']
+        for i, key in enumerate(keys):
+            cache.store(key, list(range(1000)), self.cache_dir)
+            os.utime(cache.get_path(key, self.cache_dir), (i, i))
+
+        # Using 'a' makes 'b' the least recently used.
+        self.assertEqual(cache.load('a', self.cache_dir), list(range(1000)))
+        size = os.path.getsize(cache.get_path('a', self.cache_dir))
+        cache.evict(self.cache_dir, 2 * size)
+
+        self.assertIsNone(cache.load('b', self.cache_dir))
+        self.assertIsNotNone(cache.load('a', self.cache_dir))
+        self.assertIsNotNone(cache.load('c', self.cache_dir))
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
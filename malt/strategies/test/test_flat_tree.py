@@ -0,0 +1,84 @@
+""" This is the malt.strategies.test.test_flat_tree module.
+    This module is responsible for testing malt.strategies.flat_tree.
+"""
+
+# External imports
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+from sklearn import tree
+
+# Internal imports
+from malt import common
+from malt.strategies import flat_tree
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestFlatTree(unittest.TestCase):
+    """ Class for testing flat_tree."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        handle, self.tmp_file = tempfile.mkstemp(suffix='.npy')
+        os.close(handle)
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        os.remove(self.tmp_file)
+
+        return
+
+
+    def test_predict(self):
+        """ Test the exported tree predicts the same as the fitted tree."""
+        random = np.random.RandomState(888)
+        train_set = np.round(random.normal(0, 100, size=(500, 7)), 1)
+        train_val = train_set[:, 0] - train_set[:, 3] + random.normal(size=500)
+        test_set = np.round(random.normal(0, 100, size=(200, 7)), 1)
+
+        model = tree.DecisionTreeRegressor(max_depth=8, random_state=888)
+        model.fit(train_set, train_val)
+        self.assertTrue(flat_tree.is_exportable(model))
+
+        flat_tree.FlatTree.from_model(model).save(self.tmp_file)
+        exported = flat_tree.FlatTree.load(self.tmp_file)
+
+        expected = model.predict(test_set)
+        self.assertEqual(exported.predict(test_set).tolist(), \
+                expected.tolist())
+        self.assertEqual([exported.predict_row(x) for x in test_set], \
+                expected.tolist())
+
+        # A single row as Euler.execute passes it.
+        self.assertEqual(exported.predict(test_set[:1]).tolist(), \
+                expected[:1].tolist())
+
+        return
+
+
+    def test_live_imports(self):
+        """ Test live trading doesn't import sklearn."""
+        code = "import sys; import malt.exec.daily_run; " \
+                "print(any(x.startswith('sklearn') for x in sys.modules))"
+        output = subprocess.check_output([sys.executable, '-c', code], \
+                cwd=common.PROJECT_DIR + '/..')
+        self.assertEqual(output.decode().strip(), 'False')
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+""" This is the malt.strategies.test.test_ledger module.
+    This module is responsible for testing malt.strategies.ledger.
+"""
+
+# External imports
+import datetime
+import os
+import tempfile
+import unittest
+import numpy as np
+
+# Internal imports
+from malt.strategies import ledger
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestLedger(unittest.TestCase):
+    """ Class for testing ledger."""
+
+    def setUp(self):
+        """ Set up a temporary database."""
+        handle, self.tmp_file = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+
+        return
+
+
+    def tearDown(self):
+        """ Delete the temporary database."""
+        os.remove(self.tmp_file)
+
+        return
+
+
+    def test_store_load(self):
+        """ Test evaluations are kept by data version and queried by day."""
+        params_grid = [{'threshold': 40., 'unit_shape': 'LINEAR'}, \
+                {'threshold': 60., 'unit_shape': 'LINEAR'}]
+        balances = np.array([[0., 1.5, 2.], [0., -1., 3.25]])
+        scores = np.array([0.5, 0.75])
+        key = ('GBP_USD', 'v1', {'folds': 5}, 'DecisionTreeRegressor', \
+                {'min_samples_split': 2, 'max_depth': 4})
+
+        evaluations = ledger.Ledger(self.tmp_file)
+        self.assertEqual(evaluations.load(*key, params_grid), (None, None))
+        evaluations.store(*key, params_grid, balances, scores, \
+                datetime.date(2017, 3, 1))
+        evaluations.close()
+
+        # Kept across processes, whatever the order of the parameters.
+        evaluations = ledger.Ledger(self.tmp_file)
+        model_params = {'max_depth': 4, 'min_samples_split': 2}
+        stored = evaluations.load(*key[:-1], model_params, params_grid[::-1])
+        self.assertTrue(np.array_equal(stored[0], balances[::-1]))
+        self.assertTrue(np.array_equal(stored[1], scores[::-1]))
+
+        # Missing any strategy parameters is missing the evaluation.
+        self.assertEqual(evaluations.load(*key, params_grid + [{}]), \
+                (None, None))
+
+        # Another day on new data.
+        evaluations.store('GBP_USD', 'v2', *key[2:], params_grid, \
+                balances, scores - 0.25, datetime.date(2017, 3, 2))
+        history = evaluations.get_history('GBP_USD', \
+                strategy_params=params_grid[1])
+        evaluations.close()
+
+        self.assertEqual([(day.day, score) for day, _, _, _, score \
+                in history], [(1, 0.75), (2, 0.5)])
+        self.assertEqual(history[0][2], model_params)
+
+        return
+
+
+    def test_get_file_version(self):
+        """ Test the version changes with the files and the settings."""
+        with open(self.tmp_file, 'w') as out_handle:
+            out_handle.write('2017-03-01 1.2\n')
+        version = ledger.get_file_version([self.tmp_file], 500)
+
+        self.assertEqual(ledger.get_file_version([self.tmp_file], 500), \
+                version)
+        self.assertNotEqual(ledger.get_file_version([self.tmp_file], 600), \
+                version)
+        with open(self.tmp_file, 'a') as out_handle:
+            out_handle.write('2017-03-02 1.3\n')
+        self.assertNotEqual(ledger.get_file_version([self.tmp_file], 500), \
+                version)
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+""" This is the malt.strategies.test.test_reporting module.
+    This module is responsible for testing malt.strategies.reporting.
+"""
+
+# External imports
+import glob
+import os
+import unittest
+import numpy as np
+
+# Internal imports
+from malt.strategies import reporting
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class TestReporting(unittest.TestCase):
+    """ Class for testing reporting."""
+
+    def setUp(self):
+        """ Set up temporary files."""
+        self.name = 'tmp_report'
+
+        return
+
+
+    def tearDown(self):
+        """ Delete temporary files."""
+        for tmp_file in glob.glob(self.name + '_*.png'):
+            os.remove(tmp_file)
+
+        return
+
+
+    def test_render_top(self):
+        """ Test only the runs with the highest scores are plotted."""
+        reporter = reporting.Reporter(self.name)
+        for key, score in enumerate([0.2, 0.7, 0.1, 0.7, 0.5]):
+            reporter.record(key, np.linspace(0, score, 10), score)
+
+        # Ties go to the run recorded first.
+        self.assertEqual(reporter.get_top(3), [1, 3, 4])
+        self.assertEqual(len(reporter.get_report(3).splitlines()), 4)
+
+        # Nothing is plotted until asked.
+        self.assertEqual(glob.glob(self.name + '_*.png'), [])
+
+        reporter.render_top(2)
+        reporter.close()
+        plots = sorted(glob.glob(self.name + '_*.png'))
+        self.assertEqual(plots, [self.name + '_1.png', self.name + '_3.png'])
+
+        return
+
+
+    def test_concurrent_render(self):
+        """ Test reporters rendering at the same time draw the same plots as
+            one at a time.
+        """
+        def render(background):
+            reporters = [reporting.Reporter('{0}_{1}'.format(self.name, i), \
+                    background) for i in range(4)]
+            for i, reporter in enumerate(reporters):
+                for key in range(5):
+                    reporter.record(key, np.linspace(0, i - key, 10), key)
+                reporter.render_top(5)
+            for reporter in reporters:
+                reporter.close()
+
+            plots = {}
+            for plot_name in glob.glob(self.name + '_*.png'):
+                with open(plot_name, 'rb') as in_handle:
+                    plots[plot_name] = in_handle.read()
+                os.remove(plot_name)
+
+            return plots
+
+        plots = render(True)
+        self.assertEqual(len(plots), 20)
+        self.assertEqual(plots, render(False))
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+""" This is the malt.test.test_session module.
+    This module is responsible for testing malt.session.
+"""
+
+# External imports
+import http.client
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Internal imports
+from malt import session
+
+#===============================================================================
+#   Classes:
+#===============================================================================
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """ Request handler answering with the port of the client connection."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """ Answer a GET request with the client port, keeping it alive."""
+        content = str(self.client_address[1]).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        self.wfile.write(content)
+
+        return
+
+
+    def log_message(self, *args):
+        """ Keep the test output quiet."""
+        pass
+
+
+class StaleHandler(EchoHandler):
+    """ Request handler dropping the connection after answering, without
+        telling the client.
+    """
+
+    def do_GET(self):
+        """ Answer a GET request, then drop the connection."""
+        EchoHandler.do_GET(self)
+        self.close_connection = True
+
+        return
+
+
+    # Bodies of the POST requests received.
+    posts = []
+
+    def do_POST(self):
+        """ Answer a POST request the same as a GET request."""
+        self.posts.append(self.rfile.read(int(self.headers['Content-Length'])))
+        self.do_GET()
+
+        return
+
+
+class TestSession(unittest.TestCase):
+    """ Class for testing session."""
+
+    def setUp(self):
+        """ Start a local server."""
+        self.server = self.start_server(EchoHandler)
+        self.host = '127.0.0.1:{0}'.format(self.server.server_port)
+
+        return
+
+
+    def tearDown(self):
+        """ Stop the local servers."""
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+        return
+
+
+    def start_server(self, handler):
+        """ Start a local server answering with the handler."""
+        server = HTTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.servers = getattr(self, 'servers', []) + [server]
+
+        return server
+
+
+    def test_connection_reuse(self):
+        """ Test consecutive requests share one kept-alive connection."""
+        pool = session.ConnectionPool(self.host, size=2, rate=0, secure=False)
+        ports = [pool.request("GET", "/", "", {}) for _ in range(3)]
+        pool.close()
+
+        self.assertEqual(len(set(ports)), 1)
+
+        return
+
+
+    def test_warm(self):
+        """ Test warmed connections are opened once and used by requests."""
+        # The server answers one connection at a time.
+        pool = session.ConnectionPool(self.host, size=1, rate=0, secure=False)
+        pool.warm(3)
+        pool.warm(1)
+        self.assertEqual(len(pool.idle), 1)
+
+        ports = {str(conn.sock.getsockname()[1]) for _, conn in pool.idle}
+        self.assertIn(pool.request("GET", "/", "", {}), ports)
+        pool.close()
+
+        return
+
+
+    def test_reconnect(self):
+        """ Test requests failing on dropped connections are sent again only
+            if safe to repeat.
+        """
+        StaleHandler.posts = []
+        server = self.start_server(StaleHandler)
+        host = '127.0.0.1:{0}'.format(server.server_port)
+        pool = session.ConnectionPool(host, size=1, rate=0, secure=False)
+
+        # Each request finds the connection of the previous one dropped.
+        ports = [pool.request("GET", "/", "", {}) for _ in range(3)]
+        self.assertEqual(len(set(ports)), 3)
+
+        # Orders are sent again only if they didn't leave, so never twice.
+        try:
+            pool.request("POST", "/", "units=1", {})
+        except (http.client.HTTPException, OSError):
+            pass
+        self.assertTrue(len(StaleHandler.posts) <= 1)
+
+        # Connections idle for too long are not reused at all.
+        pool.request("GET", "/", "", {})
+        pool.idle_timeout = 0
+        StaleHandler.posts = []
+        self.assertTrue(pool.request("POST", "/", "units=2", {}))
+        self.assertEqual(StaleHandler.posts, [b'units=2'])
+        pool.close()
+
+        return
+
+
+    def test_rate_limiter(self):
+        """ Test requests are spaced out to the maximum rate."""
+        limiter = session.RateLimiter(20)
+
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.wait()
+        elapsed = time.monotonic() - start
+
+        # The first request goes right away, the other 4 wait 0.05s each.
+        self.assertTrue(elapsed >= 0.2)
+
+        return
+
+
+#===============================================================================
+#   Functions:
+#===============================================================================
+
+# Main.
+if __name__ == "__main__":
+    unittest.main()